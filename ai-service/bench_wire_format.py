@@ -0,0 +1,85 @@
+"""
+Wire Format Benchmark - JSON vs MessagePack vs columnar MessagePack
+Compares request payload size and server-side decode time (bytes ->
+validated AnalyzeRequest) for synthetic projects:
+
+    python bench_wire_format.py 1000 10000 50000
+"""
+
+import json
+import random
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import msgpack
+
+from models.schemas import AnalyzeRequest, ProjectInput
+from services.wire_format import decode_body, encode_project
+
+
+def make_project(task_count: int, seed: int = 0) -> ProjectInput:
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    users = [(str(uuid.UUID(int=rng.getrandbits(128))), f"User {i}") for i in range(max(task_count // 25, 2))]
+    tasks, deps = [], []
+    for i in range(task_count):
+        user_id, user_name = rng.choice(users)
+        created = now + timedelta(days=rng.randint(0, 300), seconds=rng.randint(0, 86399))
+        tasks.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Task {i} {rng.choice(['API', 'UI', 'DB', 'Auth', 'Deploy'])}",
+            "description": None if i % 3 else f"Implement part {i} of the feature",
+            "status": rng.choice(["TODO", "IN_PROGRESS", "DONE"]),
+            "priority": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            "assigneeId": user_id,
+            "assigneeName": user_name,
+            "due_date": (created + timedelta(days=rng.randint(1, 40))).isoformat() + "Z",
+            "createdAt": created.isoformat() + "Z",
+        })
+        if i and rng.random() < 0.8:
+            deps.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "taskId": tasks[-1]["id"],
+                "dependsOnTaskId": tasks[rng.randrange(i)]["id"],
+                "type": "FINISH_TO_START",
+            })
+    return ProjectInput.model_validate({
+        "id": "bench", "name": "Benchmark", "tasks": tasks, "existingDependencies": deps
+    })
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main(sizes):
+    print(f"{'tasks':>7} {'format':<18} {'bytes':>11} {'deflate':>11} {'decode ms':>10}")
+    for size in sizes:
+        project = make_project(size)
+        bodies = {
+            "json": json.dumps({"project": project.model_dump(mode="json")}).encode(),
+            "msgpack": msgpack.packb({"project": project.model_dump(mode="json")}),
+            "msgpack-columnar": msgpack.packb({"project": encode_project(project)}),
+        }
+        decoders = {
+            "json": lambda body: AnalyzeRequest.model_validate(json.loads(body)),
+            "msgpack": lambda body: AnalyzeRequest.model_validate(decode_body(body)),
+            "msgpack-columnar": lambda body: AnalyzeRequest.model_validate(decode_body(body)),
+        }
+        for name, body in bodies.items():
+            decode = decoders[name]
+            assert len(decode(body).project.tasks) == size
+            elapsed = best_of(lambda: decode(body))
+            print(f"{size:>7} {name:<18} {len(body):>11,} {len(zlib.compress(body)):>11,} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -12,9 +12,50 @@ class Settings(BaseSettings):
     # LLM API Keys
     GROQ_API_KEY: str = ""
     GEMINI_API_KEY: str = ""
+    GROQ_BASE_URL: str = ""  # e.g. point at mock_llm_server for load tests
     
-    # Database
+    # Provider mode: live | mock | record | replay
+    LLM_PROVIDER: str = "live"
+    LLM_RECORDINGS_DIR: str = "data/llm_recordings"  # relative to ai-service/
+    
+    # Mock provider behaviour (LLM_PROVIDER=mock or mock_llm_server)
+    MOCK_LLM_LATENCY_MS: float = 800.0  # median latency
+    MOCK_LLM_JITTER: float = 0.5  # log-normal sigma
+    MOCK_LLM_ERROR_RATE: float = 0.0
+    MOCK_LLM_RATE_LIMIT_RATE: float = 0.0
+    MOCK_LLM_SEED: int = 0
+    
+    # Provider quotas (0 = unlimited) and queue-time budgets per lane
+    GROQ_RPM: int = 30
+    GROQ_TPM: int = 6000
+    GEMINI_RPM: int = 15
+    GEMINI_TPM: int = 1000000
+    MOCK_LLM_RPM: int = 0
+    MOCK_LLM_TPM: int = 0
+    LLM_QUEUE_BUDGET_INTERACTIVE_SECONDS: float = 2.0
+    LLM_QUEUE_BUDGET_BATCH_SECONDS: float = 30.0
+    LLM_QUEUE_BUDGET_BACKGROUND_SECONDS: float = 120.0
+
+    # Micro-batching: concurrent small detect_dependencies calls share one prompt (never in record/replay)
+    LLM_BATCH_ENABLED: bool = True
+    LLM_BATCH_WINDOW_MS: float = 5.0  # flush once no call has joined for this long
+    LLM_BATCH_MAX_WAIT_MS: float = 25.0  # never hold the first call longer than this
+    LLM_BATCH_MAX_PROJECTS: int = 4  # keeps all suggestions within one 1024-token completion
+    LLM_BATCH_MAX_TASKS: int = 30  # per project after pre-filtering; larger ones go alone
+
+    # Local candidate pre-filter for dependency detection
+    DEPENDENCY_PREFILTER_ENABLED: bool = True
+    DEPENDENCY_CANDIDATE_TOP_K: int = 20
+    DEPENDENCY_FALLBACK_MAX_TASKS: int = 40  # prompted as-is when no pair has lexical overlap
+    # Collapse near-duplicate tasks (MinHash/LSH) to one before prompting
+    DUPLICATE_COLLAPSE_ENABLED: bool = True
+    DUPLICATE_SIMILARITY_THRESHOLD: float = 0.8
+    
+    # Database (postgresql://... or sqlite:///file.db) for the direct read path
     DATABASE_URL: str = ""
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_QUERY_TIMEOUT_SECONDS: float = 10.0
     
     # Node.js backend for email notifications
     NODE_API_URL: str = "http://localhost:5000"
@@ -25,6 +66,54 @@ class Settings(BaseSettings):
     # Risk thresholds
     RISK_ALERT_THRESHOLD: int = 50  # Send email when score drops below this
     
+    # Near-critical paths: k longest chains, and tasks within this many days of float
+    NEAR_CRITICAL_PATHS: int = 5
+    NEAR_CRITICAL_FLOAT_DAYS: int = 3
+    NEAR_CRITICAL_MAX_TASKS: int = 200  # cap on tasks listed per response
+    
+    # Timeline layouts kept per pool worker for paging (project content + swimlane)
+    TIMELINE_LAYOUT_CACHE_SIZE: int = 8
+    
+    # Risk history (SQLite file relative to ai-service/, ":memory:" to disable persistence)
+    RISK_HISTORY_PATH: str = "data/risk_history.db"
+    RISK_HISTORY_RETENTION_DAYS: float = 90.0  # 0 keeps snapshots forever
+    
+    # Request profiling (disabled while PROFILING_SECRET is empty)
+    PROFILING_SECRET: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of traffic sampled automatically
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILES_DIR: str = "data/profiles"  # relative to ai-service/
+    PROFILES_MAX_COUNT: int = 200
+    
+    # CPU work: process pools per lane; projects at or above the threshold use the bulk lane
+    CPU_POOL_WORKERS: int = 2
+    CPU_POOL_BULK_WORKERS: int = 1
+    CPU_POOL_BACKGROUND_WORKERS: int = 1  # scheduler refreshes only
+    CPU_POOL_BACKGROUND_NICE: int = 10
+    LARGE_PROJECT_TASK_THRESHOLD: int = 2000
+    
+    # Admission control per lane pool and, within it, per endpoint (excess requests get 503 + Retry-After)
+    ADMISSION_POOL_QUEUE_SIZE: int = 32  # jobs waiting for a free interactive worker, all endpoints
+    ADMISSION_BULK_POOL_QUEUE_SIZE: int = 4
+    ADMISSION_CONCURRENCY: int = 4
+    ADMISSION_QUEUE_SIZE: int = 16
+    ADMISSION_BULK_CONCURRENCY: int = 1
+    ADMISSION_BULK_QUEUE_SIZE: int = 2
+    ADMISSION_MAX_WAIT_SECONDS: float = 10.0
+    
+    # Background re-analysis of watched projects (keep the interval under the cache TTL)
+    RISK_SCHEDULER_ENABLED: bool = True
+    RISK_SCHEDULER_AUTO_WATCH: bool = False  # also watch every analyzed project (needs DATABASE_URL)
+    RISK_SCHEDULER_INTERVAL_SECONDS: float = 240.0
+    RISK_SCHEDULER_JITTER: float = 0.1  # +/- fraction of the interval
+    RISK_SCHEDULER_CONCURRENCY: int = 2
+    RISK_SCHEDULER_MAX_PROJECTS: int = 500
+    RISK_SCHEDULER_IDLE_TTL_SECONDS: float = 86400.0
+    
+    # Response cache for /analyze and /risk/calculate
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
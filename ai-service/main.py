@@ -3,11 +3,19 @@ AI Dependency Brain - FastAPI Application
 Main entry point for the AI service
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from routers import analysis
+from routers import analysis, profiles
+from services.rate_limiter import rate_limiter
+from services.llm_service import llm_service
+from services.project_store import project_store
+from services.admission import cpu_scheduler, Overloaded, overloaded_handler, admission_middleware
+from services.risk_scheduler import risk_scheduler
+from services.risk_history import risk_history
+from services.portfolio_rollup import portfolio_rollup
 from config import settings
 
 
@@ -17,7 +25,19 @@ async def lifespan(app: FastAPI):
     print(f"🧠 AI Dependency Brain starting on port {settings.PORT}")
     print(f"📊 Primary LLM: Groq (Llama 3.3 70B)")
     print(f"🔄 Fallback LLM: Gemini 1.5 Flash")
+    if project_store.enabled:
+        print("🗄️ Direct database read path enabled")
+    await asyncio.to_thread(risk_history.open)
+    await cpu_scheduler.warm_up()
+    print(f"⚙️ CPU pools ready ({settings.CPU_POOL_WORKERS} interactive, {settings.CPU_POOL_BULK_WORKERS} bulk)")
+    if settings.RISK_SCHEDULER_ENABLED:
+        await risk_scheduler.start()
+        print(f"⏱️ Risk scheduler refreshing active projects every ~{settings.RISK_SCHEDULER_INTERVAL_SECONDS:.0f}s")
     yield
+    await risk_scheduler.stop()
+    cpu_scheduler.shutdown()
+    await project_store.close()
+    risk_history.close()
     print("👋 AI Dependency Brain shutting down")
 
 
@@ -37,8 +57,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (no-op unless PROFILING_SECRET is set)
+app.middleware("http")(profiles.profiling_middleware)
+
+# Load shedding from admission control (outermost, before bodies are parsed)
+app.middleware("http")(admission_middleware)
+app.add_exception_handler(Overloaded, overloaded_handler)
+
 # Include routers
 app.include_router(analysis.router, prefix="/api/v1", tags=["Analysis"])
+app.include_router(profiles.router, prefix="/api/v1", tags=["Profiling"])
 
 
 @app.get("/")
@@ -57,7 +85,12 @@ def health_check():
     return {
         "status": "healthy",
         "primary_llm": "groq",
-        "fallback_llm": "gemini"
+        "fallback_llm": "gemini",
+        "llm_quota": rate_limiter.stats(),
+        "llm_batching": llm_service.batcher.stats(),
+        "admission": cpu_scheduler.stats(),
+        "riskScheduler": risk_scheduler.stats(),
+        "portfolio": portfolio_rollup.stats()
     }
 
 
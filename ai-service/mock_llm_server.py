@@ -0,0 +1,96 @@
+"""
+Mock LLM Server - Local Groq-compatible stand-in for load testing
+Serves /openai/v1/chat/completions with MockProvider latency, error and
+429 injection. Point the AI service at it with:
+
+    uvicorn mock_llm_server:app --port 9000
+    GROQ_API_KEY=mock GROQ_BASE_URL=http://localhost:9000 uvicorn main:app
+"""
+
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from config import settings
+from services.llm_providers import MockProvider, ProviderRateLimitError
+
+
+provider = MockProvider(
+    latency_ms=settings.MOCK_LLM_LATENCY_MS,
+    jitter=settings.MOCK_LLM_JITTER,
+    error_rate=settings.MOCK_LLM_ERROR_RATE,
+    rate_limit_rate=settings.MOCK_LLM_RATE_LIMIT_RATE,
+    seed=settings.MOCK_LLM_SEED
+)
+
+app = FastAPI(title="Mock LLM Server")
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI-style chat completion backed by MockProvider"""
+    body = await request.json()
+    prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(prompt, body.get("model", "mock")), media_type="text/event-stream")
+
+    try:
+        content = await provider.complete(prompt)
+    except ProviderRateLimitError as e:
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": "1"},
+            content={"error": {"message": str(e), "type": "tokens", "code": "rate_limit_exceeded"}}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": str(e), "type": "server_error"}}
+        )
+
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+async def _stream_chunks(prompt: str, model: str):
+    """OpenAI-style chat.completion.chunk events"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    try:
+        async for text in provider.stream(prompt):
+            yield chunk({"content": text})
+        yield chunk({}, "stop")
+    except Exception as e:
+        yield f"data: {json.dumps({'error': {'message': str(e)}})}\n\n"
+    yield "data: [DONE]\n\n"
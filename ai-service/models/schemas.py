@@ -3,8 +3,8 @@ Pydantic schemas for API request/response models
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import datetime, date
 from enum import Enum
 
 
@@ -26,6 +26,14 @@ class DependencyType(str, Enum):
     FINISH_TO_FINISH = "FINISH_TO_FINISH"
 
 
+class WhatIfChangeType(str, Enum):
+    DELAY = "DELAY"
+    SET_STATUS = "SET_STATUS"
+    REASSIGN = "REASSIGN"
+    ADD_DEPENDENCY = "ADD_DEPENDENCY"
+    REMOVE_DEPENDENCY = "REMOVE_DEPENDENCY"
+
+
 # ================================
 # Input Schemas
 # ================================
@@ -50,6 +58,7 @@ class ProjectInput(BaseModel):
     description: Optional[str] = None
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    workspaceId: Optional[str] = None  # portfolio rollup key
     tasks: List[TaskInput]
     existingDependencies: List["DependencyInput"] = []
 
@@ -67,6 +76,75 @@ class AnalyzeRequest(BaseModel):
     project: ProjectInput
 
 
+class WorkloadHeatmapRequest(BaseModel):
+    """Request for an assignee workload heatmap"""
+    tasks: List[TaskInput]
+    start: Optional[date] = None  # defaults to the earliest task day
+    end: Optional[date] = None  # defaults to the latest due date
+    windowDays: int = Field(7, ge=1, le=366)
+    assigneeIds: Optional[List[str]] = None
+    includeDone: bool = False
+
+
+class WorkspaceAnalyzeRequest(BaseModel):
+    """Request for cross-project analysis of a whole workspace"""
+    workspaceId: Optional[str] = None
+    projects: List[ProjectInput]
+    start: Optional[date] = None  # defaults to each assignee's first task day
+    end: Optional[date] = None
+    concurrencyThreshold: int = Field(3, ge=2)  # concurrent tasks that count as overload
+    includeDone: bool = False
+
+
+class DuplicateDetectionRequest(BaseModel):
+    """Request for near-duplicate task detection"""
+    tasks: List[TaskInput]
+    threshold: float = Field(0.8, ge=0.3, le=1.0)  # shingle Jaccard similarity
+
+
+class TimelineRequest(BaseModel):
+    """Request for a Gantt timeline layout page"""
+    project: ProjectInput
+    start: Optional[date] = None  # window start, defaults to the first task day
+    end: Optional[date] = None  # window end (exclusive), defaults to the last due date
+    swimlane: str = Field("assignee", pattern="^(assignee|status|priority|none)$")
+    lod: str = Field("auto", pattern="^(auto|tasks|summary)$")
+    maxBars: int = Field(2000, ge=1, le=50000)  # auto switches to summaries above this
+    bucketDays: Optional[int] = Field(None, ge=1, le=366)  # summary bucket width, auto-sized if unset
+    version: Optional[str] = Field(None, max_length=200)  # caller's project version; skips hashing the content
+
+
+class PortfolioRefreshRequest(BaseModel):
+    """Request to (re)score a workspace's projects into the portfolio rollup"""
+    workspaceId: str
+    projects: List[ProjectInput]
+    worst: int = Field(5, ge=1, le=100)
+    replace: bool = True  # False: score these projects, keep the workspace's others
+
+
+class WhatIfChange(BaseModel):
+    """Single hypothetical change applied to a project"""
+    type: WhatIfChangeType
+    taskId: str
+    days: Optional[int] = None  # DELAY: positive slips, negative pulls in
+    dependsOnTaskId: Optional[str] = None  # ADD/REMOVE_DEPENDENCY
+    status: Optional[TaskStatus] = None  # SET_STATUS
+    assigneeId: Optional[str] = None  # REASSIGN
+    assigneeName: Optional[str] = None
+
+
+class WhatIfScenario(BaseModel):
+    """Named set of changes evaluated together"""
+    name: str
+    changes: List[WhatIfChange]
+
+
+class WhatIfRequest(BaseModel):
+    """Request body for what-if simulation"""
+    project: ProjectInput
+    scenarios: List[WhatIfScenario] = Field(max_length=50)
+
+
 # ================================
 # Output Schemas
 # ================================
@@ -88,6 +166,20 @@ class Bottleneck(BaseModel):
     reason: str
 
 
+class NearCriticalPath(BaseModel):
+    """One of the k longest dependency chains (durations from createdAt to due_date)"""
+    taskIds: List[str]
+    lengthDays: int
+    slackDays: int  # how much shorter than the longest chain
+
+
+class TaskFloat(BaseModel):
+    """Task that can slip at most floatDays before the project end moves"""
+    taskId: str
+    floatDays: int
+    pathCount: int = 0  # how many of the k longest chains pass through it
+
+
 class Alert(BaseModel):
     """Risk alert"""
     type: str  # "overdue", "blocked", "conflict", "critical_path"
@@ -102,6 +194,8 @@ class ResourceConflict(BaseModel):
     userName: Optional[str] = None
     taskIds: List[str]
     overlapDays: int
+    projectIds: List[str] = []  # set by workspace analysis
+    maxConcurrent: Optional[int] = None
 
 
 class RiskAnalysis(BaseModel):
@@ -110,6 +204,8 @@ class RiskAnalysis(BaseModel):
     riskScore: int = Field(ge=0, le=100)
     riskLevel: str  # "low", "medium", "high", "critical"
     criticalPathIds: List[str]
+    nearCriticalPaths: List[NearCriticalPath] = []
+    nearCriticalTasks: List[TaskFloat] = []
     bottlenecks: List[Bottleneck]
     alerts: List[Alert]
     suggestedDependencies: List[SuggestedDependency]
@@ -127,6 +223,8 @@ class AnalyzeResponse(BaseModel):
 class DependencyDetectionRequest(BaseModel):
     """Request for AI dependency detection"""
     tasks: List[TaskInput]
+    # Queue lane for the LLM rate limiter: "interactive", "batch" or "background"
+    lane: str = Field("interactive", pattern="^(interactive|batch|background)$")
 
 
 class DependencyDetectionResponse(BaseModel):
@@ -136,11 +234,234 @@ class DependencyDetectionResponse(BaseModel):
     error: Optional[str] = None
 
 
+class DuplicateGroup(BaseModel):
+    """Tasks that look like copies of one another"""
+    canonicalTaskId: str  # earliest created; kept when duplicates are collapsed
+    taskIds: List[str]  # canonical first
+    similarity: float  # lowest similarity among the pairs that joined the group
+
+
+class DuplicateDetectionResponse(BaseModel):
+    """Response for near-duplicate task detection"""
+    success: bool
+    groups: List[DuplicateGroup] = []
+    duplicateCount: int = 0  # tasks that would be dropped by collapsing
+    error: Optional[str] = None
+
+
 class CriticalPathResponse(BaseModel):
     """Response for critical path calculation"""
     success: bool
     criticalPathIds: List[str] = []
+    totalDays: int = 0  # calendar span: last due date minus first createdAt
+    durationDays: int = 0  # summed task durations along the chain
+    nearCriticalPaths: List[NearCriticalPath] = []
+    nearCriticalTasks: List[TaskFloat] = []
+    error: Optional[str] = None
+
+
+class ScenarioResult(BaseModel):
+    """Outcome of one what-if scenario"""
+    name: str
+    success: bool = True
+    riskScore: int = 0
+    riskLevel: str = "low"
+    riskScoreDelta: int = 0
+    criticalPathIds: List[str] = []
+    totalDays: int = 0
+    totalDaysDelta: int = 0
+    durationDays: int = 0
+    affectedTaskIds: List[str] = []
+    factors: dict = {}
+    error: Optional[str] = None
+
+
+class WhatIfResponse(BaseModel):
+    """Response for what-if simulation"""
+    success: bool
+    baseline: Optional[ScenarioResult] = None
+    scenarios: List[ScenarioResult] = []
+    error: Optional[str] = None
+
+
+class WorkloadBucket(BaseModel):
+    """Workload of one assignee over one heatmap window"""
+    start: date
+    days: int
+    activeTaskDays: int  # sum over days of tasks in progress (createdAt -> due_date)
+    avgActiveTasks: float
+    dueCount: int
+
+
+class WorkloadRow(BaseModel):
+    """Heatmap row for one assignee"""
+    userId: str
+    userName: Optional[str] = None
+    buckets: List[WorkloadBucket]
+
+
+class WorkloadHeatmapResponse(BaseModel):
+    """Response for workload heatmap"""
+    success: bool
+    start: Optional[date] = None
+    end: Optional[date] = None
+    windowDays: int = 7
+    rows: List[WorkloadRow] = []
+    error: Optional[str] = None
+
+
+class AssigneeLoad(BaseModel):
+    """Peak concurrent load of one assignee across a workspace"""
+    userId: str
+    userName: Optional[str] = None
+    projectIds: List[str]
+    taskCount: int
+    maxConcurrent: int
+    peakDay: Optional[date] = None
+
+
+class WorkspaceAnalyzeResponse(BaseModel):
+    """Response for workspace analysis"""
+    success: bool
+    workspaceId: Optional[str] = None
+    conflicts: List[ResourceConflict] = []
+    assignees: List[AssigneeLoad] = []
+    error: Optional[str] = None
+
+
+class TimelineLane(BaseModel):
+    """Swimlane of the timeline; its rows are rowOffset .. rowOffset + rowCount - 1"""
+    key: str
+    label: str
+    rowOffset: int
+    rowCount: int
+    taskCount: int
+
+
+class TimelineBar(BaseModel):
+    """One task bar; days are offsets from the timeline origin, endDay exclusive"""
+    taskId: str
+    title: str
+    status: TaskStatus
+    lane: str
+    row: int
+    startDay: int
+    endDay: int
+    floatDays: int
+    critical: bool = False
+    overdue: bool = False
+    blocked: bool = False
+
+
+class TimelineEdge(BaseModel):
+    """Orthogonal dependency route from the end of one bar to the start of another"""
+    fromTaskId: str
+    toTaskId: str
+    points: List[List[float]]  # [day, row] pairs; a row's centre line is its index
+    critical: bool = False
+
+
+class TimelineSummary(BaseModel):
+    """Tasks of one swimlane overlapping one time bucket (zoomed-out detail level)"""
+    lane: str
+    startDay: int
+    days: int
+    taskCount: int
+    doneCount: int
+    overdueCount: int
+    criticalCount: int
+
+
+class TimelineResponse(BaseModel):
+    """Response for a timeline layout page"""
+    success: bool
+    origin: Optional[date] = None  # day 0
     totalDays: int = 0
+    windowStartDay: int = 0
+    windowEndDay: int = 0
+    lod: str = "tasks"
+    bucketDays: Optional[int] = None  # set when lod is "summary"
+    rowCount: int = 0
+    totalTasks: int = 0
+    visibleTasks: int = 0
+    lanes: List[TimelineLane] = []
+    bars: List[TimelineBar] = []
+    edges: List[TimelineEdge] = []
+    summaries: List[TimelineSummary] = []
+    error: Optional[str] = None
+
+
+class PortfolioProject(BaseModel):
+    """Latest risk of one project in a portfolio"""
+    projectId: str
+    name: str
+    riskScore: int
+    riskLevel: str
+    weight: int  # open tasks, at least 1
+    topFactor: Optional[str] = None  # factor with the largest penalty
+    analyzedAt: datetime
+
+
+class PortfolioFactor(BaseModel):
+    """One risk factor across a workspace"""
+    factor: str
+    avgPenalty: float  # weighted by project weight
+    count: int  # summed over projects (tasks or conflicts)
+    maxDepth: Optional[int] = None  # deepest project, for dependency_depth
+    projectsAffected: int
+
+
+class PortfolioRiskResponse(BaseModel):
+    """Response for the workspace risk rollup"""
+    success: bool
+    workspaceId: str
+    riskScore: Optional[int] = None  # open-task-weighted mean of project scores
+    riskLevel: Optional[str] = None
+    projectCount: int = 0
+    totalWeight: int = 0
+    levelCounts: Dict[str, int] = {}
+    worstProjects: List[PortfolioProject] = []
+    factors: List[PortfolioFactor] = []
+    projectIds: Optional[List[str]] = None  # every project in the rollup, when asked for
+    updatedAt: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class RiskHistoryPoint(BaseModel):
+    """Downsampled risk snapshot bucket"""
+    timestamp: datetime
+    riskScore: float
+    minRiskScore: int
+    maxRiskScore: int
+    criticalPathLength: float
+    openTasks: float
+    samples: int
+
+
+class RollingAveragePoint(BaseModel):
+    """Rolling average of bucketed risk scores"""
+    timestamp: datetime
+    value: float
+
+
+class RiskHistoryResponse(BaseModel):
+    """Response for risk history"""
+    success: bool
+    projectId: str
+    points: List[RiskHistoryPoint] = []
+    error: Optional[str] = None
+
+
+class RiskTrendResponse(BaseModel):
+    """Response for risk trend analytics"""
+    success: bool
+    projectId: str
+    latestScore: Optional[int] = None
+    latestLevel: Optional[str] = None
+    rollingAverage: List[RollingAveragePoint] = []
+    riskVelocity: float = 0.0  # score points per day
+    burnDownVelocity: float = 0.0  # open tasks closed per day
+    projectedCompletionDays: Optional[float] = None
     error: Optional[str] = None
 
 
@@ -2,27 +2,75 @@
 Analysis Router - API endpoints for AI analysis
 """
 
-from fastapi import APIRouter, HTTPException
-from datetime import datetime
-import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from datetime import date, datetime, timedelta
+import asyncio
+import json
 import logging
+from typing import Optional
 
 from models.schemas import (
-    AnalyzeRequest, AnalyzeResponse, RiskAnalysis,
+    AnalyzeRequest, AnalyzeResponse, ProjectInput,
     DependencyDetectionRequest, DependencyDetectionResponse,
-    CriticalPathResponse, RiskScoreResponse, DependencyInput
+    DuplicateDetectionRequest, DuplicateDetectionResponse,
+    CriticalPathResponse, RiskScoreResponse, DependencyInput,
+    WhatIfRequest, WhatIfResponse,
+    RiskHistoryResponse, RiskHistoryPoint, RiskTrendResponse, RollingAveragePoint,
+    WorkloadHeatmapRequest, WorkloadHeatmapResponse,
+    WorkspaceAnalyzeRequest, WorkspaceAnalyzeResponse,
+    TimelineRequest, TimelineResponse,
+    PortfolioRefreshRequest, PortfolioRiskResponse
 )
-from services.rule_engine import RuleEngine
+from services import engine_jobs
+from services.admission import cpu_scheduler, Overloaded
 from services.llm_service import llm_service
+from services.rate_limiter import Lane
+from services.risk_history import risk_history, from_epoch
+from services.response_cache import response_cache, fingerprint, make_etag, etag_matches
+from services.project_store import project_store
+from services.project_analysis import run_analysis
+from services.portfolio_rollup import portfolio_rollup
+from services.risk_scheduler import risk_scheduler
+from services.scenario_engine import DependencyCycleError
+from services.wire_format import WireRoute, NegotiatedResponse
 from config import settings
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# MessagePack requests/responses are negotiated per request; JSON is the default
+router = APIRouter(route_class=WireRoute, default_response_class=NegotiatedResponse)
+
+
+def _cache_headers(etag: str, source: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": source}
+
+
+async def _cached(endpoint: str, payload, http_request: Request, response: Response, compute):
+    """
+    Serve an analysis endpoint through the response cache.
+    Returns 304 when the client already holds the current ETag; identical
+    concurrent requests are coalesced into one computation. Failed results
+    carry no ETag, so a client can never revalidate an error.
+    """
+    key = fingerprint(endpoint, payload)
+    etag = make_etag(key)
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag, "REVALIDATED"))
+    
+    result, source = await response_cache.get_or_compute(
+        key, compute, cacheable=lambda r: r.success
+    )
+    if result.success:
+        response.headers.update(_cache_headers(etag, source))
+    else:
+        response.headers.update({"Cache-Control": "no-store", "X-Cache": source})
+    return result
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_project(request: AnalyzeRequest):
+async def analyze_project(request: AnalyzeRequest, http_request: Request, response: Response):
     """
     Full project analysis including:
     - Risk score calculation
@@ -30,61 +78,25 @@ async def analyze_project(request: AnalyzeRequest):
     - AI dependency suggestions
     - Alert generation
     """
+    return await _cached(
+        "analyze", request.project, http_request, response,
+        lambda: _analyze_project(request.project)
+    )
+
+
+async def _analyze_project(project: ProjectInput) -> AnalyzeResponse:
+    """Run the full analysis pipeline for one project"""
     try:
-        project = request.project
-        
-        # Initialize rule engine
-        engine = RuleEngine(
-            tasks=project.tasks,
-            dependencies=project.existingDependencies
-        )
-        
-        # Calculate critical path
-        critical_path, total_days = engine.calculate_critical_path()
-        
-        # Calculate risk score
-        risk_score, risk_level, factors = engine.calculate_risk_score()
-        
-        # Generate alerts
-        alerts = engine.generate_alerts()
-        
-        # Generate bottlenecks
-        bottlenecks = engine.generate_bottlenecks(critical_path)
-        
-        # Detect resource conflicts
-        resource_conflicts = engine.detect_resource_conflicts()
-        
-        # AI dependency detection (if tasks exist)
-        suggested_deps = []
-        if len(project.tasks) >= 2:
-            existing_dep_pairs = [
-                f"{d.taskId}->{d.dependsOnTaskId}" 
-                for d in project.existingDependencies
-            ]
-            suggested_deps = await llm_service.detect_dependencies(
-                project.tasks, 
-                existing_dep_pairs
-            )
-        
-        # Create analysis result
-        analysis = RiskAnalysis(
-            projectId=project.id,
-            riskScore=risk_score,
-            riskLevel=risk_level,
-            criticalPathIds=critical_path,
-            bottlenecks=bottlenecks,
-            alerts=alerts,
-            suggestedDependencies=suggested_deps,
-            resourceConflicts=resource_conflicts,
-            analyzedAt=datetime.now()
-        )
+        analysis = await run_analysis(project, Lane.INTERACTIVE)
         
-        # Send email alert if risk is critical
-        if risk_score < settings.RISK_ALERT_THRESHOLD:
-            await send_risk_alert(project.id, project.name, risk_score, risk_level)
+        # Keeps the result warm, re-analyzes in the background and
+        # sends the email alert when the score crosses the threshold
+        risk_scheduler.observe(project, analysis)
         
         return AnalyzeResponse(success=True, analysis=analysis)
         
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         return AnalyzeResponse(success=False, error=str(e))
@@ -103,30 +115,89 @@ async def detect_dependencies(request: DependencyDetectionRequest):
                 error="Need at least 2 tasks for dependency detection"
             )
         
-        dependencies = await llm_service.detect_dependencies(request.tasks)
+        dependencies = await llm_service.detect_dependencies(
+            request.tasks,
+            lane=Lane[request.lane.upper()]
+        )
         
         return DependencyDetectionResponse(
             success=True,
             dependencies=dependencies
         )
         
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Dependency detection failed: {e}")
         return DependencyDetectionResponse(success=False, error=str(e))
 
 
+@router.post("/duplicates/detect", response_model=DuplicateDetectionResponse)
+async def detect_duplicates(request: DuplicateDetectionRequest):
+    """
+    Find near-duplicate tasks (MinHash/LSH over title and description).
+    """
+    try:
+        return await cpu_scheduler.run(
+            "duplicates", len(request.tasks), engine_jobs.duplicate_groups, request
+        )
+        
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Duplicate detection failed: {e}")
+        return DuplicateDetectionResponse(success=False, error=str(e))
+
+
+@router.post("/dependencies/detect/stream")
+async def stream_dependencies(request: DependencyDetectionRequest):
+    """
+    Stream AI dependency suggestions as Server-Sent Events.
+    Each `dependency` event carries one SuggestedDependency as soon as the
+    LLM has finished generating it; a final `done` event carries the count.
+    """
+    async def events():
+        count = 0
+        try:
+            async for suggestion in llm_service.stream_dependencies(
+                request.tasks,
+                lane=Lane[request.lane.upper()]
+            ):
+                count += 1
+                yield _sse("dependency", suggestion.model_dump(mode="json"))
+            yield _sse("done", {"success": True, "count": count})
+        except Exception as e:
+            logger.error(f"Dependency stream failed: {e}")
+            yield _sse("error", {"success": False, "count": count, "error": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/risk/calculate", response_model=RiskScoreResponse)
-async def calculate_risk(request: AnalyzeRequest):
+async def calculate_risk(request: AnalyzeRequest, http_request: Request, response: Response):
     """
     Calculate risk score for a project.
     """
+    return await _cached(
+        "risk", request.project, http_request, response,
+        lambda: _calculate_risk(request.project)
+    )
+
+
+async def _calculate_risk(project: ProjectInput) -> RiskScoreResponse:
     try:
-        engine = RuleEngine(
-            tasks=request.project.tasks,
-            dependencies=request.project.existingDependencies
+        risk_score, risk_level, factors = await cpu_scheduler.run(
+            "risk", len(project.tasks), engine_jobs.risk_score, project
         )
-        
-        risk_score, risk_level, factors = engine.calculate_risk_score()
+        portfolio_rollup.record(project, risk_score, risk_level, factors)
         
         return RiskScoreResponse(
             success=True,
@@ -135,54 +206,318 @@ async def calculate_risk(request: AnalyzeRequest):
             factors=factors
         )
         
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Risk calculation failed: {e}")
         return RiskScoreResponse(success=False, error=str(e))
 
 
+async def _load_project(project_id: str) -> ProjectInput:
+    """Project from DATABASE_URL for the id-only endpoints"""
+    if not project_store.enabled:
+        raise HTTPException(status_code=503, detail="DATABASE_URL is not configured")
+    try:
+        project = await project_store.load_project(project_id)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Project {project_id} has rows analysis cannot use: {e}")
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+
+@router.post("/projects/{project_id}/analyze", response_model=AnalyzeResponse)
+async def analyze_project_by_id(project_id: str, http_request: Request, response: Response):
+    """
+    Full project analysis, reading tasks and dependencies from the database.
+    Same result as POST /analyze without shipping the project over HTTP.
+    """
+    project = await _load_project(project_id)
+    return await _cached(
+        "analyze", project, http_request, response,
+        lambda: _analyze_project(project)
+    )
+
+
+@router.post("/projects/{project_id}/risk", response_model=RiskScoreResponse)
+async def calculate_risk_by_id(project_id: str, http_request: Request, response: Response):
+    """Risk score for a project read from the database"""
+    project = await _load_project(project_id)
+    return await _cached(
+        "risk", project, http_request, response,
+        lambda: _calculate_risk(project)
+    )
+
+
+@router.get("/projects/{project_id}/analysis", response_model=AnalyzeResponse)
+async def get_project_analysis(project_id: str, http_request: Request, response: Response):
+    """
+    Latest analysis kept warm by the background scheduler.
+    Falls back to analyzing now when the project is not warm yet and can
+    be read from the database.
+    """
+    analysis = risk_scheduler.latest(project_id)
+    if analysis is not None:
+        response.headers["X-Cache"] = "WARM"
+        return AnalyzeResponse(success=True, analysis=analysis)
+    if not project_store.enabled:
+        raise HTTPException(status_code=404, detail="No analysis yet; POST /analyze or watch the project")
+    return await analyze_project_by_id(project_id, http_request, response)
+
+
+@router.put("/projects/{project_id}/watch")
+async def watch_project(project_id: str, request: Optional[AnalyzeRequest] = None):
+    """
+    Keep a project analyzed in the background. Send the project unless
+    DATABASE_URL is configured.
+    """
+    if request is None and not project_store.enabled:
+        raise HTTPException(status_code=400, detail="Send the project or configure DATABASE_URL")
+    if request is not None and request.project.id != project_id:
+        raise HTTPException(status_code=400, detail="Project id does not match the path")
+    risk_scheduler.register(project_id, request.project if request else None)
+    return {"success": True, "projectId": project_id, "scheduler": risk_scheduler.stats()}
+
+
+@router.delete("/projects/{project_id}/watch")
+async def unwatch_project(project_id: str):
+    """Stop background re-analysis of a project"""
+    return {"success": risk_scheduler.unregister(project_id), "projectId": project_id}
+
+
 @router.post("/critical-path", response_model=CriticalPathResponse)
-async def get_critical_path(request: AnalyzeRequest):
+async def get_critical_path(
+    request: AnalyzeRequest,
+    paths: int = Query(settings.NEAR_CRITICAL_PATHS, ge=0, le=50),
+    floatDays: int = Query(settings.NEAR_CRITICAL_FLOAT_DAYS, ge=0, le=365)
+):
     """
-    Calculate critical path for a project.
+    Calculate critical path for a project, plus the `paths` longest
+    chains and every task within `floatDays` of becoming critical.
     """
     try:
-        engine = RuleEngine(
-            tasks=request.project.tasks,
-            dependencies=request.project.existingDependencies
+        return await cpu_scheduler.run(
+            "critical-path", len(request.project.tasks), engine_jobs.critical_path,
+            request.project, paths, floatDays, settings.NEAR_CRITICAL_MAX_TASKS
         )
         
-        critical_path, total_days = engine.calculate_critical_path()
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Critical path calculation failed: {e}")
+        return CriticalPathResponse(success=False, error=str(e))
+
+
+@router.post("/what-if", response_model=WhatIfResponse)
+async def simulate_what_if(request: WhatIfRequest):
+    """
+    Evaluate hypothetical scenarios (slips, dropped dependencies, ...).
+    All scenarios share one base engine; each is a copy-on-write overlay
+    that only recomputes the downstream region it touches.
+    """
+    try:
+        baseline, results = await cpu_scheduler.run(
+            "what-if", len(request.project.tasks), engine_jobs.what_if,
+            request.project, request.scenarios
+        )
+        
+        return WhatIfResponse(success=True, baseline=baseline, scenarios=results)
+        
+    except Overloaded:
+        raise
+    except DependencyCycleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"What-if simulation failed: {e}")
+        return WhatIfResponse(success=False, error=str(e))
+
+
+@router.post("/workload/heatmap", response_model=WorkloadHeatmapResponse)
+async def workload_heatmap(request: WorkloadHeatmapRequest):
+    """
+    Per-assignee workload heatmap for the Team page.
+    Any window size and date range; each cell is an O(1) prefix-sum lookup.
+    """
+    try:
+        return await cpu_scheduler.run(
+            "workload-heatmap", len(request.tasks), engine_jobs.workload_heatmap, request
+        )
+        
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Workload heatmap failed: {e}")
+        return WorkloadHeatmapResponse(success=False, windowDays=request.windowDays, error=str(e))
+
+
+@router.post("/workspace/analyze", response_model=WorkspaceAnalyzeResponse)
+async def analyze_workspace(request: WorkspaceAnalyzeRequest):
+    """
+    Cross-project resource conflicts for every assignee in a workspace.
+    Flags days where someone carries at least concurrencyThreshold open
+    tasks drawn from two or more projects.
+    """
+    try:
+        return await cpu_scheduler.run(
+            "workspace", sum(len(p.tasks) for p in request.projects),
+            engine_jobs.workspace_analysis, request
+        )
+        
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Workspace analysis failed: {e}")
+        return WorkspaceAnalyzeResponse(success=False, workspaceId=request.workspaceId, error=str(e))
+
+
+@router.post("/timeline", response_model=TimelineResponse)
+async def get_timeline(request: TimelineRequest):
+    """
+    Gantt layout for one time window of a project: bars with precomputed
+    swimlane rows and dependency routes, or per-lane bucket summaries when
+    the window holds more than maxBars tasks. Rows are packed over the
+    whole project, so they stay put as the client pages through time.
+    """
+    try:
+        return await cpu_scheduler.run(
+            "timeline", len(request.project.tasks), engine_jobs.timeline, request
+        )
         
-        return CriticalPathResponse(
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Timeline layout failed: {e}")
+        return TimelineResponse(success=False, error=str(e))
+
+
+@router.get("/projects/{project_id}/timeline", response_model=TimelineResponse)
+async def get_timeline_by_id(
+    project_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    swimlane: str = Query("assignee", pattern="^(assignee|status|priority|none)$"),
+    lod: str = Query("auto", pattern="^(auto|tasks|summary)$"),
+    maxBars: int = Query(2000, ge=1, le=50000),
+    bucketDays: Optional[int] = Query(None, ge=1, le=366),
+    version: Optional[str] = Query(None, max_length=200)
+):
+    """Timeline page for a project read from the database"""
+    project = await _load_project(project_id)
+    return await get_timeline(TimelineRequest(
+        project=project, start=start, end=end, swimlane=swimlane,
+        lod=lod, maxBars=maxBars, bucketDays=bucketDays, version=version
+    ))
+
+
+@router.get("/portfolio/{workspace_id}", response_model=PortfolioRiskResponse)
+async def get_portfolio(
+    workspace_id: str,
+    worst: int = Query(5, ge=1, le=100),
+    projectIds: bool = Query(False)
+):
+    """
+    Workspace risk rollup over the latest score of each of its projects:
+    open-task-weighted score, level counts, factor breakdown and the
+    `worst` lowest-scoring projects. Read from running aggregates, so the
+    cost does not grow with the number of projects. `projectIds=true`
+    also lists every project in the rollup.
+    """
+    return portfolio_rollup.portfolio(workspace_id, worst, projectIds)
+
+
+@router.post("/portfolio/refresh", response_model=PortfolioRiskResponse)
+async def refresh_portfolio(request: PortfolioRefreshRequest):
+    """
+    Score every project of a workspace in one job and make them the
+    workspace's rollup: projects not sent (e.g. deleted) are dropped. Used
+    to seed a cold workspace or resync one that drifted. With
+    `replace: false` only the projects sent are (re)scored.
+    """
+    try:
+        scores = await cpu_scheduler.run(
+            "portfolio", sum(len(p.tasks) for p in request.projects),
+            engine_jobs.portfolio_scores, request.projects
+        )
+        if request.replace:
+            portfolio_rollup.retain(request.workspaceId, {p.id for p in request.projects})
+        for project, (risk_score, risk_level, factors) in zip(request.projects, scores):
+            if project.workspaceId != request.workspaceId:
+                project = project.model_copy(update={"workspaceId": request.workspaceId})
+            portfolio_rollup.update(project, risk_score, risk_level, factors)
+        return portfolio_rollup.portfolio(request.workspaceId, request.worst)
+        
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Portfolio refresh failed: {e}")
+        return PortfolioRiskResponse(success=False, workspaceId=request.workspaceId, error=str(e))
+
+
+@router.delete("/portfolio/projects/{project_id}")
+async def remove_portfolio_project(project_id: str):
+    """Drop a deleted or archived project from its workspace rollup"""
+    return {"success": portfolio_rollup.remove(project_id), "projectId": project_id}
+
+
+@router.get("/risk/history/{project_id}", response_model=RiskHistoryResponse)
+async def get_risk_history(
+    project_id: str,
+    days: int = Query(30, ge=1, le=3650),
+    bucketHours: int = Query(24, ge=1, le=24 * 30)
+):
+    """
+    Downsampled risk score history from recorded analyses.
+    """
+    try:
+        until = datetime.utcnow()
+        points = await asyncio.to_thread(
+            risk_history.history, project_id, until - timedelta(days=days), until, bucketHours * 3600
+        )
+        return RiskHistoryResponse(
             success=True,
-            criticalPathIds=critical_path,
-            totalDays=total_days
+            projectId=project_id,
+            points=[
+                RiskHistoryPoint(timestamp=from_epoch(p["ts"]), **{k: v for k, v in p.items() if k != "ts"})
+                for p in points
+            ]
         )
         
     except Exception as e:
-        logger.error(f"Critical path calculation failed: {e}")
-        return CriticalPathResponse(success=False, error=str(e))
+        logger.error(f"Risk history lookup failed: {e}")
+        return RiskHistoryResponse(success=False, projectId=project_id, error=str(e))
 
 
-async def send_risk_alert(project_id: str, project_name: str, risk_score: int, risk_level: str):
+@router.get("/risk/trend/{project_id}", response_model=RiskTrendResponse)
+async def get_risk_trend(
+    project_id: str,
+    days: int = Query(30, ge=1, le=3650),
+    bucketHours: int = Query(24, ge=1, le=24 * 30),
+    window: int = Query(7, ge=1, le=365)
+):
     """
-    Send email alert via Node.js backend when risk is critical.
+    Rolling average, risk velocity and burn-down velocity from recorded
+    analyses. Nothing is recomputed.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.NODE_API_URL}/api/internal/risk-alert",
-                json={
-                    "projectId": project_id,
-                    "projectName": project_name,
-                    "riskScore": risk_score,
-                    "riskLevel": risk_level
-                },
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                logger.info(f"📧 Risk alert sent for project {project_name}")
-            else:
-                logger.warning(f"Failed to send risk alert: {response.status_code}")
+        until = datetime.utcnow()
+        trend = await asyncio.to_thread(
+            risk_history.trend, project_id, until - timedelta(days=days), until, bucketHours * 3600, window
+        )
+        latest = await asyncio.to_thread(risk_history.latest, project_id)
+        return RiskTrendResponse(
+            success=True,
+            projectId=project_id,
+            latestScore=latest["riskScore"] if latest else None,
+            latestLevel=latest["riskLevel"] if latest else None,
+            rollingAverage=[
+                RollingAveragePoint(timestamp=from_epoch(p["ts"]), value=p["value"])
+                for p in trend["rolling"]
+            ],
+            riskVelocity=trend["riskVelocity"],
+            burnDownVelocity=trend["burnDownVelocity"],
+            projectedCompletionDays=trend["projectedCompletionDays"]
+        )
+        
     except Exception as e:
-        logger.warning(f"Could not send risk alert: {e}")
+        logger.error(f"Risk trend lookup failed: {e}")
+        return RiskTrendResponse(success=False, projectId=project_id, error=str(e))
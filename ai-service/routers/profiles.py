@@ -0,0 +1,81 @@
+"""
+Profiles Router - List and download request profiles
+"""
+
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.responses import FileResponse
+
+from services.profiler import active_session, profile_store, requested_mode, secret_matches
+
+router = APIRouter()
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profile /api/v1 requests that carry the profiling secret in the
+    X-Profile header (or ?profile=), plus a configured random sample.
+    X-Profile-Mode / ?profile_mode= picks "cprofile" or "sample".
+    """
+    if not request.url.path.startswith("/api/v1") or request.url.path.startswith("/api/v1/profiles"):
+        return await call_next(request)
+    
+    mode = requested_mode(
+        request.headers.get("x-profile") or request.query_params.get("profile"),
+        request.headers.get("x-profile-mode") or request.query_params.get("profile_mode")
+    )
+    if not mode:
+        return await call_next(request)
+    
+    profile_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    profile_id = "".join(c for c in profile_id if c.isalnum() or c in "-_")[:64] or uuid.uuid4().hex
+    session = profile_store.begin(profile_id, mode, request.url.path)
+    if session is None:
+        return await call_next(request)
+    
+    status_code = 500
+    token = active_session.set(session)
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        active_session.reset(token)
+        session.finish(status_code)
+    
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _require_secret(secret: Optional[str]):
+    if not secret_matches(secret):
+        raise HTTPException(status_code=403, detail="Profiling access denied")
+
+
+@router.get("/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """
+    List stored profiles, newest first.
+    """
+    _require_secret(x_profile)
+    return {"success": True, "profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """
+    Download a profile: .pstats for cprofile mode (load with pstats or
+    snakeviz), collapsed stacks for sample mode (feed to flamegraph.pl).
+    """
+    _require_secret(x_profile)
+    meta = profile_store.get(profile_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    ext = "pstats" if meta["mode"] == "cprofile" else "collapsed"
+    return FileResponse(
+        profile_store.file_path(meta["id"], ext),
+        media_type="application/octet-stream" if ext == "pstats" else "text/plain",
+        filename=f"{meta['id']}.{ext}"
+    )
@@ -0,0 +1,282 @@
+"""
+Admission - Concurrency limits, load shedding and process-pool execution
+CPU-bound engine work from the analysis router runs in process pools so
+one huge project cannot block the event loop. Each lane's pool has a gate
+on total occupancy (one running job per worker plus a bounded queue), and
+each endpoint has a smaller concurrency limit with its own bounded queue
+inside it; when either queue is full (or the wait runs out) the request
+is shed with 503 + Retry-After.
+Projects above LARGE_PROJECT_TASK_THRESHOLD go to a separate bulk lane
+with its own workers, so small interactive requests keep low latency.
+Background refreshes use a third, niced pool and never compete with
+requests for workers.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from services.profiler import active_session, run_profiled
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+BACKGROUND = "background"
+
+# Body-carrying endpoints, by path, for shedding before the body is parsed
+ENDPOINT_PATHS = {
+    "/api/v1/analyze": "analyze",
+    "/api/v1/risk/calculate": "risk",
+    "/api/v1/critical-path": "critical-path",
+    "/api/v1/what-if": "what-if",
+    "/api/v1/workload/heatmap": "workload-heatmap",
+    "/api/v1/workspace/analyze": "workspace",
+    "/api/v1/duplicates/detect": "duplicates",
+    "/api/v1/timeline": "timeline",
+    "/api/v1/portfolio/refresh": "portfolio",
+}
+
+# Rough per-task body size bounds across JSON and columnar MessagePack
+MIN_BODY_BYTES_PER_TASK = 100
+MAX_BODY_BYTES_PER_TASK = 1000
+
+
+class Overloaded(Exception):
+    """Request shed by admission control"""
+
+    def __init__(self, endpoint: str, lane: str, retry_after: int):
+        super().__init__(f"{endpoint} is overloaded ({lane} lane), retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    At most `concurrency` requests run; at most `queue_size` wait, each for
+    up to `max_wait` seconds. Retry-After is estimated from an EWMA of
+    recent service times. A gate with a `parent` is a sub-limit: admitted
+    requests then also queue for the parent, which bounds them all.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        lane: str,
+        concurrency: int,
+        queue_size: int,
+        max_wait: float,
+        parent: Optional["AdmissionGate"] = None
+    ):
+        self.endpoint = endpoint
+        self.lane = lane
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.parent = parent
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+        self.service_time = 0.5  # seconds, EWMA
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def saturated(self) -> bool:
+        if self.parent is not None and self.parent.saturated():
+            return True
+        # Counters, not the semaphore: they change before any await, so a
+        # burst of arrivals in one loop iteration is counted correctly
+        return self.active + self.waiting >= self.concurrency + self.queue_size
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / self.concurrency
+        own = min(60, max(1, math.ceil(backlog * self.service_time)))
+        return max(own, self.parent.retry_after()) if self.parent is not None else own
+
+    def _reject(self) -> Overloaded:
+        self.shed += 1
+        logger.warning(f"🚦 Shedding {self.endpoint} ({self.lane}): {self.active} running, {self.waiting} queued")
+        return Overloaded(self.endpoint, self.lane, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.saturated():
+            raise self._reject()
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._reject()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        started = time.monotonic()
+        try:
+            if self.parent is None:
+                yield
+            else:
+                async with self.parent.slot():
+                    yield
+        finally:
+            self.active -= 1
+            self.service_time = 0.8 * self.service_time + 0.2 * (time.monotonic() - started)
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.active,
+            "queued": self.waiting,
+            "shed": self.shed,
+            "serviceTimeMs": round(self.service_time * 1000, 1)
+        }
+
+
+class CpuScheduler:
+    """
+    One process pool per lane behind a pool-wide gate (at most one job per
+    worker, so nothing piles up in the executor's own queue), with
+    per-endpoint gates as sub-limits in front of it.
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, ProcessPoolExecutor] = {}
+        self._pool_gates: Dict[str, AdmissionGate] = {}
+        self._gates: Dict[Tuple[str, str], AdmissionGate] = {}
+
+    def lane_for(self, size: int) -> str:
+        return BULK if size >= settings.LARGE_PROJECT_TASK_THRESHOLD else INTERACTIVE
+
+    def _workers(self, lane: str) -> int:
+        if lane == BACKGROUND:
+            return settings.CPU_POOL_BACKGROUND_WORKERS
+        return settings.CPU_POOL_BULK_WORKERS if lane == BULK else settings.CPU_POOL_WORKERS
+
+    def _pool(self, lane: str) -> ProcessPoolExecutor:
+        if lane not in self._pools:
+            from services.engine_jobs import lower_priority
+
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pools[lane] = ProcessPoolExecutor(
+                max_workers=self._workers(lane),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=lower_priority if lane == BACKGROUND else None,
+                initargs=(settings.CPU_POOL_BACKGROUND_NICE,) if lane == BACKGROUND else ()
+            )
+        return self._pools[lane]
+
+    def _pool_gate(self, lane: str) -> AdmissionGate:
+        if lane not in self._pool_gates:
+            queue_size = settings.ADMISSION_BULK_POOL_QUEUE_SIZE if lane == BULK else settings.ADMISSION_POOL_QUEUE_SIZE
+            self._pool_gates[lane] = AdmissionGate(
+                "cpu-pool", lane, self._workers(lane), queue_size, settings.ADMISSION_MAX_WAIT_SECONDS
+            )
+        return self._pool_gates[lane]
+
+    def _gate(self, endpoint: str, lane: str) -> AdmissionGate:
+        key = (endpoint, lane)
+        if key not in self._gates:
+            if lane == BULK:
+                limits = (settings.ADMISSION_BULK_CONCURRENCY, settings.ADMISSION_BULK_QUEUE_SIZE)
+            else:
+                limits = (settings.ADMISSION_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE)
+            self._gates[key] = AdmissionGate(
+                endpoint, lane, *limits, settings.ADMISSION_MAX_WAIT_SECONDS, parent=self._pool_gate(lane)
+            )
+        return self._gates[key]
+
+    def lane_hint(self, content_length: int) -> Optional[str]:
+        """Lane implied by body size alone, or None when it could be either"""
+        threshold = settings.LARGE_PROJECT_TASK_THRESHOLD
+        if content_length < threshold * MIN_BODY_BYTES_PER_TASK:
+            return INTERACTIVE
+        if content_length > threshold * MAX_BODY_BYTES_PER_TASK:
+            return BULK
+        return None
+
+    def check(self, endpoint: str, lane: str):
+        """Raise Overloaded if the gates would shed the request anyway"""
+        gate = self._gates.get((endpoint, lane)) or self._pool_gates.get(lane)
+        if gate is not None and gate.saturated():
+            raise gate._reject()
+
+    async def run(self, endpoint: str, size: int, fn: Callable, *args, lane: Optional[str] = None):
+        """
+        Run fn(*args) in the lane's process pool once admitted; the lane
+        follows `size` unless given (BACKGROUND for scheduler work).
+        Raises Overloaded when the endpoint's queue is full. Jobs of a
+        profiled request are profiled in the worker and merged into it.
+        """
+        lane = lane or self.lane_for(size)
+        async with self._gate(endpoint, lane).slot():
+            loop = asyncio.get_running_loop()
+            session = active_session.get()
+            if session is None:
+                return await loop.run_in_executor(self._pool(lane), fn, *args)
+            result, profile = await loop.run_in_executor(self._pool(lane), run_profiled, session.mode, fn, *args)
+            session.add_worker_profile(profile)
+            return result
+
+    async def warm_up(self):
+        """Start every worker process before the first request needs it"""
+        from services.engine_jobs import warm_up
+
+        loop = asyncio.get_running_loop()
+        for lane in (INTERACTIVE, BULK, BACKGROUND):
+            pool = self._pool(lane)
+            await asyncio.gather(*(
+                loop.run_in_executor(pool, warm_up) for _ in range(self._workers(lane))
+            ))
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+    def stats(self) -> Dict:
+        stats = {f"pool:{lane}": gate.stats() for lane, gate in sorted(self._pool_gates.items())}
+        stats.update({
+            f"{endpoint}:{lane}": gate.stats()
+            for (endpoint, lane), gate in sorted(self._gates.items())
+        })
+        return stats
+
+
+async def admission_middleware(request: Request, call_next):
+    """
+    Shed requests whose lane is already saturated before their body is
+    read and validated, which for large projects costs more than the 503.
+    """
+    endpoint = ENDPOINT_PATHS.get(request.url.path)
+    if endpoint and request.method == "POST":
+        try:
+            lane = cpu_scheduler.lane_hint(int(request.headers.get("content-length") or 0))
+        except ValueError:
+            lane = None
+        if lane:
+            try:
+                cpu_scheduler.check(endpoint, lane)
+            except Overloaded as exc:
+                return await overloaded_handler(request, exc)
+    return await call_next(request)
+
+
+async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    """503 with Retry-After for shed requests"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"success": False, "error": str(exc)}
+    )
+
+
+# Singleton instance
+cpu_scheduler = CpuScheduler()
@@ -0,0 +1,207 @@
+"""
+Candidate Filter - Offline pre-filter for dependency detection
+Narrows the O(n^2) task pairs down to a top-k list the LLM should judge,
+using character n-gram TF-IDF similarity, lifecycle verb stages and
+due-date ordering. Also serves as a zero-latency local fallback.
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import List, Dict, Tuple, NamedTuple, Optional, Set
+
+from models.schemas import TaskInput, SuggestedDependency, DependencyType
+from services.rule_engine import normalize_datetime
+
+
+# Lifecycle stages: later stages usually depend on earlier ones on the same topic
+STAGE_PREFIXES: List[Tuple[int, Tuple[str, ...]]] = [
+    (0, ("research", "plan", "spec", "requirement", "gather", "analy", "scope")),
+    (1, ("design", "architect", "schema", "mockup", "wireframe", "prototyp", "model")),
+    (2, ("setup", "set up", "configur", "provision", "install", "scaffold")),
+    (3, ("implement", "build", "develop", "coding", "creat", "integrat", "write")),
+    (4, ("test", "qa", "verif", "validat", "review", "debug")),
+    (5, ("deploy", "release", "launch", "ship", "document", "docs", "publish", "monitor")),
+]
+
+STAGE_NAMES = ["planning", "design", "setup", "implementation", "testing", "release"]
+
+NGRAM_SIZE = 3
+# Grams present in more than this share of tasks (or this many tasks) carry
+# almost no signal, and skipping them keeps the pair scan near-linear
+MAX_DOC_FREQUENCY = 0.2
+MAX_DOC_COUNT = 50
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class CandidatePair(NamedTuple):
+    """Likely dependency: task_id depends on depends_on_task_id"""
+    task_id: str
+    depends_on_task_id: str
+    score: float
+    similarity: float
+    reason: str
+
+
+def detect_stage(text: str) -> Optional[int]:
+    """Lifecycle stage of the first stage verb found in text"""
+    for word in _WORD_RE.findall(text.lower()):
+        for stage, prefixes in STAGE_PREFIXES:
+            if word.startswith(prefixes):
+                return stage
+    return None
+
+
+def _topic_words(text: str) -> List[str]:
+    """Words with lifecycle verbs removed so 'Design API' ~ 'Test API'"""
+    words = []
+    for word in _WORD_RE.findall(text.lower()):
+        if any(word.startswith(prefixes) for _, prefixes in STAGE_PREFIXES):
+            continue
+        words.append(word)
+    return words
+
+
+def _char_ngrams(words: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = defaultdict(int)
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            counts[padded[i:i + NGRAM_SIZE]] += 1
+    return counts
+
+
+def _tfidf_vectors(tasks: List[TaskInput]) -> List[Dict[str, float]]:
+    """L2-normalised TF-IDF vectors over title (weighted x2) + description"""
+    term_counts = []
+    doc_freq: Dict[str, int] = defaultdict(int)
+    for task in tasks:
+        title_words = _topic_words(task.title)
+        words = title_words + title_words + _topic_words(task.description or "")
+        counts = _char_ngrams(words)
+        term_counts.append(counts)
+        for gram in counts:
+            doc_freq[gram] += 1
+
+    n = len(tasks)
+    max_df = max(2, min(int(n * MAX_DOC_FREQUENCY), MAX_DOC_COUNT)) if n >= 10 else n
+    vectors = []
+    for counts in term_counts:
+        vector = {}
+        for gram, count in counts.items():
+            df = doc_freq[gram]
+            if df > max_df:
+                continue
+            vector[gram] = (1 + math.log(count)) * math.log((1 + n) / (1 + df))
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm:
+            vector = {g: w / norm for g, w in vector.items()}
+        vectors.append(vector)
+    return vectors
+
+
+def _similar_pairs(vectors: List[Dict[str, float]], min_similarity: float) -> Dict[Tuple[int, int], float]:
+    """Cosine similarity via an inverted index; only pairs sharing grams are visited"""
+    postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for i, vector in enumerate(vectors):
+        for gram, weight in vector.items():
+            postings[gram].append((i, weight))
+
+    # Flat int keys are much cheaper to hash than tuples in the hot loop
+    n = len(vectors)
+    scores: Dict[int, float] = defaultdict(float)
+    for entries in postings.values():
+        if len(entries) < 2:
+            continue
+        for a in range(len(entries)):
+            i, wi = entries[a]
+            base = i * n
+            for j, wj in entries[a + 1:]:
+                scores[base + j] += wi * wj
+
+    return {divmod(key, n): s for key, s in scores.items() if s >= min_similarity}
+
+
+def generate_candidates(
+    tasks: List[TaskInput],
+    existing_deps: List[str] = [],
+    top_k: int = 20,
+    min_similarity: float = 0.15
+) -> List[CandidatePair]:
+    """
+    Rank likely dependency pairs without any network call.
+    existing_deps uses the "taskId->dependsOnTaskId" format of the router.
+    """
+    if len(tasks) < 2:
+        return []
+
+    existing: Set[Tuple[str, str]] = set()
+    for pair in existing_deps:
+        task_id, _, depends_on = pair.partition("->")
+        existing.add((task_id, depends_on))
+        existing.add((depends_on, task_id))
+
+    stages = []
+    for task in tasks:
+        stage = detect_stage(task.title)
+        stages.append(stage if stage is not None else detect_stage(task.description or ""))
+    dues = [normalize_datetime(t.due_date) for t in tasks]
+    vectors = _tfidf_vectors(tasks)
+
+    heap: List[Tuple[float, int, CandidatePair]] = []
+    for counter, ((i, j), similarity) in enumerate(_similar_pairs(vectors, min_similarity).items()):
+        # Orient the pair: earlier stage first, else earlier due date first
+        stage_i, stage_j = stages[i], stages[j]
+        if stage_i is not None and stage_j is not None and stage_i != stage_j:
+            first, then = (i, j) if stage_i < stage_j else (j, i)
+            score = 0.3 + 0.6 * similarity
+            reason = (f"{STAGE_NAMES[stages[first]].capitalize()} usually precedes "
+                      f"{STAGE_NAMES[stages[then]]} of the same scope")
+            score += 0.1 if dues[first] <= dues[then] else -0.1
+        else:
+            first, then = (i, j) if dues[i] <= dues[j] else (j, i)
+            score = 0.6 * similarity
+            reason = "Similar scope, due earlier"
+
+        upstream, downstream = tasks[first].id, tasks[then].id
+        if (downstream, upstream) in existing or upstream == downstream:
+            continue
+
+        candidate = CandidatePair(
+            task_id=downstream,
+            depends_on_task_id=upstream,
+            score=round(min(1.0, max(0.0, score)), 3),
+            similarity=round(similarity, 3),
+            reason=reason
+        )
+        entry = (candidate.score, counter, candidate)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    return [c for _, _, c in sorted(heap, reverse=True)]
+
+
+def candidates_to_suggestions(
+    candidates: List[CandidatePair],
+    min_confidence: float = 0.6,
+    limit: int = 5
+) -> List[SuggestedDependency]:
+    """Local-only suggestions when no LLM provider is configured"""
+    suggestions = []
+    for candidate in candidates:
+        if candidate.score < min_confidence:
+            continue
+        suggestions.append(SuggestedDependency(
+            taskId=candidate.task_id,
+            dependsOnTaskId=candidate.depends_on_task_id,
+            type=DependencyType.FINISH_TO_START,
+            confidence=candidate.score,
+            reason=f"Heuristic: {candidate.reason}"
+        ))
+        if len(suggestions) >= limit:
+            break
+    return suggestions
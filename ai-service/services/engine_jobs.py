@@ -0,0 +1,183 @@
+"""
+Engine Jobs - CPU-bound analysis work run in the process pool
+Module-level functions with picklable arguments and results, so the
+analysis router can hand them to services.admission instead of running
+the rule engine on the event loop.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import (
+    CriticalPathResponse, DuplicateDetectionRequest, DuplicateDetectionResponse,
+    ProjectInput, ScenarioResult, TaskInput, TimelineRequest, TimelineResponse, WhatIfScenario,
+    WorkloadHeatmapRequest, WorkloadHeatmapResponse,
+    WorkspaceAnalyzeRequest, WorkspaceAnalyzeResponse
+)
+from services.candidate_filter import CandidatePair, generate_candidates
+from services.duplicate_detector import collapse_duplicates, find_duplicates
+from services.rule_engine import RuleEngine
+from services.scenario_engine import DependencyCycleError, ScenarioEngine
+from services.timeline_layout import timeline_page
+from services.workload_index import WorkloadIndex
+from services.workspace_conflicts import WorkspaceConflictIndex
+
+
+def warm_up() -> bool:
+    """No-op used to start workers and import this module ahead of traffic"""
+    return True
+
+
+def lower_priority(niceness: int):
+    """Pool initializer for background workers: yield the CPU to request workers"""
+    if hasattr(os, "nice") and niceness > 0:
+        os.nice(niceness)
+
+
+def _engine(project: ProjectInput) -> RuleEngine:
+    return RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+
+
+def rule_analysis(project: ProjectInput, paths: int = 5, float_days: int = 3, max_tasks: int = 200) -> Dict:
+    """Everything /analyze needs from the rule engine"""
+    engine = _engine(project)
+    critical_path, _ = engine.calculate_critical_path()
+    risk_score, risk_level, factors = engine.calculate_risk_score()
+    near_paths, near_tasks = engine.path_schedule().near_critical(paths, float_days)
+    return {
+        "criticalPath": critical_path,
+        "riskScore": risk_score,
+        "riskLevel": risk_level,
+        "factors": factors,
+        "nearCriticalPaths": near_paths,
+        "nearCriticalTasks": near_tasks[:max_tasks],
+        "alerts": engine.generate_alerts(),
+        "bottlenecks": engine.generate_bottlenecks(critical_path, near_tasks),
+        "resourceConflicts": engine.detect_resource_conflicts()
+    }
+
+
+def risk_score(project: ProjectInput) -> Tuple[int, str, Dict]:
+    return _engine(project).calculate_risk_score()
+
+
+def portfolio_scores(projects: List[ProjectInput]) -> List[Tuple[int, str, Dict]]:
+    """Risk scores for every project of a portfolio refresh, in one job"""
+    return [_engine(project).calculate_risk_score() for project in projects]
+
+
+def critical_path(project: ProjectInput, paths: int = 5, float_days: int = 3, max_tasks: int = 200) -> CriticalPathResponse:
+    engine = _engine(project)
+    critical_path, duration_days = engine.calculate_critical_path()
+    near_paths, near_tasks = engine.path_schedule().near_critical(paths, float_days)
+    return CriticalPathResponse(
+        success=True,
+        criticalPathIds=critical_path,
+        totalDays=engine.calendar_span(critical_path),
+        durationDays=duration_days,
+        nearCriticalPaths=near_paths,
+        nearCriticalTasks=near_tasks[:max_tasks]
+    )
+
+
+def scenario_result(name: str, engine: RuleEngine, baseline: ScenarioResult = None) -> ScenarioResult:
+    """Summarize critical path and risk for one engine (base or overlay)"""
+    critical_path, duration_days = engine.calculate_critical_path()
+    total_days = engine.calendar_span(critical_path)
+    risk_score, risk_level, factors = engine.calculate_risk_score()
+    return ScenarioResult(
+        name=name,
+        riskScore=risk_score,
+        riskLevel=risk_level,
+        riskScoreDelta=risk_score - baseline.riskScore if baseline else 0,
+        criticalPathIds=critical_path,
+        totalDays=total_days,
+        totalDaysDelta=total_days - baseline.totalDays if baseline else 0,
+        durationDays=duration_days,
+        factors=factors
+    )
+
+
+def what_if(project: ProjectInput, scenarios: List[WhatIfScenario]) -> Tuple[ScenarioResult, List[ScenarioResult]]:
+    """
+    Baseline plus one result per scenario. All scenarios share one base
+    engine; each is a copy-on-write overlay over it. An invalid change
+    fails its scenario; one that closes a dependency cycle fails the call.
+    """
+    base = _engine(project)
+    baseline = scenario_result("baseline", base)
+
+    results = []
+    for scenario in scenarios:
+        try:
+            engine = ScenarioEngine(base, scenario.changes)
+            result = scenario_result(scenario.name, engine, baseline)
+            result.affectedTaskIds = sorted(engine.affected_task_ids)
+            results.append(result)
+        except DependencyCycleError:
+            raise
+        except ValueError as e:
+            results.append(ScenarioResult(name=scenario.name, success=False, error=str(e)))
+    return baseline, results
+
+
+def workload_heatmap(request: WorkloadHeatmapRequest) -> WorkloadHeatmapResponse:
+    index = WorkloadIndex(request.tasks, include_done=request.includeDone)
+    bounds = index.bounds()
+    if bounds is None:
+        return WorkloadHeatmapResponse(success=True, windowDays=request.windowDays)
+
+    start = request.start or bounds[0]
+    end = request.end or bounds[1]
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days // request.windowDays > 2000:
+        raise ValueError("Too many buckets; widen windowDays or narrow the range")
+
+    return WorkloadHeatmapResponse(
+        success=True,
+        start=start,
+        end=end,
+        windowDays=request.windowDays,
+        rows=index.heatmap(start, end, request.windowDays, request.assigneeIds)
+    )
+
+
+def workspace_analysis(request: WorkspaceAnalyzeRequest) -> WorkspaceAnalyzeResponse:
+    if request.start and request.end and request.end < request.start:
+        raise ValueError("end must not be before start")
+
+    index = WorkspaceConflictIndex(request.projects, include_done=request.includeDone)
+    return WorkspaceAnalyzeResponse(
+        success=True,
+        workspaceId=request.workspaceId,
+        conflicts=index.conflicts(request.concurrencyThreshold, request.start, request.end),
+        assignees=index.assignee_loads(request.start, request.end)
+    )
+
+
+def dependency_candidates(
+    tasks: List[TaskInput],
+    existing_deps: List[str],
+    collapse_threshold: Optional[float],
+    top_k: Optional[int]
+) -> Tuple[List[TaskInput], Optional[List[CandidatePair]]]:
+    """Duplicate collapse (unless threshold is None) and candidate pairs (unless top_k is None)"""
+    if collapse_threshold is not None:
+        tasks = collapse_duplicates(tasks, collapse_threshold)
+    if top_k is None:
+        return tasks, None
+    return tasks, generate_candidates(tasks, existing_deps, top_k=top_k)
+
+
+def duplicate_groups(request: DuplicateDetectionRequest) -> DuplicateDetectionResponse:
+    groups = find_duplicates(request.tasks, request.threshold)
+    return DuplicateDetectionResponse(
+        success=True,
+        groups=groups,
+        duplicateCount=sum(len(g.taskIds) - 1 for g in groups)
+    )
+
+
+def timeline(request: TimelineRequest) -> TimelineResponse:
+    return timeline_page(request)
@@ -0,0 +1,101 @@
+"""
+Interval Tree - Static centered interval tree over inclusive integer spans
+Built once in O(n log n); overlap queries cost O(log n + k) for k results.
+"""
+
+from typing import Any, Iterable, List, Optional, Tuple
+
+Interval = Tuple[int, int, Any]  # (start, end inclusive, payload)
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center: int, by_start: List[Interval], by_end: List[Interval]):
+        self.center = center
+        self.by_start = by_start  # ascending start
+        self.by_end = by_end  # descending end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+class IntervalTree:
+    """
+    Each node keeps the intervals containing its center point, sorted both
+    ways; intervals wholly left/right of the center go to the subtrees.
+    The center is the median start, so every node holds at least one
+    interval and the depth stays O(log n).
+    """
+
+    def __init__(self, intervals: Iterable[Interval]):
+        items = sorted(intervals, key=lambda iv: iv[0])
+        self.size = len(items)
+        self.root = self._build(items)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _build(self, items: List[Interval]) -> Optional[_Node]:
+        # `items` is sorted by start and stays sorted through partitioning;
+        # each side gets at most half the intervals, so recursion is shallow
+        if not items:
+            return None
+        center = items[len(items) // 2][0]
+        left, here, right = [], [], []
+        for iv in items:
+            if iv[1] < center:
+                left.append(iv)
+            elif iv[0] > center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        node = _Node(center, here, sorted(here, key=lambda iv: iv[1], reverse=True))
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def overlapping(self, lo: int, hi: int) -> List[Interval]:
+        """Intervals with start <= hi and end >= lo"""
+        found: List[Interval] = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if hi < node.center:
+                # Every interval here ends at or after center > hi >= lo
+                for iv in node.by_start:
+                    if iv[0] > hi:
+                        break
+                    found.append(iv)
+                if node.left:
+                    stack.append(node.left)
+            elif lo > node.center:
+                # Every interval here starts at or before center < lo <= hi
+                for iv in node.by_end:
+                    if iv[1] < lo:
+                        break
+                    found.append(iv)
+                if node.right:
+                    stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                if node.left:
+                    stack.append(node.left)
+                if node.right:
+                    stack.append(node.right)
+        return found
+
+    def max_concurrency(self, lo: int, hi: int) -> Tuple[int, Optional[int]]:
+        """(peak number of overlapping intervals, first point at that peak) within [lo, hi]"""
+        events = []
+        for start, end, _ in self.overlapping(lo, hi):
+            events.append((max(start, lo), 1))
+            events.append((min(end, hi) + 1, -1))
+        # Ends (-1) sort before starts at the same point: spans are inclusive
+        events.sort()
+        active = peak = 0
+        peak_at = None
+        for point, delta in events:
+            active += delta
+            if active > peak:
+                peak, peak_at = active, point
+        return peak, peak_at
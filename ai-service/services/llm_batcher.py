@@ -0,0 +1,127 @@
+"""
+LLM Batcher - Micro-batching of concurrent dependency detection calls
+Small projects arriving within a few milliseconds of each other (per
+lane) are packed into one multi-project prompt, so under load they share
+one request against the provider's requests/min quota instead of paying
+one round trip and one template each. A batch is flushed once no call
+has joined for LLM_BATCH_WINDOW_MS, at most LLM_BATCH_MAX_WAIT_MS after
+its first call, or as soon as it is full. A batch of one is prompted
+exactly like an unbatched call.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+from models.schemas import SuggestedDependency, TaskInput
+from services.candidate_filter import CandidatePair
+from services.rate_limiter import Lane
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEntry:
+    """One caller's project, waiting for its share of a batched answer"""
+
+    def __init__(self, tasks: List[TaskInput], existing_deps: List[str], candidates: Optional[List[CandidatePair]]):
+        self.tasks = tasks
+        self.existing_deps = existing_deps
+        self.candidates = candidates
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _Batch:
+    def __init__(self, lane: Lane):
+        self.lane = lane
+        self.entries: List[BatchEntry] = []
+        self.first_arrival = time.monotonic()
+        self.last_arrival = self.first_arrival
+        self.full = asyncio.Event()
+
+
+class DependencyBatcher:
+    """
+    Collects detect_dependencies calls per lane and runs them as batches
+    through the owning LLMService (detect_prefiltered / detect_batch).
+    """
+
+    def __init__(self, service, window: float, max_wait: float, max_projects: int):
+        self.service = service
+        self.window = window
+        self.max_wait = max_wait
+        self.max_projects = max_projects
+        self._open: Dict[Lane, _Batch] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_calls = 0
+
+    async def submit(
+        self,
+        tasks: List[TaskInput],
+        existing_deps: List[str],
+        candidates: Optional[List[CandidatePair]],
+        lane: Lane
+    ) -> List[SuggestedDependency]:
+        """Join (or open) the lane's pending batch and wait for this project's suggestions"""
+        entry = BatchEntry(tasks, existing_deps, candidates)
+        batch = self._open.get(lane)
+        if batch is None:
+            batch = self._open[lane] = _Batch(lane)
+            task = asyncio.get_running_loop().create_task(self._collect(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        batch.entries.append(entry)
+        batch.last_arrival = time.monotonic()
+        if len(batch.entries) >= self.max_projects:
+            self._close(batch)
+        return await entry.future
+
+    def _close(self, batch: _Batch):
+        """Stop accepting calls into `batch` and let it run now"""
+        if self._open.get(batch.lane) is batch:
+            del self._open[batch.lane]
+        batch.full.set()
+
+    async def _collect(self, batch: _Batch):
+        while not batch.full.is_set():
+            flush_at = min(batch.first_arrival + self.max_wait, batch.last_arrival + self.window)
+            remaining = flush_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(batch.full.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        self._close(batch)
+
+        entries = [e for e in batch.entries if not e.future.done()]
+        if not entries:
+            return
+        self.batches += 1
+        self.batched_calls += len(entries)
+        try:
+            if len(entries) == 1:
+                entry = entries[0]
+                results = [await self.service.detect_prefiltered(
+                    entry.tasks, entry.existing_deps, entry.candidates, batch.lane
+                )]
+            else:
+                results = await self.service.detect_batch(entries, batch.lane)
+        except Exception as e:
+            logger.error(f"Batched dependency detection failed: {e}")
+            for entry in entries:
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+            return
+        for entry, result in zip(entries, results):
+            if not entry.future.done():
+                entry.future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "calls": self.batched_calls,
+            "avgBatchSize": round(self.batched_calls / self.batches, 2) if self.batches else 0.0,
+            "open": sum(len(b.entries) for b in self._open.values())
+        }
@@ -0,0 +1,332 @@
+"""
+LLM Providers - Pluggable completion backends for LLMService
+Live providers (Groq, Gemini), a deterministic mock for offline load tests,
+and a record/replay wrapper that stores real responses on disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+
+from groq import Groq
+import google.generativeai as genai
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ProviderRateLimitError(Exception):
+    """Provider refused the call because of quota (HTTP 429)"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"429 rate_limit_exceeded from {provider}")
+        self.provider = provider
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+class LLMProvider(ABC):
+    """
+    A completion backend. Implementations return the raw model text for a
+    prompt; parsing stays in LLMService.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> str:
+        """Raw model text for the prompt"""
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the completion in chunks; default is one chunk"""
+        yield await self.complete(prompt)
+
+
+async def _iterate_in_thread(iterator) -> AsyncIterator:
+    """Drain a blocking SDK stream without stalling the event loop"""
+    sentinel = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
+
+
+class GroqProvider(LLMProvider):
+    """Groq (Llama 3.3 70B) - primary"""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        self.client = Groq(api_key=api_key, base_url=base_url or None)
+
+    async def complete(self, prompt: str) -> str:
+        # The SDK client is blocking; keep the event loop free for other calls
+        response = await asyncio.to_thread(
+            self.client.chat.completions.create,
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert project manager. Return only valid JSON."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=1024
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        chunks = await asyncio.to_thread(
+            self.client.chat.completions.create,
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert project manager. Return only valid JSON."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=1024,
+            stream=True
+        )
+        async for chunk in _iterate_in_thread(iter(chunks)):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini 1.5 Flash - fallback"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel("gemini-1.5-flash")
+
+    async def complete(self, prompt: str) -> str:
+        response = await asyncio.to_thread(
+            self.model.generate_content,
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.1,
+                "max_output_tokens": 1024
+            }
+        )
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await asyncio.to_thread(
+            self.model.generate_content,
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.1,
+                "max_output_tokens": 1024
+            },
+            stream=True
+        )
+        async for chunk in _iterate_in_thread(iter(response)):
+            if chunk.text:
+                yield chunk.text
+
+
+_CANDIDATE_RE = re.compile(r'"taskId":\s*"([^"]+)",\s*"dependsOnTaskId":\s*"([^"]+)"')
+_TASK_ID_RE = re.compile(r'"id":\s*"([^"]+)"')
+_PROJECT_SECTION_RE = re.compile(r"^=== PROJECT \S+ ===$", re.MULTILINE)
+
+
+class MockProvider(LLMProvider):
+    """
+    Offline stand-in with realistic latency and failure injection.
+    Latency is log-normal around `latency_ms` (sigma = `jitter`); responses
+    depend only on the prompt, so runs are reproducible.
+    """
+
+    name = "mock"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Seconds; median equals latency_ms"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency_ms), self.jitter) / 1000.0
+
+    def _inject_failure(self):
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise ProviderRateLimitError(self.name)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise Exception("mock provider injected failure")
+
+    async def complete(self, prompt: str) -> str:
+        await asyncio.sleep(self.sample_latency())
+        self._inject_failure()
+        return self.respond(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Same total latency as complete(); first chunk after 20% of it"""
+        latency = self.sample_latency()
+        await asyncio.sleep(latency * 0.2)
+        self._inject_failure()
+
+        text = self.respond(prompt)
+        step = 16
+        chunks = [text[i:i + step] for i in range(0, len(text), step)]
+        gap = latency * 0.8 / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(gap)
+            yield chunk
+
+    @staticmethod
+    def respond(prompt: str) -> str:
+        """
+        Deterministic answer: judge candidate pairs if present, else chain
+        tasks. Batched prompts are answered per project section.
+        """
+        # Ignore the example output at the end of the prompt template
+        context = prompt.split("Return a JSON object")[0]
+        sections = _PROJECT_SECTION_RE.split(context)[1:]
+        if not sections:
+            sections, digests = [context], [prompt_hash(prompt)]
+        else:
+            digests = [prompt_hash(section) for section in sections]
+
+        dependencies = []
+        for section, digest in zip(sections, digests):
+            pairs = _CANDIDATE_RE.findall(section)
+            if not pairs:
+                ids = list(dict.fromkeys(_TASK_ID_RE.findall(section)))
+                pairs = list(zip(ids[1:], ids[:-1]))
+
+            for i, (task_id, depends_on) in enumerate(pairs[:5]):
+                confidence = 0.7 + int(digest[i * 2:i * 2 + 2], 16) / 255 * 0.3
+                dependencies.append({
+                    "taskId": task_id,
+                    "dependsOnTaskId": depends_on,
+                    "confidence": round(confidence, 2),
+                    "reason": "Mock provider suggestion"
+                })
+        return json.dumps({"dependencies": dependencies})
+
+
+class RecordReplayProvider(LLMProvider):
+    """
+    Stores responses on disk keyed by prompt hash.
+    record: call the inner provider and save; replay: serve only from disk.
+    A relative directory is taken from the service directory, not the cwd.
+    """
+
+    def __init__(self, directory: str, mode: str, inner: Optional[LLMProvider] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown record/replay mode '{mode}'")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs a provider to record from")
+        if not os.path.isabs(directory):
+            directory = os.path.join(SERVICE_DIR, directory)
+        self.directory = directory
+        self.mode = mode
+        self.inner = inner
+        self.name = f"{mode}:{inner.name}" if inner else mode
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, prompt: str) -> str:
+        return os.path.join(self.directory, f"{prompt_hash(prompt)}.json")
+
+    async def complete(self, prompt: str) -> str:
+        path = self._path(prompt)
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise LookupError(f"No recording for prompt {os.path.basename(path)}")
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)["response"]
+
+        response = await self.inner.complete(prompt)
+        self._save(prompt, response)
+        return response
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        if self.mode == "replay":
+            yield await self.complete(prompt)
+            return
+
+        parts = []
+        async for chunk in self.inner.stream(prompt):
+            parts.append(chunk)
+            yield chunk
+        self._save(prompt, "".join(parts))
+
+    def _save(self, prompt: str, response: str):
+        with open(self._path(prompt), "w", encoding="utf-8") as f:
+            json.dump({"provider": self.inner.name, "prompt": prompt, "response": response}, f)
+
+
+def build_providers() -> List[LLMProvider]:
+    """Provider chain (primary first) for settings.LLM_PROVIDER"""
+    mode = settings.LLM_PROVIDER
+
+    if mode == "mock":
+        return [MockProvider(
+            latency_ms=settings.MOCK_LLM_LATENCY_MS,
+            jitter=settings.MOCK_LLM_JITTER,
+            error_rate=settings.MOCK_LLM_ERROR_RATE,
+            rate_limit_rate=settings.MOCK_LLM_RATE_LIMIT_RATE,
+            seed=settings.MOCK_LLM_SEED
+        )]
+
+    if mode == "replay":
+        return [RecordReplayProvider(settings.LLM_RECORDINGS_DIR, "replay")]
+
+    providers: List[LLMProvider] = []
+    if settings.GROQ_API_KEY:
+        try:
+            providers.append(GroqProvider(settings.GROQ_API_KEY, settings.GROQ_BASE_URL))
+            logger.info("✅ Groq client initialized")
+        except Exception as e:
+            logger.warning(f"⚠️ Groq initialization failed: {e}")
+
+    if settings.GEMINI_API_KEY:
+        try:
+            providers.append(GeminiProvider(settings.GEMINI_API_KEY))
+            logger.info("✅ Gemini client initialized")
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini initialization failed: {e}")
+
+    if mode == "record":
+        providers = [
+            RecordReplayProvider(settings.LLM_RECORDINGS_DIR, "record", p)
+            for p in providers
+        ]
+
+    return providers
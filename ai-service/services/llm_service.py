@@ -3,15 +3,25 @@ LLM Service - Groq (Primary) + Gemini (Fallback)
 Handles AI-powered semantic dependency detection
 """
 
-import os
 import json
 import logging
-from typing import List, Optional
-from groq import Groq
-import google.generativeai as genai
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from config import settings
-from models.schemas import TaskInput, SuggestedDependency, DependencyType
+from models.schemas import TaskInput, SuggestedDependency, DependencyType, TaskStatus
+from services import engine_jobs
+from services.admission import BACKGROUND, cpu_scheduler
+from services.candidate_filter import (
+    CandidatePair, candidates_to_suggestions
+)
+from services.llm_batcher import BatchEntry, DependencyBatcher
+from services.llm_providers import LLMProvider, build_providers
+from services.rate_limiter import (
+    rate_limiter, Lane, QueueBudgetExceeded, lane_budget, estimate_tokens
+)
+from services.rule_engine import normalize_datetime
+from services.stream_parser import IncrementalDependencyParser
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +42,7 @@ TASKS:
 
 EXISTING DEPENDENCIES (already defined, do not repeat these):
 {existing_deps}
-
+{candidate_pairs}
 Return a JSON object with an array of suggested NEW dependencies:
 {{
     "dependencies": [
@@ -55,42 +65,90 @@ RULES:
 Return ONLY the JSON object, no other text."""
 
 
+# Inserted into the prompt when the local pre-filter produced candidates
+CANDIDATE_PAIRS_SECTION = """
+CANDIDATE PAIRS (pre-screened locally; only judge these, in either direction):
+{candidates_json}
+"""
+
+
+# Several small projects in one call (see llm_batcher); ids carry a "p<n>:" prefix
+BATCH_DEPENDENCY_DETECTION_PROMPT = """You are an expert project manager AI. Below are {project_count} independent projects. For each one, analyze its tasks and identify hidden dependencies that humans might miss.
+
+Look for:
+1. **Semantic relationships**: Tasks that reference each other's outputs (e.g., "Design API" → "Implement API" → "Test API")
+2. **Logical sequencing**: Tasks that must happen in order (e.g., "Database schema" before "Backend CRUD")
+3. **Resource dependencies**: Tasks that require completion of shared resources
+4. **Technical prerequisites**: Development patterns (Frontend needs Backend API ready)
+
+Task ids are prefixed with their project ("p1:", "p2:", ...). Use the ids exactly as given.
+{projects}
+Return a JSON object with one array of suggested NEW dependencies for all projects:
+{{
+    "dependencies": [
+        {{
+            "taskId": "p1:id-of-task-that-depends",
+            "dependsOnTaskId": "p1:id-of-task-it-depends-on",
+            "confidence": 0.85,
+            "reason": "Brief explanation why this dependency exists"
+        }}
+    ]
+}}
+
+RULES:
+- Only suggest high-confidence dependencies (confidence >= 0.7)
+- Never link tasks from different projects
+- Do not create circular dependencies
+- Do not repeat existing dependencies
+- Maximum 5 suggestions per project
+- If no clear dependencies found, return empty array
+
+Return ONLY the JSON object, no other text."""
+
+
+BATCH_PROJECT_SECTION = """
+=== PROJECT {namespace} ===
+TASKS:
+{tasks_json}
+
+EXISTING DEPENDENCIES (already defined, do not repeat these):
+{existing_deps}
+{candidate_pairs}"""
+
+
 class LLMService:
     """
     LLM service with Groq as primary and Gemini as fallback.
-    Both are free tier APIs.
+    Both are free tier APIs. Providers are pluggable (see llm_providers),
+    so mock or recorded backends can stand in for load testing.
     """
     
-    def __init__(self):
-        self.groq_client = None
-        self.gemini_model = None
-        self._initialize_clients()
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        self.providers = providers if providers is not None else build_providers()
+        self.batcher = DependencyBatcher(
+            self,
+            window=settings.LLM_BATCH_WINDOW_MS / 1000,
+            max_wait=settings.LLM_BATCH_MAX_WAIT_MS / 1000,
+            max_projects=settings.LLM_BATCH_MAX_PROJECTS
+        )
     
-    def _initialize_clients(self):
-        """Initialize LLM clients"""
-        # Initialize Groq
-        if settings.GROQ_API_KEY:
-            try:
-                self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-                logger.info("✅ Groq client initialized")
-            except Exception as e:
-                logger.warning(f"⚠️ Groq initialization failed: {e}")
-        
-        # Initialize Gemini
-        if settings.GEMINI_API_KEY:
-            try:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.gemini_model = genai.GenerativeModel("gemini-1.5-flash")
-                logger.info("✅ Gemini client initialized")
-            except Exception as e:
-                logger.warning(f"⚠️ Gemini initialization failed: {e}")
+    def batching_enabled(self) -> bool:
+        """
+        Recordings are keyed by prompt hash and a batch's prompt depends on
+        which calls happened to arrive together, so record/replay runs
+        always prompt one project at a time.
+        """
+        return settings.LLM_BATCH_ENABLED and settings.LLM_PROVIDER not in ("record", "replay")
+    
+    def _provider(self, name: str) -> Optional[LLMProvider]:
+        return next((p for p in self.providers if p.name == name), None)
     
-    def _format_tasks_for_prompt(self, tasks: List[TaskInput]) -> str:
+    def _format_tasks_for_prompt(self, tasks: List[TaskInput], prefix: str = "") -> str:
         """Format tasks into a readable string for the prompt"""
         formatted = []
         for task in tasks:
             formatted.append({
-                "id": task.id,
+                "id": prefix + task.id,
                 "title": task.title,
                 "description": task.description or "No description",
                 "status": task.status.value,
@@ -100,34 +158,84 @@ class LLMService:
             })
         return json.dumps(formatted, indent=2)
     
+    def _format_candidates(self, candidates: Optional[List[CandidatePair]], prefix: str = "") -> str:
+        """Candidate pairs section, or "" without a pre-filter result"""
+        if not candidates:
+            return ""
+        pairs = [
+            {
+                "taskId": prefix + c.task_id,
+                "dependsOnTaskId": prefix + c.depends_on_task_id,
+                "hint": c.reason
+            }
+            for c in candidates
+        ]
+        return CANDIDATE_PAIRS_SECTION.format(candidates_json=json.dumps(pairs, indent=2))
+    
+    def _format_existing_deps(self, existing_deps: List[str], prefix: str = "") -> str:
+        if not existing_deps:
+            return "None"
+        if prefix:
+            existing_deps = [
+                "->".join(prefix + task_id for task_id in pair.split("->", 1))
+                for pair in existing_deps
+            ]
+        return json.dumps(existing_deps)
+    
+    def _build_prompt(
+        self,
+        tasks: List[TaskInput],
+        existing_deps: List[str],
+        candidates: Optional[List[CandidatePair]] = None
+    ) -> str:
+        """Fill the detection prompt, restricted to candidate pairs if given"""
+        return DEPENDENCY_DETECTION_PROMPT.format(
+            tasks_json=self._format_tasks_for_prompt(tasks),
+            existing_deps=self._format_existing_deps(existing_deps),
+            candidate_pairs=self._format_candidates(candidates)
+        )
+    
+    def _build_batch_prompt(self, entries: List[BatchEntry]) -> str:
+        """One prompt for several projects; project n's ids are prefixed "p<n>:" """
+        sections = []
+        for n, entry in enumerate(entries, 1):
+            prefix = f"p{n}:"
+            sections.append(BATCH_PROJECT_SECTION.format(
+                namespace=f"p{n}",
+                tasks_json=self._format_tasks_for_prompt(entry.tasks, prefix),
+                existing_deps=self._format_existing_deps(entry.existing_deps, prefix),
+                candidate_pairs=self._format_candidates(entry.candidates, prefix)
+            ))
+        return BATCH_DEPENDENCY_DETECTION_PROMPT.format(
+            project_count=len(entries),
+            projects="".join(sections)
+        )
+    
+    def _parse_dependency_objects(self, response_text: str) -> List[Dict]:
+        """The raw "dependencies" array of an LLM response"""
+        # Clean the response
+        cleaned = response_text.strip()
+        if cleaned.startswith("```json"):
+            cleaned = cleaned[7:]
+        if cleaned.startswith("```"):
+            cleaned = cleaned[3:]
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3]
+        cleaned = cleaned.strip()
+        
+        data = json.loads(cleaned)
+        return data.get("dependencies", [])
+    
     def _parse_llm_response(self, response_text: str) -> List[SuggestedDependency]:
         """Parse LLM response into SuggestedDependency objects"""
         try:
-            # Clean the response
-            cleaned = response_text.strip()
-            if cleaned.startswith("```json"):
-                cleaned = cleaned[7:]
-            if cleaned.startswith("```"):
-                cleaned = cleaned[3:]
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            data = json.loads(cleaned)
-            dependencies = data.get("dependencies", [])
-            
             result = []
-            for dep in dependencies:
-                if dep.get("confidence", 0) >= 0.7:
-                    result.append(SuggestedDependency(
-                        taskId=dep["taskId"],
-                        dependsOnTaskId=dep["dependsOnTaskId"],
-                        type=DependencyType.FINISH_TO_START,
-                        confidence=min(1.0, max(0.0, dep.get("confidence", 0.8))),
-                        reason=dep.get("reason", "AI detected semantic relationship")
-                    ))
+            for dep in self._parse_dependency_objects(response_text):
+                suggestion = self._to_suggestion(dep)
+                if suggestion:
+                    result.append(suggestion)
             
-            return result[:5]  # Max 5 suggestions
+            return result
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response: {e}")
@@ -137,96 +245,327 @@ class LLMService:
             logger.error(f"Error parsing dependencies: {e}")
             return []
     
+    def _parse_batch_response(self, response_text: str, entries: List[BatchEntry]) -> List[List[SuggestedDependency]]:
+        """
+        Split a multi-project response back into per-project suggestions.
+        Ids are resolved by their "p<n>:" prefix (or, if the model dropped
+        it, by an id that only one project has); pairs spanning two
+        projects are dropped.
+        """
+        owners: Dict[str, Tuple[int, str]] = {}
+        ambiguous = set()
+        for n, entry in enumerate(entries):
+            for task in entry.tasks:
+                owners[f"p{n + 1}:{task.id}"] = (n, task.id)
+                if task.id in owners:
+                    ambiguous.add(task.id)
+                owners[task.id] = (n, task.id)
+        for task_id in ambiguous:
+            del owners[task_id]
+        
+        results: List[List[SuggestedDependency]] = [[] for _ in entries]
+        try:
+            dependencies = self._parse_dependency_objects(response_text)
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Failed to parse batched LLM response: {e}")
+            logger.error(f"Response was: {response_text[:500]}")
+            return results
+        
+        for dep in dependencies:
+            try:
+                task_owner = owners.get(dep["taskId"])
+                depends_owner = owners.get(dep["dependsOnTaskId"])
+                if not task_owner or not depends_owner or task_owner[0] != depends_owner[0]:
+                    continue
+                suggestion = self._to_suggestion(
+                    {**dep, "taskId": task_owner[1], "dependsOnTaskId": depends_owner[1]}
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid batched dependency: {e}")
+                continue
+            if suggestion:
+                results[task_owner[0]].append(suggestion)
+        return results
+    
+    def _to_suggestion(self, dep: Dict) -> Optional[SuggestedDependency]:
+        """One parsed dependency object, or None below the confidence bar"""
+        if dep.get("confidence", 0) < 0.7:
+            return None
+        return SuggestedDependency(
+            taskId=dep["taskId"],
+            dependsOnTaskId=dep["dependsOnTaskId"],
+            type=DependencyType.FINISH_TO_START,
+            confidence=min(1.0, max(0.0, dep.get("confidence", 0.8))),
+            reason=dep.get("reason", "AI detected semantic relationship")
+        )
+    
+    async def detect_with_provider(
+        self,
+        provider: LLMProvider,
+        tasks: List[TaskInput],
+        existing_deps: List[str] = [],
+        candidates: Optional[List[CandidatePair]] = None,
+        lane: Lane = Lane.INTERACTIVE,
+        deadline: Optional[float] = None
+    ) -> List[SuggestedDependency]:
+        """
+        Run dependency detection on one provider, within its quota.
+        Raises QueueBudgetExceeded if quota isn't available before `deadline`.
+        """
+        prompt = self._build_prompt(tasks, existing_deps, candidates)
+        return self._parse_llm_response(
+            await self._complete(provider, prompt, lane, deadline)
+        )[:5]  # Max 5 suggestions
+    
+    async def _complete(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        lane: Lane = Lane.INTERACTIVE,
+        deadline: Optional[float] = None
+    ) -> str:
+        """One completion within the provider's quota"""
+        if deadline is None:
+            deadline = time.monotonic() + lane_budget(lane)
+        limiter = rate_limiter.for_provider(provider.name)
+        await limiter.acquire(
+            estimate_tokens(prompt), lane, max(0.0, deadline - time.monotonic())
+        )
+        
+        try:
+            return await provider.complete(prompt)
+        except Exception as e:
+            error_str = str(e).lower()
+            if "rate_limit" in error_str or "429" in error_str:
+                limiter.penalize()
+            raise
+    
     async def detect_dependencies_groq(
         self, 
         tasks: List[TaskInput], 
-        existing_deps: List[str] = []
+        existing_deps: List[str] = [],
+        candidates: Optional[List[CandidatePair]] = None
     ) -> List[SuggestedDependency]:
         """Use Groq (Llama 3.3 70B) for dependency detection"""
-        if not self.groq_client:
+        provider = self._provider("groq")
+        if not provider:
             raise Exception("Groq client not initialized")
-        
-        prompt = DEPENDENCY_DETECTION_PROMPT.format(
-            tasks_json=self._format_tasks_for_prompt(tasks),
-            existing_deps=json.dumps(existing_deps) if existing_deps else "None"
-        )
-        
-        response = self.groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert project manager. Return only valid JSON."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-            max_tokens=1024
-        )
-        
-        return self._parse_llm_response(response.choices[0].message.content)
+        return await self.detect_with_provider(provider, tasks, existing_deps, candidates)
     
     async def detect_dependencies_gemini(
         self, 
         tasks: List[TaskInput], 
-        existing_deps: List[str] = []
+        existing_deps: List[str] = [],
+        candidates: Optional[List[CandidatePair]] = None
     ) -> List[SuggestedDependency]:
         """Use Gemini 1.5 Flash for dependency detection (fallback)"""
-        if not self.gemini_model:
+        provider = self._provider("gemini")
+        if not provider:
             raise Exception("Gemini client not initialized")
-        
-        prompt = DEPENDENCY_DETECTION_PROMPT.format(
-            tasks_json=self._format_tasks_for_prompt(tasks),
-            existing_deps=json.dumps(existing_deps) if existing_deps else "None"
-        )
-        
-        response = self.gemini_model.generate_content(
-            prompt,
-            generation_config={
-                "response_mime_type": "application/json",
-                "temperature": 0.1,
-                "max_output_tokens": 1024
-            }
-        )
-        
-        return self._parse_llm_response(response.text)
+        return await self.detect_with_provider(provider, tasks, existing_deps, candidates)
     
     async def detect_dependencies(
         self, 
         tasks: List[TaskInput], 
-        existing_deps: List[str] = []
+        existing_deps: List[str] = [],
+        lane: Lane = Lane.INTERACTIVE
     ) -> List[SuggestedDependency]:
         """
         Detect semantic dependencies using LLM.
         Uses Groq as primary, falls back to Gemini on rate limit or error.
+        Calls queue behind the provider quota in `lane` priority; once the
+        lane's queue budget is spent the result degrades to local heuristics.
+        Small projects arriving together are micro-batched into one prompt.
         """
         if len(tasks) < 2:
             return []  # Need at least 2 tasks for dependencies
         
-        # Try Groq first (faster)
-        if self.groq_client:
+        tasks, candidates, local_result = await self._prefilter(tasks, existing_deps, lane)
+        if local_result is not None:
+            return local_result
+        
+        if self.batching_enabled() and len(tasks) <= settings.LLM_BATCH_MAX_TASKS:
+            return await self.batcher.submit(tasks, existing_deps, candidates, lane)
+        return await self.detect_prefiltered(tasks, existing_deps, candidates, lane)
+    
+    async def detect_prefiltered(
+        self,
+        tasks: List[TaskInput],
+        existing_deps: List[str],
+        candidates: Optional[List[CandidatePair]],
+        lane: Lane = Lane.INTERACTIVE
+    ) -> List[SuggestedDependency]:
+        """One project, already pre-filtered, through the provider chain"""
+        prompt = self._build_prompt(tasks, existing_deps, candidates)
+        response_text = await self._complete_with_fallback(prompt, lane)
+        if response_text is not None:
+            suggestions = self._parse_llm_response(response_text)
+            return self._restrict_to_candidates(suggestions, candidates)[:5]  # Max 5 suggestions
+        return self._local_fallback(candidates)
+    
+    async def detect_batch(self, entries: List[BatchEntry], lane: Lane = Lane.INTERACTIVE) -> List[List[SuggestedDependency]]:
+        """Several pre-filtered projects in one prompt; one result list per entry"""
+        prompt = self._build_batch_prompt(entries)
+        logger.info(f"📦 Batching {len(entries)} projects into one dependency prompt")
+        response_text = await self._complete_with_fallback(prompt, lane)
+        if response_text is None:
+            return [self._local_fallback(entry.candidates) for entry in entries]
+        return [
+            self._restrict_to_candidates(suggestions, entry.candidates)[:5]  # Max 5 per project
+            for entry, suggestions in zip(entries, self._parse_batch_response(response_text, entries))
+        ]
+    
+    async def _complete_with_fallback(self, prompt: str, lane: Lane) -> Optional[str]:
+        """
+        Try providers in order (Groq first, then Gemini), sharing one queue
+        budget. None when every provider failed or ran out of budget.
+        """
+        deadline = time.monotonic() + lane_budget(lane)
+        for i, provider in enumerate(self.providers):
+            is_last = i == len(self.providers) - 1
             try:
-                logger.info("🧠 Using Groq for dependency detection")
-                return await self.detect_dependencies_groq(tasks, existing_deps)
+                logger.info(f"🧠 Using {provider.name} for dependency detection")
+                return await self._complete(provider, prompt, lane, deadline)
+            except QueueBudgetExceeded as e:
+                logger.warning(f"⏳ {e}, {'giving up' if is_last else 'falling back'}")
             except Exception as e:
                 error_str = str(e).lower()
+                next_step = "giving up" if is_last else "falling back"
                 if "rate_limit" in error_str or "429" in error_str:
-                    logger.warning("⚠️ Groq rate limited, falling back to Gemini")
+                    logger.warning(f"⚠️ {provider.name} rate limited, {next_step}")
                 else:
-                    logger.error(f"Groq error: {e}, falling back to Gemini")
+                    logger.error(f"{provider.name} error: {e}, {next_step}")
+        return None
+    
+    def _local_fallback(self, candidates: Optional[List[CandidatePair]]) -> List[SuggestedDependency]:
+        if candidates:
+            logger.warning("🏠 LLM unavailable, using local heuristic suggestions")
+            return candidates_to_suggestions(candidates)
+        
+        logger.error("❌ No LLM available for dependency detection")
+        return []
+    
+    async def _prefilter(
+        self,
+        tasks: List[TaskInput],
+        existing_deps: List[str],
+        lane: Lane = Lane.INTERACTIVE
+    ) -> Tuple[List[TaskInput], Optional[List[CandidatePair]], Optional[List[SuggestedDependency]]]:
+        """
+        Collapse near-duplicate tasks and run the local candidate pre-filter
+        (in the CPU pool, the niced one for background work; both are
+        O(n log n) work over every task).
+        Returns (tasks to prompt with, candidates, local result); a non-None
+        local result means no LLM call is needed.
+        """
+        collapse_threshold = settings.DUPLICATE_SIMILARITY_THRESHOLD if settings.DUPLICATE_COLLAPSE_ENABLED else None
+        top_k = settings.DEPENDENCY_CANDIDATE_TOP_K if settings.DEPENDENCY_PREFILTER_ENABLED else None
+        if collapse_threshold is None and top_k is None:
+            return tasks, None, None
+        
+        original_count = len(tasks)
+        tasks, candidates = await cpu_scheduler.run(
+            "prefilter", original_count, engine_jobs.dependency_candidates,
+            tasks, existing_deps, collapse_threshold, top_k,
+            lane=BACKGROUND if lane == Lane.BACKGROUND else None
+        )
+        if len(tasks) < original_count:
+            logger.info(f"🧬 Collapsed {original_count - len(tasks)} duplicate tasks before prompting")
         
-        # Fallback to Gemini
-        if self.gemini_model:
+        if candidates is None:
+            return tasks, None, None
+        
+        if not self.providers:
+            logger.info("🏠 No LLM configured, using local heuristic suggestions")
+            return tasks, candidates, candidates_to_suggestions(candidates)
+        if not candidates:
+            # No lexical overlap says nothing about semantic dependencies:
+            # let the LLM look at the soonest-due open tasks instead
+            capped = sorted(
+                tasks, key=lambda t: (t.status == TaskStatus.DONE, normalize_datetime(t.due_date))
+            )[:settings.DEPENDENCY_FALLBACK_MAX_TASKS]
+            logger.info(f"🔍 No candidate pairs found, prompting with {len(capped)} tasks")
+            return capped, None, None
+        
+        # Only send tasks that appear in a candidate pair
+        involved = {c.task_id for c in candidates} | {c.depends_on_task_id for c in candidates}
+        return [t for t in tasks if t.id in involved], candidates, None
+    
+    async def stream_dependencies(
+        self,
+        tasks: List[TaskInput],
+        existing_deps: List[str] = [],
+        lane: Lane = Lane.INTERACTIVE
+    ) -> AsyncIterator[SuggestedDependency]:
+        """
+        Like detect_dependencies, but yields each suggestion as soon as the
+        provider has streamed its closing brace. Falls back to the next
+        provider only if nothing has been yielded yet.
+        """
+        if len(tasks) < 2:
+            return
+        
+        tasks, candidates, local_result = await self._prefilter(tasks, existing_deps, lane)
+        if local_result is not None:
+            for suggestion in local_result:
+                yield suggestion
+            return
+        
+        deadline = time.monotonic() + lane_budget(lane)
+        prompt = self._build_prompt(tasks, existing_deps, candidates)
+        for i, provider in enumerate(self.providers):
+            is_last = i == len(self.providers) - 1
+            emitted = 0
+            limiter = rate_limiter.for_provider(provider.name)
             try:
-                logger.info("🔄 Using Gemini for dependency detection")
-                return await self.detect_dependencies_gemini(tasks, existing_deps)
+                await limiter.acquire(
+                    estimate_tokens(prompt), lane, max(0.0, deadline - time.monotonic())
+                )
+                logger.info(f"🧠 Streaming from {provider.name} for dependency detection")
+                parser = IncrementalDependencyParser()
+                async for chunk in provider.stream(prompt):
+                    for dep in parser.feed(chunk):
+                        try:
+                            suggestion = self._to_suggestion(dep)
+                        except (KeyError, ValueError) as e:
+                            logger.warning(f"Skipping invalid streamed dependency: {e}")
+                            continue
+                        if not suggestion or not self._restrict_to_candidates([suggestion], candidates):
+                            continue
+                        yield suggestion
+                        emitted += 1
+                        if emitted >= 5:  # Max 5 suggestions
+                            return
+                return
+            except QueueBudgetExceeded as e:
+                logger.warning(f"⏳ {e}, {'giving up' if is_last else 'falling back'}")
             except Exception as e:
-                logger.error(f"Gemini error: {e}")
-                return []
+                error_str = str(e).lower()
+                if "rate_limit" in error_str or "429" in error_str:
+                    limiter.penalize()
+                if emitted:
+                    logger.error(f"{provider.name} stream failed after {emitted} suggestions: {e}")
+                    return
+                logger.error(f"{provider.name} error: {e}, {'giving up' if is_last else 'falling back'}")
         
-        logger.error("❌ No LLM available for dependency detection")
-        return []
+        if candidates:
+            logger.warning("🏠 LLM unavailable, using local heuristic suggestions")
+            for suggestion in candidates_to_suggestions(candidates):
+                yield suggestion
+    
+    def _restrict_to_candidates(
+        self,
+        suggestions: List[SuggestedDependency],
+        candidates: Optional[List[CandidatePair]]
+    ) -> List[SuggestedDependency]:
+        """Drop LLM suggestions outside the pre-screened pairs"""
+        if not candidates:
+            return suggestions
+        allowed = set()
+        for c in candidates:
+            allowed.add((c.task_id, c.depends_on_task_id))
+            allowed.add((c.depends_on_task_id, c.task_id))
+        return [s for s in suggestions if (s.taskId, s.dependsOnTaskId) in allowed]
 
 
 # Singleton instance
@@ -0,0 +1,164 @@
+"""
+Near-Critical Paths - K longest dependency chains and per-task float
+Each task lasts max(1, due_date - createdAt) days, the bar the Gantt
+timeline draws. A forward and a backward pass over one topological order
+give every task's float (days it can slip before the longest chain gets
+longer). A DP over the same order keeps the k longest chains ending at
+each task in a bounded heap, so the k longest start-to-end chains cost
+O(E * k log k) instead of enumerating every path.
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import NearCriticalPath, TaskFloat, TaskInput
+from services.rule_engine import normalize_datetime
+
+# (chain length in days, predecessor task id, rank in the predecessor's list)
+Chain = Tuple[int, Optional[str], int]
+
+
+def duration_days(task: TaskInput) -> int:
+    """Task span in whole days, at least one (matches the Gantt bar width)"""
+    span = normalize_datetime(task.due_date) - normalize_datetime(task.createdAt)
+    return max(1, math.ceil(span.total_seconds() / 86400))
+
+
+class PathSchedule:
+    """
+    CPM over task durations. Edges that would close a cycle are ignored
+    (the later task in the topological order keeps the edge as incoming),
+    so every method sees the same DAG.
+    """
+
+    def __init__(self, tasks: Dict[str, TaskInput], depends_on: Dict[str, List[str]], dependents: Dict[str, List[str]]):
+        self.tasks = tasks
+        self.order = self._topological_order(depends_on, dependents)
+        position = {task_id: i for i, task_id in enumerate(self.order)}
+
+        # Deduplicated edges that agree with the order
+        self.preds: Dict[str, List[str]] = {}
+        self.succs: Dict[str, List[str]] = {task_id: [] for task_id in self.order}
+        self.cyclic = False  # some edge was dropped to break a cycle
+        for task_id in self.order:
+            preds = []
+            for p in dict.fromkeys(depends_on.get(task_id, ())):
+                if p not in position:
+                    continue
+                if position[p] < position[task_id]:
+                    preds.append(p)
+                else:
+                    self.cyclic = True
+            self.preds[task_id] = preds
+            for p in preds:
+                self.succs[p].append(task_id)
+
+        self.duration = {task_id: duration_days(tasks[task_id]) for task_id in self.order}
+
+        # Forward pass: earliest start/finish as day offsets from project start
+        self.earliest_start: Dict[str, int] = {}
+        self.earliest_finish: Dict[str, int] = {}
+        for task_id in self.order:
+            start = max((self.earliest_finish[p] for p in self.preds[task_id]), default=0)
+            self.earliest_start[task_id] = start
+            self.earliest_finish[task_id] = start + self.duration[task_id]
+        self.length = max(self.earliest_finish.values(), default=0)
+
+        # Backward pass: latest start without delaying the longest chain
+        self.latest_start: Dict[str, int] = {}
+        for task_id in reversed(self.order):
+            finish = min((self.latest_start[s] for s in self.succs[task_id]), default=self.length)
+            self.latest_start[task_id] = finish - self.duration[task_id]
+
+        self._chains: Dict[int, Dict[str, List[Chain]]] = {}
+
+    def _topological_order(self, depends_on: Dict[str, List[str]], dependents: Dict[str, List[str]]) -> List[str]:
+        """Kahn's algorithm; tasks left on cycles follow in input order"""
+        indegree = {
+            task_id: sum(1 for p in set(depends_on.get(task_id, ())) if p in self.tasks)
+            for task_id in self.tasks
+        }
+        ready = [task_id for task_id, degree in indegree.items() if degree == 0]
+        order = []
+        while ready:
+            task_id = ready.pop()
+            order.append(task_id)
+            for s in set(dependents.get(task_id, ())):
+                if s in indegree:
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        ready.append(s)
+        if len(order) < len(self.tasks):
+            placed = set(order)
+            order.extend(task_id for task_id in self.tasks if task_id not in placed)
+        return order
+
+    def float_days(self, task_id: str) -> int:
+        return self.latest_start[task_id] - self.earliest_start[task_id]
+
+    def _chains_by_task(self, k: int) -> Dict[str, List[Chain]]:
+        """The k longest chains ending at each task, longest first"""
+        if k not in self._chains:
+            best: Dict[str, List[Chain]] = {}
+            for task_id in self.order:
+                duration = self.duration[task_id]
+                preds = self.preds[task_id]
+                if not preds:
+                    best[task_id] = [(duration, None, 0)]
+                    continue
+                best[task_id] = heapq.nlargest(k, (
+                    (chain[0] + duration, p, rank)
+                    for p in preds
+                    for rank, chain in enumerate(best[p])
+                ), key=lambda chain: chain[0])
+            self._chains[k] = best
+        return self._chains[k]
+
+    def longest_paths(self, k: int) -> List[Tuple[List[str], int]]:
+        """The k longest chains from a task with no prerequisites to one with no dependents"""
+        if not self.order or k < 1:
+            return []
+        best = self._chains_by_task(k)
+        ends = heapq.nlargest(k, (
+            (chain[0], task_id, rank)
+            for task_id in self.order if not self.succs[task_id]
+            for rank, chain in enumerate(best[task_id])
+        ), key=lambda end: end[0])
+
+        paths = []
+        for length, task_id, rank in ends:
+            path = []
+            while task_id is not None:
+                path.append(task_id)
+                _, pred, pred_rank = best[task_id][rank]
+                task_id, rank = pred, pred_rank
+            path.reverse()
+            paths.append((path, length))
+        return paths
+
+    def near_critical(self, k: int, float_threshold: int) -> Tuple[List[NearCriticalPath], List[TaskFloat]]:
+        """
+        Top k chains plus every task whose float is within the threshold,
+        tightest first, with how many of the top chains pass through it.
+        """
+        paths = self.longest_paths(k)
+        on_paths = Counter(task_id for path, _ in paths for task_id in path)
+
+        near = [
+            task_id for task_id in self.order
+            if self.float_days(task_id) <= float_threshold
+        ]
+        near.sort(key=lambda task_id: (self.float_days(task_id), self.earliest_start[task_id]))
+
+        return (
+            [
+                NearCriticalPath(taskIds=path, lengthDays=length, slackDays=self.length - length)
+                for path, length in paths
+            ],
+            [
+                TaskFloat(taskId=task_id, floatDays=self.float_days(task_id), pathCount=on_paths[task_id])
+                for task_id in near
+            ]
+        )
@@ -0,0 +1,196 @@
+"""
+Portfolio Rollup - Workspace risk aggregates maintained incrementally
+Every risk score computed for a project (/analyze, /risk/calculate, the
+background scheduler, portfolio refreshes) replaces that project's compact
+factor summary. Each workspace keeps integer running sums (weights,
+weighted scores and penalties, level counts) plus a score-ordered ranking,
+so a new result costs O(log n) plus a list insert and the portfolio score,
+factor breakdown and worst-N projects are read without touching every
+project. Projects are weighted by their open tasks. Depths are not summed:
+each workspace counts projects per depth and reports the deepest.
+"""
+
+import bisect
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.schemas import (
+    PortfolioFactor, PortfolioProject, PortfolioRiskResponse, ProjectInput, TaskStatus
+)
+from services.rule_engine import risk_level
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKSPACE = "default"  # for projects sent without a workspaceId
+
+
+class ProjectRiskSummary:
+    """What the rollup keeps per project: score, weight and per-factor (count, penalty, depth)"""
+
+    __slots__ = ("project_id", "name", "workspace_id", "score", "level", "weight", "factors", "analyzed_at")
+
+    def __init__(self, project: ProjectInput, score: int, level: str, factors: Dict):
+        self.project_id = project.id
+        self.name = project.name
+        self.workspace_id = project.workspaceId or DEFAULT_WORKSPACE
+        self.score = score
+        self.level = level
+        self.weight = max(1, sum(1 for t in project.tasks if t.status != TaskStatus.DONE))
+        # Task id lists are dropped; dependency_depth has a depth instead of a count
+        self.factors: Dict[str, Tuple[int, int, Optional[int]]] = {
+            name: (
+                int(factor.get("count", 0)),
+                int(factor.get("penalty", 0)),
+                int(factor["maxDepth"]) if "maxDepth" in factor else None
+            )
+            for name, factor in factors.items()
+        }
+        self.analyzed_at = datetime.utcnow()
+
+    def top_factor(self) -> Optional[str]:
+        name, (_, penalty, _) = max(self.factors.items(), key=lambda item: item[1][1], default=(None, (0, 0, None)))
+        return name if penalty > 0 else None
+
+
+class WorkspaceAggregate:
+    """Running sums for one workspace; apply(summary, -1) undoes apply(summary, +1)"""
+
+    def __init__(self):
+        self.projects: Dict[str, ProjectRiskSummary] = {}
+        self.total_weight = 0
+        self.weighted_score = 0
+        self.level_counts: Counter = Counter()
+        # factor -> [weighted penalty, count, projects with a penalty]
+        self.factor_totals: Dict[str, List[int]] = {}
+        # factor -> depth -> projects at that depth (a max cannot be un-applied)
+        self.factor_depths: Dict[str, Counter] = {}
+        self.ranking: List[Tuple[int, str]] = []  # (score, project id), worst first
+        self.updated_at: Optional[datetime] = None
+
+    def apply(self, summary: ProjectRiskSummary, sign: int):
+        self.total_weight += sign * summary.weight
+        self.weighted_score += sign * summary.weight * summary.score
+        self.level_counts[summary.level] += sign
+        for name, (count, penalty, depth) in summary.factors.items():
+            totals = self.factor_totals.setdefault(name, [0, 0, 0])
+            totals[0] += sign * summary.weight * penalty
+            totals[1] += sign * count
+            totals[2] += sign * (penalty > 0)
+            if depth is not None:
+                depths = self.factor_depths.setdefault(name, Counter())
+                depths[depth] += sign
+                if not depths[depth]:
+                    del depths[depth]
+
+        key = (summary.score, summary.project_id)
+        if sign > 0:
+            self.projects[summary.project_id] = summary
+            bisect.insort(self.ranking, key)
+        else:
+            del self.projects[summary.project_id]
+            del self.ranking[bisect.bisect_left(self.ranking, key)]
+        self.updated_at = datetime.utcnow()
+
+    def max_depth(self, factor: str) -> Optional[int]:
+        depths = self.factor_depths.get(factor)
+        return max(depths) if depths else None
+
+
+class PortfolioRollup:
+    """Per-workspace risk aggregates over the latest result of each project"""
+
+    def __init__(self):
+        self._workspaces: Dict[str, WorkspaceAggregate] = {}
+        self._projects: Dict[str, ProjectRiskSummary] = {}
+
+    def update(self, project: ProjectInput, score: int, level: str, factors: Dict):
+        """Replace a project's contribution with a fresh risk result"""
+        self.remove(project.id)
+        summary = ProjectRiskSummary(project, score, level, factors)
+        self._projects[project.id] = summary
+        self._workspaces.setdefault(summary.workspace_id, WorkspaceAggregate()).apply(summary, 1)
+
+    def record(self, project: ProjectInput, score: int, level: str, factors: Dict):
+        """update(), logging instead of failing the request that produced the score"""
+        try:
+            self.update(project, score, level, factors)
+        except Exception as e:
+            logger.warning(f"Could not update portfolio rollup: {e}")
+
+    def remove(self, project_id: str) -> bool:
+        summary = self._projects.pop(project_id, None)
+        if summary is None:
+            return False
+        workspace = self._workspaces[summary.workspace_id]
+        workspace.apply(summary, -1)
+        if not workspace.projects:
+            del self._workspaces[summary.workspace_id]
+        return True
+
+    def retain(self, workspace_id: str, project_ids: Set[str]) -> int:
+        """Drop the workspace's projects not in `project_ids`; returns how many were dropped"""
+        workspace = self._workspaces.get(workspace_id)
+        if workspace is None:
+            return 0
+        stale = [project_id for project_id in workspace.projects if project_id not in project_ids]
+        for project_id in stale:
+            self.remove(project_id)
+        return len(stale)
+
+    def portfolio(self, workspace_id: str, worst: int = 5, project_ids: bool = False) -> PortfolioRiskResponse:
+        """
+        Workspace score, level counts, factor breakdown and the `worst`
+        lowest-scoring projects; with `project_ids`, also every project id
+        in the rollup so callers can resync just the ones that differ.
+        """
+        workspace = self._workspaces.get(workspace_id)
+        if workspace is None:
+            return PortfolioRiskResponse(success=True, workspaceId=workspace_id, projectIds=[] if project_ids else None)
+
+        score = round(workspace.weighted_score / workspace.total_weight)
+        return PortfolioRiskResponse(
+            success=True,
+            workspaceId=workspace_id,
+            riskScore=score,
+            riskLevel=risk_level(score),
+            projectCount=len(workspace.projects),
+            totalWeight=workspace.total_weight,
+            levelCounts={level: n for level, n in workspace.level_counts.items() if n},
+            worstProjects=[
+                self._project(workspace.projects[project_id])
+                for _, project_id in workspace.ranking[:worst]
+            ],
+            factors=[
+                PortfolioFactor(
+                    factor=name,
+                    avgPenalty=round(weighted_penalty / workspace.total_weight, 2),
+                    count=count,
+                    maxDepth=workspace.max_depth(name),
+                    projectsAffected=affected
+                )
+                for name, (weighted_penalty, count, affected) in workspace.factor_totals.items()
+            ],
+            projectIds=list(workspace.projects) if project_ids else None,
+            updatedAt=workspace.updated_at
+        )
+
+    @staticmethod
+    def _project(summary: ProjectRiskSummary) -> PortfolioProject:
+        return PortfolioProject(
+            projectId=summary.project_id,
+            name=summary.name,
+            riskScore=summary.score,
+            riskLevel=summary.level,
+            weight=summary.weight,
+            topFactor=summary.top_factor(),
+            analyzedAt=summary.analyzed_at
+        )
+
+    def stats(self) -> Dict:
+        return {"workspaces": len(self._workspaces), "projects": len(self._projects)}
+
+
+# Singleton instance
+portfolio_rollup = PortfolioRollup()
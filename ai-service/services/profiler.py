@@ -0,0 +1,252 @@
+"""
+Profiler - Opt-in per-request profiling for slow projects
+Runs a request under cProfile (deterministic, pstats output) or a
+thread-based stack sampler (collapsed stacks for flame graphs) and stores
+the result on disk keyed by request id. Engine jobs the request sends to
+the process pools are profiled inside the worker (run_profiled) and
+merged into the same file.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("cprofile", "sample")
+
+# Session of the request being profiled, seen by services.admission
+active_session: ContextVar[Optional["ProfileSession"]] = ContextVar("active_profile_session", default=None)
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+    The event loop thread is shared, so concurrent requests can show up too.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, one 'stack count' per line"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class _RawStats:
+    """pstats.Stats source for a stats dict collected in a pool worker"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def run_profiled(mode: str, fn: Callable, *args) -> Tuple[Any, Any]:
+    """
+    Run fn(*args) in a pool worker under the session's profiler.
+    Returns (result, raw cProfile stats dict or collapsed-stack Counter).
+    """
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return result, profiler.stats
+
+    sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000.0)
+    sampler.start()
+    try:
+        result = fn(*args)
+    finally:
+        sampler.stop()
+    return result, sampler.samples
+
+
+class ProfileSession:
+    """One profiled request; use as start() / finish()"""
+
+    def __init__(self, store: "ProfileStore", profile_id: str, mode: str, path: str):
+        self.store = store
+        self.profile_id = profile_id
+        self.mode = mode
+        self.path = path
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._worker_profiles: List[Any] = []
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(
+                threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000.0
+            )
+            self._sampler.start()
+
+    def add_worker_profile(self, profile: Any):
+        """Profile returned by run_profiled for one of this request's pool jobs"""
+        self._worker_profiles.append(profile)
+
+    def finish(self, status_code: int):
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        try:
+            if self._profiler:
+                self._profiler.disable()
+                stats = pstats.Stats(self._profiler)
+                for worker_stats in self._worker_profiles:
+                    stats.add(_RawStats(worker_stats))
+                stats.dump_stats(self.store.file_path(self.profile_id, "pstats"))
+            if self._sampler:
+                self._sampler.stop()
+                # Worker stacks are rooted under a synthetic "cpu_pool" frame
+                for samples in self._worker_profiles:
+                    for stack, count in samples.items():
+                        self._sampler.samples[f"cpu_pool;{stack}"] += count
+                with open(self.store.file_path(self.profile_id, "collapsed"), "w", encoding="utf-8") as f:
+                    f.write(self._sampler.collapsed())
+            self.store.write_meta(self.profile_id, {
+                "id": self.profile_id,
+                "mode": self.mode,
+                "path": self.path,
+                "statusCode": status_code,
+                "durationMs": round(duration_ms, 2),
+                "workerJobs": len(self._worker_profiles),
+                "createdAt": datetime.utcnow().isoformat()
+            })
+        finally:
+            self.store.release()
+
+
+class ProfileStore:
+    """
+    Profiles on disk: <id>.json metadata plus <id>.pstats or <id>.collapsed.
+    Only one request is profiled at a time, since cProfile and the sampler
+    both observe the whole event loop thread. A relative directory is taken
+    from the service directory.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        if not os.path.isabs(directory):
+            directory = os.path.join(SERVICE_DIR, directory)
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._busy = threading.Lock()
+
+    def file_path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def begin(self, profile_id: str, mode: str, path: str) -> Optional[ProfileSession]:
+        """Start a session, or None if another request is being profiled"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            session = ProfileSession(self, profile_id, mode, path)
+            session.start()
+        except Exception:
+            # Otherwise no request could be profiled again until restart
+            self._busy.release()
+            raise
+        return session
+
+    def release(self):
+        self._busy.release()
+        self._prune()
+
+    def write_meta(self, profile_id: str, meta: Dict):
+        with open(self.file_path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def list(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+        return sorted(profiles, key=lambda p: p["createdAt"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        path = self.file_path(profile_id, "json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _prune(self):
+        for meta in self.list()[self.max_profiles:]:
+            for ext in ("json", "pstats", "collapsed"):
+                try:
+                    os.remove(self.file_path(meta["id"], ext))
+                except FileNotFoundError:
+                    pass
+
+
+def secret_matches(secret: Optional[str]) -> bool:
+    if not settings.PROFILING_SECRET or secret is None:
+        return False
+    return hmac.compare_digest(secret, settings.PROFILING_SECRET)
+
+
+def requested_mode(secret: Optional[str], mode: Optional[str]) -> Optional[str]:
+    """
+    Profiling mode for a request, or None.
+    Explicit requests need the configured secret; otherwise a random
+    PROFILING_SAMPLE_RATE fraction of traffic is sampled.
+    """
+    if not settings.PROFILING_SECRET:
+        return None
+    if secret is not None:
+        if not secret_matches(secret):
+            return None
+        return mode if mode in MODES else "cprofile"
+    if settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+# Singleton instance
+profile_store = ProfileStore(settings.PROFILES_DIR, settings.PROFILES_MAX_COUNT)
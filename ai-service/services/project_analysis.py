@@ -0,0 +1,94 @@
+"""
+Project Analysis - The full /analyze pipeline for one project
+Rule-engine results from the process pool, AI dependency suggestions, a
+risk history snapshot and the project's portfolio rollup entry. Shared by
+the request handlers and the background risk scheduler.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from models.schemas import ProjectInput, RiskAnalysis, SuggestedDependency, TaskStatus
+from services import engine_jobs
+from services.admission import BACKGROUND, cpu_scheduler
+from services.llm_service import llm_service
+from services.portfolio_rollup import portfolio_rollup
+from services.rate_limiter import Lane
+from services.risk_history import risk_history
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_analysis(
+    project: ProjectInput,
+    lane: Lane = Lane.INTERACTIVE,
+    endpoint: str = "analyze",
+    suggestions: Optional[List[SuggestedDependency]] = None,
+    dedupe_history: bool = False
+) -> RiskAnalysis:
+    """
+    Analyze one project. `suggestions` skips the LLM call when the caller
+    already holds suggestions for unchanged tasks; `dedupe_history` skips
+    the history snapshot when it would repeat the previous one.
+    """
+    # Rule engine work (critical path, risk, alerts, bottlenecks,
+    # resource conflicts) runs in the process pool
+    rules = await cpu_scheduler.run(
+        endpoint, len(project.tasks), engine_jobs.rule_analysis, project,
+        settings.NEAR_CRITICAL_PATHS, settings.NEAR_CRITICAL_FLOAT_DAYS, settings.NEAR_CRITICAL_MAX_TASKS,
+        lane=BACKGROUND if lane == Lane.BACKGROUND else None
+    )
+    critical_path = rules["criticalPath"]
+    risk_score, risk_level = rules["riskScore"], rules["riskLevel"]
+    factors = rules["factors"]
+
+    # AI dependency detection (if tasks exist)
+    suggested_deps = suggestions or []
+    if suggestions is None and len(project.tasks) >= 2:
+        existing_dep_pairs = [
+            f"{d.taskId}->{d.dependsOnTaskId}"
+            for d in project.existingDependencies
+        ]
+        suggested_deps = await llm_service.detect_dependencies(
+            project.tasks,
+            existing_dep_pairs,
+            lane=lane
+        )
+
+    analysis = RiskAnalysis(
+        projectId=project.id,
+        riskScore=risk_score,
+        riskLevel=risk_level,
+        criticalPathIds=critical_path,
+        nearCriticalPaths=rules["nearCriticalPaths"],
+        nearCriticalTasks=rules["nearCriticalTasks"],
+        bottlenecks=rules["bottlenecks"],
+        alerts=rules["alerts"],
+        suggestedDependencies=suggested_deps,
+        resourceConflicts=rules["resourceConflicts"],
+        analyzedAt=datetime.now()
+    )
+
+    # Record snapshot for trend analytics (SQLite write, off the event loop)
+    try:
+        await asyncio.to_thread(
+            risk_history.append,
+            project_id=project.id,
+            analyzed_at=datetime.utcnow(),
+            risk_score=risk_score,
+            risk_level=risk_level,
+            critical_path_length=len(critical_path),
+            total_tasks=len(project.tasks),
+            open_tasks=sum(1 for t in project.tasks if t.status != TaskStatus.DONE),
+            factors=factors,
+            skip_if_unchanged=dedupe_history
+        )
+    except Exception as e:
+        logger.warning(f"Could not record risk history: {e}")
+
+    portfolio_rollup.record(project, risk_score, risk_level, factors)
+
+    return analysis
@@ -0,0 +1,244 @@
+"""
+Project Store - Direct read path for projects via DATABASE_URL
+Loads a project's tasks and dependencies with one set-based query over a
+pooled async connection, so callers can send a project id instead of the
+whole project. Postgres (the Prisma database) goes through asyncpg;
+sqlite:/// URLs use stdlib sqlite3 as a local stand-in with the same tables.
+"""
+
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import asyncpg
+
+from models.schemas import ProjectInput
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Project row, task rows (with assignee name) and dependency rows touching
+# the project's tasks, tagged by `kind`. Columns are positional:
+# kind, id, name/title/taskId, description/dependsOnTaskId, workspaceId/status/type,
+# priority, assigneeId, assigneeName, start_date/due_date, end_date/createdAt
+PROJECT_QUERY = """
+SELECT 'project' AS kind, p.id, p.name, p.description,
+       p."workspaceId" AS status, NULL AS priority, NULL AS assignee_id, NULL AS assignee_name,
+       p.start_date AS first_date, p.end_date AS second_date
+FROM "Project" p
+WHERE p.id = {param}
+UNION ALL
+SELECT 'task', t.id, t.title, t.description,
+       CAST(t.status AS TEXT), CAST(t.priority AS TEXT), t."assigneeId", u.name,
+       t.due_date, t."createdAt"
+FROM "Task" t
+LEFT JOIN "User" u ON u.id = t."assigneeId"
+WHERE t."projectId" = {param}
+UNION ALL
+SELECT 'dependency', d.id, d."taskId", d."dependsOnTaskId",
+       CAST(d.type AS TEXT), NULL, NULL, NULL, NULL, NULL
+FROM "TaskDependency" d
+WHERE d."taskId" IN (SELECT id FROM "Task" WHERE "projectId" = {param})
+   OR d."dependsOnTaskId" IN (SELECT id FROM "Task" WHERE "projectId" = {param})
+"""
+
+# Prisma-only connection string options that asyncpg would reject
+PRISMA_URL_OPTIONS = {"schema", "pgbouncer", "connection_limit", "pool_timeout", "connect_timeout", "socket_timeout"}
+
+
+def decode_datetime(value) -> Optional[datetime]:
+    """
+    Database value -> naive UTC datetime, the engine's representation.
+    Handles native datetimes (asyncpg), ISO strings and epoch milliseconds
+    (Prisma's SQLite encoding).
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value / 1000.0)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class PostgresPool:
+    """asyncpg pool, created on first use"""
+
+    placeholder = "$1"
+
+    def __init__(self, url: str, min_size: int, max_size: int, timeout: float):
+        self.url, self.server_settings = self._split_prisma_options(url)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool: Optional[asyncpg.Pool] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _split_prisma_options(url: str) -> Tuple[str, dict]:
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query)
+        server_settings = {}
+        for key, value in query:
+            if key == "schema":
+                server_settings["search_path"] = value
+        kept = [(k, v) for k, v in query if k not in PRISMA_URL_OPTIONS]
+        return urlunsplit(parts._replace(query=urlencode(kept))), server_settings
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.url,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        command_timeout=self.timeout,
+                        server_settings=self.server_settings or None
+                    )
+                    logger.info(f"🗄️ Postgres pool ready ({self.min_size}-{self.max_size} connections)")
+        return self._pool
+
+    async def fetch(self, query: str, param) -> List[tuple]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            return [tuple(record) for record in await conn.fetch(query, param)]
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class SQLitePool:
+    """Fixed set of sqlite3 connections used from worker threads"""
+
+    placeholder = "?1"
+
+    def __init__(self, path: str, size: int, timeout: float):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._connections: Optional[asyncio.Queue] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+
+    async def fetch(self, query: str, param) -> List[tuple]:
+        if self._connections is None:
+            self._connections = asyncio.Queue()
+            for _ in range(self.size):
+                self._connections.put_nowait(self._connect())
+        conn = await self._connections.get()
+        try:
+            return await asyncio.to_thread(lambda: conn.execute(query, (param,)).fetchall())
+        finally:
+            self._connections.put_nowait(conn)
+
+    async def close(self):
+        if self._connections is not None:
+            while not self._connections.empty():
+                self._connections.get_nowait().close()
+            self._connections = None
+
+
+def create_pool(url: str):
+    """Pool for a postgres:// or sqlite:/// URL"""
+    scheme = urlsplit(url).scheme
+    if scheme in ("postgres", "postgresql"):
+        return PostgresPool(
+            url,
+            settings.DATABASE_POOL_MIN_SIZE,
+            settings.DATABASE_POOL_MAX_SIZE,
+            settings.DATABASE_QUERY_TIMEOUT_SECONDS
+        )
+    if scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLitePool(
+            url[len("sqlite:///"):],
+            settings.DATABASE_POOL_MAX_SIZE,
+            settings.DATABASE_QUERY_TIMEOUT_SECONDS
+        )
+    raise ValueError(f"Unsupported DATABASE_URL scheme: {scheme or '(empty)'}")
+
+
+class ProjectStore:
+    """Reads projects in the shape the analysis endpoints expect"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._pool = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = create_pool(self.url)
+        return self._pool
+
+    async def load_project(self, project_id: str) -> Optional[ProjectInput]:
+        """Project with its tasks and dependencies, or None if it does not exist"""
+        pool = self._get_pool()
+        rows = await pool.fetch(PROJECT_QUERY.format(param=pool.placeholder), project_id)
+        return self._build_project(rows)
+
+    @staticmethod
+    def _build_project(rows: List[tuple]) -> Optional[ProjectInput]:
+        """
+        Rows -> validated ProjectInput, or None without a project row.
+        Raises ValidationError for rows the analysis schema rejects (NULL
+        dates or assignee, unknown enum values), as POST /analyze would.
+        """
+        project = None
+        tasks: List[dict] = []
+        dependencies: List[dict] = []
+
+        for kind, row_id, name, description, status, priority, assignee_id, assignee_name, first, second in rows:
+            if kind == "task":
+                tasks.append({
+                    "id": row_id,
+                    "title": name,
+                    "description": description,
+                    "status": status,
+                    "priority": priority,
+                    "assigneeId": assignee_id,
+                    "assigneeName": assignee_name,
+                    "due_date": decode_datetime(first),
+                    "createdAt": decode_datetime(second)
+                })
+            elif kind == "dependency":
+                dependency = {"id": row_id, "taskId": name, "dependsOnTaskId": description}
+                if status:
+                    dependency["type"] = status
+                dependencies.append(dependency)
+            else:
+                project = {
+                    "id": row_id,
+                    "name": name,
+                    "description": description,
+                    "workspaceId": status,
+                    "start_date": decode_datetime(first),
+                    "end_date": decode_datetime(second)
+                }
+
+        if project is None:
+            return None
+        return ProjectInput.model_validate({**project, "tasks": tasks, "existingDependencies": dependencies})
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+
+
+# Singleton instance
+project_store = ProjectStore(settings.DATABASE_URL)
@@ -0,0 +1,210 @@
+"""
+Rate Limiter - Provider-aware token buckets with priority lanes
+Keeps LLM calls under each provider's requests/min and tokens/min quota.
+Interactive callers are always served before batch and background work,
+and every caller has a queue-time budget instead of waiting indefinitely.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Queue priority; lower value is served first"""
+    INTERACTIVE = 0
+    BATCH = 1
+    BACKGROUND = 2
+
+
+class QueueBudgetExceeded(Exception):
+    """A call could not be admitted within its queue-time budget"""
+
+
+def lane_budget(lane: Lane) -> float:
+    """Default queue-time budget in seconds for a lane"""
+    return {
+        Lane.INTERACTIVE: settings.LLM_QUEUE_BUDGET_INTERACTIVE_SECONDS,
+        Lane.BATCH: settings.LLM_QUEUE_BUDGET_BATCH_SECONDS,
+        Lane.BACKGROUND: settings.LLM_QUEUE_BUDGET_BACKGROUND_SECONDS,
+    }[lane]
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 1024) -> int:
+    """Rough prompt size (~4 chars/token) plus the completion allowance"""
+    return len(prompt) // 4 + max_output_tokens
+
+
+class TokenBucket:
+    """Continuous-refill bucket; `per_minute` <= 0 means unlimited"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if available now)"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # Requests larger than the bucket only need a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+
+    def drain(self, now: float):
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderLimiter:
+    """
+    Requests/min and tokens/min buckets for one provider with a priority
+    queue of waiters. A single pump task admits waiters in lane order.
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queue: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        return max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    def _grant(self, tokens: int, now: float):
+        self.requests.consume(1, now)
+        self.tokens.consume(tokens, now)
+
+    async def acquire(self, tokens: int, lane: Lane, budget: float):
+        """Wait for quota; raises QueueBudgetExceeded after `budget` seconds"""
+        now = time.monotonic()
+        if not self._queue and self._wait_time(tokens, now) == 0:
+            self._grant(tokens, now)
+            return
+
+        if budget <= 0:
+            raise QueueBudgetExceeded(f"{self.name} quota exhausted")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(lane), next(self._counter), tokens, future))
+        self._ensure_pump()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()  # the pump skips cancelled waiters
+                raise QueueBudgetExceeded(
+                    f"{self.name} queue wait exceeded {budget:.1f}s ({lane.name.lower()} lane)"
+                )
+        except asyncio.CancelledError:
+            # The caller went away (e.g. client disconnect); without this the
+            # shielded future stays pending and the pump would spend quota on it
+            future.cancel()
+            raise
+
+    def penalize(self, retry_after: float = 0.0):
+        """Provider returned 429: treat both buckets as empty for a while"""
+        now = time.monotonic()
+        self.requests.drain(now)
+        self.tokens.drain(now)
+        if retry_after > 0 and not self.requests.unlimited:
+            self.requests.tokens -= retry_after * self.requests.rate
+        logger.warning(f"⏳ {self.name} limiter backing off")
+
+    def _ensure_pump(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.get_running_loop().create_task(self._run_pump())
+
+    async def _run_pump(self):
+        while self._queue:
+            lane, _, tokens, future = self._queue[0]
+            if future.done():  # cancelled or timed out while queued
+                heapq.heappop(self._queue)
+                continue
+
+            now = time.monotonic()
+            delay = self._wait_time(tokens, now)
+            if delay == 0:
+                heapq.heappop(self._queue)
+                self._grant(tokens, now)
+                future.set_result(None)
+                continue
+
+            # Sleep until quota refills, or until a new (maybe higher-priority) waiter arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        self.requests.wait_time(0, now)  # refill before reporting
+        self.tokens.wait_time(0, now)
+        waiting = [entry for entry in self._queue if not entry[3].done()]
+        return {
+            "requestsAvailable": None if self.requests.unlimited else round(self.requests.tokens, 2),
+            "tokensAvailable": None if self.tokens.unlimited else round(self.tokens.tokens),
+            "queued": {lane.name.lower(): sum(1 for e in waiting if e[0] == lane) for lane in Lane},
+        }
+
+
+class RateLimiterRegistry:
+    """One limiter per provider name, configured from settings"""
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def _quota(self, name: str) -> Tuple[float, float]:
+        base = name.split(":")[-1]
+        if base == "groq":
+            return settings.GROQ_RPM, settings.GROQ_TPM
+        if base == "gemini":
+            return settings.GEMINI_RPM, settings.GEMINI_TPM
+        return settings.MOCK_LLM_RPM, settings.MOCK_LLM_TPM
+
+    def for_provider(self, name: str) -> ProviderLimiter:
+        if name not in self._limiters:
+            rpm, tpm = self._quota(name)
+            self._limiters[name] = ProviderLimiter(name, rpm, tpm)
+        return self._limiters[name]
+
+    def stats(self) -> Dict:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+# Singleton instance
+rate_limiter = RateLimiterRegistry()
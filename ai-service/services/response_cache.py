@@ -0,0 +1,131 @@
+"""
+Response Cache - Fingerprinted, single-flight caching for analysis endpoints
+Identical payloads within the same day bucket share one computation.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import settings
+from services.rule_engine import now_utc
+
+
+def fingerprint(endpoint: str, payload: BaseModel) -> str:
+    """
+    Canonical hash of a request payload.
+    Includes the UTC day because overdue/at-risk rules depend on now_utc().
+    """
+    canonical = json.dumps(
+        payload.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha256()
+    digest.update(endpoint.encode())
+    digest.update(now_utc().date().isoformat().encode())
+    digest.update(canonical.encode())
+    return digest.hexdigest()[:32]
+
+
+def make_etag(key: str) -> str:
+    """Weak validator: equal inputs give semantically equivalent analyses"""
+    return f'W/"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache with single-flight coalescing.
+    Concurrent callers with the same key await the first caller's result.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True
+    ) -> Tuple[Any, str]:
+        """
+        Returns (value, source) where source is "HIT", "COALESCED" or "MISS".
+        The computation runs as its own task and every caller awaits it
+        shielded, so a cancelled caller (client disconnect) never cancels
+        it for the others.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, "HIT"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), "COALESCED"
+
+        task = asyncio.get_running_loop().create_task(self._compute(key, compute, cacheable))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), "MISS"
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool]) -> Any:
+        value = await compute()
+        if cacheable(value):
+            self.put(key, value)
+        return value
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller was cancelled
+
+
+# Singleton instance
+response_cache = ResponseCache(
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,280 @@
+"""
+Risk History - Append-only time series of risk analysis snapshots
+Backed by a local SQLite file so trends can be served without recomputing.
+The file is opened on first use (or in the app lifespan), relative paths
+resolve against the service directory, and rows older than
+RISK_HISTORY_RETENTION_DAYS are pruned as new ones arrive.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+
+from config import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS risk_snapshots (
+    project_id TEXT NOT NULL,
+    analyzed_at REAL NOT NULL,
+    risk_score INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    critical_path_length INTEGER NOT NULL,
+    total_tasks INTEGER NOT NULL,
+    open_tasks INTEGER NOT NULL,
+    factors TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_risk_snapshots_project_time
+    ON risk_snapshots (project_id, analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_risk_snapshots_time
+    ON risk_snapshots (analyzed_at);
+"""
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+
+def to_epoch(dt: datetime) -> float:
+    """Seconds since epoch, treating naive datetimes as UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def from_epoch(ts: float) -> datetime:
+    """Naive UTC datetime, matching the rule engine's convention"""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+def compact_factors(factors: Dict) -> Dict:
+    """Risk factors without their task id lists: count (or maxDepth) and penalty"""
+    return {
+        name: {key: value for key, value in factor.items() if not isinstance(value, list)}
+        for name, factor in factors.items()
+    }
+
+
+def _slope_per_day(points: List[Dict], key: str) -> float:
+    """Least-squares slope of `key` over time, in units per day"""
+    if len(points) < 2:
+        return 0.0
+    xs = [p["ts"] / 86400.0 for p in points]
+    ys = [p[key] for p in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return cov / var_x
+
+
+class RiskHistoryStore:
+    """
+    Append-only store of per-project risk snapshots.
+    Rows are only inserted (and pruned past retention); reads aggregate in
+    SQL by time bucket. Methods block, so async callers use asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, retention_days: float = 0):
+        if path != ":memory:" and not os.path.isabs(path):
+            path = os.path.join(SERVICE_DIR, path)
+        self.path = path
+        self.retention_days = retention_days
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+
+    def open(self):
+        """Create the file and schema; called from the app lifespan, or on first use"""
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Delete snapshots older than the retention window; returns rows removed"""
+        if self.retention_days <= 0:
+            return 0
+        now = now or datetime.utcnow()
+        cutoff = to_epoch(now) - self.retention_days * 86400
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute(
+                "DELETE FROM risk_snapshots WHERE analyzed_at < ?", (cutoff,)
+            ).rowcount
+            conn.commit()
+            self._pruned_at = time.monotonic()
+        return removed
+
+    def append(
+        self,
+        project_id: str,
+        analyzed_at: datetime,
+        risk_score: int,
+        risk_level: str,
+        critical_path_length: int,
+        total_tasks: int,
+        open_tasks: int,
+        factors: Dict,
+        skip_if_unchanged: bool = False
+    ) -> bool:
+        """
+        Record one analysis snapshot (factors are stored compacted). With
+        skip_if_unchanged, a snapshot equal to the project's latest one is
+        not stored. Returns whether a row was written.
+        """
+        values = (risk_score, risk_level, critical_path_length, total_tasks, open_tasks)
+        with self._lock:
+            conn = self._connect()
+            if skip_if_unchanged:
+                latest = conn.execute(
+                    """
+                    SELECT risk_score, risk_level, critical_path_length, total_tasks, open_tasks
+                    FROM risk_snapshots WHERE project_id = ?
+                    ORDER BY analyzed_at DESC LIMIT 1
+                    """,
+                    (project_id,)
+                ).fetchone()
+                if latest is not None and tuple(latest) == values:
+                    return False
+            conn.execute(
+                "INSERT INTO risk_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    project_id, to_epoch(analyzed_at), risk_score, risk_level,
+                    critical_path_length, total_tasks, open_tasks,
+                    json.dumps(compact_factors(factors), default=str)
+                )
+            )
+            conn.commit()
+            prune_due = time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS
+        if prune_due:
+            self.prune()
+        return True
+
+    def history(
+        self,
+        project_id: str,
+        since: datetime,
+        until: datetime,
+        bucket_seconds: int
+    ) -> List[Dict]:
+        """Snapshots downsampled into fixed-width time buckets"""
+        with self._lock:
+            rows = self._connect().execute(
+                """
+                SELECT CAST(analyzed_at / ? AS INTEGER) AS bucket,
+                       AVG(risk_score), MIN(risk_score), MAX(risk_score),
+                       AVG(critical_path_length), AVG(open_tasks), COUNT(*)
+                FROM risk_snapshots
+                WHERE project_id = ? AND analyzed_at >= ? AND analyzed_at < ?
+                GROUP BY bucket
+                ORDER BY bucket
+                """,
+                (bucket_seconds, project_id, to_epoch(since), to_epoch(until))
+            ).fetchall()
+
+        return [
+            {
+                "ts": bucket * bucket_seconds,
+                "riskScore": avg_score,
+                "minRiskScore": min_score,
+                "maxRiskScore": max_score,
+                "criticalPathLength": avg_path,
+                "openTasks": avg_open,
+                "samples": samples
+            }
+            for bucket, avg_score, min_score, max_score, avg_path, avg_open, samples in rows
+        ]
+
+    def latest(self, project_id: str) -> Optional[Dict]:
+        """Most recent snapshot for a project"""
+        with self._lock:
+            row = self._connect().execute(
+                """
+                SELECT analyzed_at, risk_score, risk_level, critical_path_length,
+                       total_tasks, open_tasks, factors
+                FROM risk_snapshots
+                WHERE project_id = ?
+                ORDER BY analyzed_at DESC
+                LIMIT 1
+                """,
+                (project_id,)
+            ).fetchone()
+
+        if not row:
+            return None
+        analyzed_at, score, level, path_length, total, open_tasks, factors = row
+        return {
+            "analyzedAt": from_epoch(analyzed_at),
+            "riskScore": score,
+            "riskLevel": level,
+            "criticalPathLength": path_length,
+            "totalTasks": total,
+            "openTasks": open_tasks,
+            "factors": json.loads(factors)
+        }
+
+    def trend(
+        self,
+        project_id: str,
+        since: datetime,
+        until: datetime,
+        bucket_seconds: int,
+        window: int
+    ) -> Dict:
+        """
+        Rolling average of the downsampled score plus velocities:
+        riskVelocity = score points per day, burnDownVelocity = open tasks
+        closed per day (positive means the backlog is shrinking).
+        """
+        points = self.history(project_id, since, until, bucket_seconds)
+
+        rolling = []
+        running = 0.0
+        for i, point in enumerate(points):
+            running += point["riskScore"]
+            if i >= window:
+                running -= points[i - window]["riskScore"]
+            rolling.append({
+                "ts": point["ts"],
+                "value": running / min(i + 1, window)
+            })
+
+        burn_down = -_slope_per_day(points, "openTasks")
+        projected_days = None
+        if points and burn_down > 0:
+            projected_days = points[-1]["openTasks"] / burn_down
+
+        return {
+            "points": points,
+            "rolling": rolling,
+            "riskVelocity": _slope_per_day(points, "riskScore"),
+            "burnDownVelocity": burn_down,
+            "projectedCompletionDays": projected_days
+        }
+
+
+# Singleton instance
+risk_history = RiskHistoryStore(settings.RISK_HISTORY_PATH, settings.RISK_HISTORY_RETENTION_DAYS)
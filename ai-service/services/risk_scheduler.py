@@ -0,0 +1,283 @@
+"""
+Risk Scheduler - Background re-analysis of watched projects
+Projects are watched through PUT /watch (or, with RISK_SCHEDULER_AUTO_WATCH
+and a database, whenever they are analyzed). A loop started from the app
+lifespan re-analyzes them on a staggered, jittered interval with bounded
+concurrency in the niced background CPU pool, keeps the latest
+RiskAnalysis warm (and in the response cache), and sends risk alert emails
+when a project's score crosses RISK_ALERT_THRESHOLD. Refreshes that change
+nothing add no risk history rows. Without a database the scheduler only has
+the snapshot a request sent, so it re-analyzes each snapshot once (to catch
+tasks becoming overdue) and then waits for a newer one.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from models.schemas import AnalyzeResponse, ProjectInput, RiskAnalysis, SuggestedDependency
+from services.admission import Overloaded
+from services.project_analysis import run_analysis
+from services.project_store import project_store
+from services.rate_limiter import Lane
+from services.response_cache import response_cache, fingerprint
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def suggestion_key(project: ProjectInput) -> str:
+    """Hash of everything the LLM sees; unchanged key -> reuse suggestions"""
+    digest = hashlib.sha256()
+    for task in sorted(project.tasks, key=lambda t: t.id):
+        digest.update(f"{task.id}\x00{task.title}\x00{task.description or ''}\x01".encode())
+    for dep in sorted(f"{d.taskId}->{d.dependsOnTaskId}" for d in project.existingDependencies):
+        digest.update(dep.encode())
+    return digest.hexdigest()
+
+
+class WatchedProject:
+    """Scheduling state for one active project"""
+
+    def __init__(self, project_id: str, next_run: float):
+        self.project_id = project_id
+        self.project: Optional[ProjectInput] = None  # last snapshot when there is no DATABASE_URL
+        self.snapshot_refreshed = False  # the snapshot has had its one background refresh
+        self.next_run = next_run
+        self.last_seen = time.monotonic()
+        self.analysis: Optional[RiskAnalysis] = None
+        self.suggestions: Optional[List[SuggestedDependency]] = None
+        self.suggestion_key: Optional[str] = None
+        self.failures = 0
+        self.running = False
+
+
+class RiskScheduler:
+    """In-process scheduler; one loop task, at most `concurrency` refreshes at once"""
+
+    def __init__(
+        self,
+        interval: float,
+        jitter: float,
+        concurrency: int,
+        max_projects: int,
+        idle_ttl: float,
+        auto_watch: bool = False
+    ):
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.max_projects = max_projects
+        self.idle_ttl = idle_ttl
+        self.auto_watch = auto_watch
+        self._projects: Dict[str, WatchedProject] = {}
+        # Last side of the alert threshold per project, watched or not (LRU-bounded)
+        self._below_threshold: "OrderedDict[str, bool]" = OrderedDict()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # ---- registration ----
+
+    def _stagger(self, project_id: str) -> float:
+        """Deterministic first-run offset so newly watched projects don't refresh together"""
+        return (zlib.crc32(project_id.encode()) / 2 ** 32) * min(self.interval, 60.0)
+
+    def _next_delay(self, failures: int = 0) -> float:
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay * min(2 ** failures, 8)
+
+    def register(self, project_id: str, project: Optional[ProjectInput] = None) -> WatchedProject:
+        """Watch a project (or refresh its snapshot and last-seen time)"""
+        watched = self._projects.get(project_id)
+        if watched is None:
+            watched = WatchedProject(project_id, time.monotonic() + self._stagger(project_id))
+            self._projects[project_id] = watched
+            self._evict()
+            if self._wakeup:
+                self._wakeup.set()
+        watched.last_seen = time.monotonic()
+        if project is not None and not project_store.enabled:
+            watched.project = project
+            watched.snapshot_refreshed = False
+        return watched
+
+    def unregister(self, project_id: str) -> bool:
+        return self._projects.pop(project_id, None) is not None
+
+    def _evict(self):
+        now = time.monotonic()
+        for project_id in [p for p, w in self._projects.items() if now - w.last_seen > self.idle_ttl]:
+            del self._projects[project_id]
+        if len(self._projects) > self.max_projects:
+            by_age = sorted(self._projects.values(), key=lambda w: w.last_seen)
+            for watched in by_age[:len(self._projects) - self.max_projects]:
+                del self._projects[watched.project_id]
+
+    def latest(self, project_id: str) -> Optional[RiskAnalysis]:
+        """Warm analysis for a watched project, if one has been computed"""
+        watched = self._projects.get(project_id)
+        if watched is None:
+            return None
+        watched.last_seen = time.monotonic()
+        return watched.analysis
+
+    # ---- results and alerts ----
+
+    def observe(self, project: ProjectInput, analysis: RiskAnalysis):
+        """
+        Record a fresh analysis from a request or a background refresh.
+        Unwatched projects are only watched from here with auto-watch on
+        (and a database to reload them from). Alerts fire when the score
+        drops below the threshold, not on every analysis already below it.
+        """
+        watched = self._projects.get(project.id)
+        if watched is None and self.auto_watch and project_store.enabled:
+            watched = self.register(project.id)
+        if watched is not None:
+            if not watched.running:
+                # Fresh result from a request: counts as activity, and no
+                # need to refresh it right away. Refreshes themselves don't
+                # keep a project alive past the idle TTL.
+                self.register(project.id, project)
+                watched.next_run = time.monotonic() + self._next_delay()
+            watched.analysis = analysis
+            watched.suggestions = analysis.suggestedDependencies
+            watched.suggestion_key = suggestion_key(project)
+
+        below = analysis.riskScore < settings.RISK_ALERT_THRESHOLD
+        if below and self._below_threshold.get(project.id) is not True:
+            self._spawn(send_risk_alert(project.id, project.name, analysis.riskScore, analysis.riskLevel))
+        self._below_threshold[project.id] = below
+        self._below_threshold.move_to_end(project.id)
+        while len(self._below_threshold) > self.max_projects:
+            self._below_threshold.popitem(last=False)
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    # ---- loop ----
+
+    async def start(self):
+        if self._loop_task is None:
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop_task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"⏱️ Risk scheduler started (every ~{self.interval:.0f}s, {self.concurrency} at a time)")
+
+    async def stop(self):
+        tasks = list(self._background)
+        if self._loop_task:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            self._evict()
+            for watched in self._projects.values():
+                if not watched.running and watched.next_run <= now:
+                    watched.running = True
+                    self._spawn(self._refresh(watched))
+
+            pending = [w.next_run for w in self._projects.values() if not w.running]
+            sleep_for = min(pending) - now if pending else self.interval
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(max(sleep_for, 0.5), self.interval))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, watched: WatchedProject):
+        try:
+            async with self._slots:
+                if project_store.enabled:
+                    project = await project_store.load_project(watched.project_id)
+                    if project is None:
+                        self.unregister(watched.project_id)
+                        return
+                else:
+                    # Re-analyzing an unchanged snapshot again would only repeat the last result
+                    if watched.snapshot_refreshed:
+                        return
+                    project = watched.project
+                if project is None:
+                    return
+
+                reuse = watched.suggestions if watched.suggestion_key == suggestion_key(project) else None
+                analysis = await run_analysis(
+                    project, Lane.BACKGROUND, "scheduler",
+                    suggestions=reuse, dedupe_history=True
+                )
+                self.observe(project, analysis)
+                response_cache.put(
+                    fingerprint("analyze", project),
+                    AnalyzeResponse(success=True, analysis=analysis)
+                )
+                watched.failures = 0
+                if not project_store.enabled:
+                    watched.snapshot_refreshed = True
+        except Overloaded as e:
+            logger.info(f"Risk refresh for {watched.project_id} deferred: {e}")
+        except Exception as e:
+            watched.failures += 1
+            logger.warning(f"Risk refresh for {watched.project_id} failed: {e}")
+        finally:
+            watched.running = False
+            watched.next_run = time.monotonic() + self._next_delay(watched.failures)
+
+    def stats(self) -> Dict:
+        return {
+            "watched": len(self._projects),
+            "running": sum(1 for w in self._projects.values() if w.running),
+            "warm": sum(1 for w in self._projects.values() if w.analysis is not None),
+            "failing": sum(1 for w in self._projects.values() if w.failures)
+        }
+
+
+async def send_risk_alert(project_id: str, project_name: str, risk_score: int, risk_level: str):
+    """
+    Send email alert via Node.js backend when risk is critical.
+    """
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{settings.NODE_API_URL}/api/internal/risk-alert",
+                json={
+                    "projectId": project_id,
+                    "projectName": project_name,
+                    "riskScore": risk_score,
+                    "riskLevel": risk_level
+                },
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                logger.info(f"📧 Risk alert sent for project {project_name}")
+            else:
+                logger.warning(f"Failed to send risk alert: {response.status_code}")
+    except Exception as e:
+        logger.warning(f"Could not send risk alert: {e}")
+
+
+# Singleton instance
+risk_scheduler = RiskScheduler(
+    interval=settings.RISK_SCHEDULER_INTERVAL_SECONDS,
+    jitter=settings.RISK_SCHEDULER_JITTER,
+    concurrency=settings.RISK_SCHEDULER_CONCURRENCY,
+    max_projects=settings.RISK_SCHEDULER_MAX_PROJECTS,
+    idle_ttl=settings.RISK_SCHEDULER_IDLE_TTL_SECONDS,
+    auto_watch=settings.RISK_SCHEDULER_AUTO_WATCH
+)
@@ -4,12 +4,12 @@ Contains deterministic algorithms for project analysis
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Optional
 from collections import defaultdict
 
 from models.schemas import (
     TaskInput, DependencyInput, Bottleneck, Alert, 
-    ResourceConflict, DependencyType, TaskStatus
+    ResourceConflict, DependencyType, TaskStatus, TaskFloat
 )
 
 
@@ -23,6 +23,17 @@ def normalize_datetime(dt: datetime) -> datetime:
     return dt
 
 
+def risk_level(score: int) -> str:
+    """Risk level for a 0-100 health score"""
+    if score >= 80:
+        return "low"
+    elif score >= 60:
+        return "medium"
+    elif score >= 40:
+        return "high"
+    return "critical"
+
+
 def now_utc() -> datetime:
     """Get current time as naive UTC datetime"""
     return datetime.utcnow()
@@ -38,6 +49,12 @@ class RuleEngine:
         self.tasks = {t.id: t for t in tasks}
         self.dependencies = dependencies
         self._build_dependency_graph()
+        # Lazily computed per-task results, reused across rules and overlays
+        self._depths: Optional[Dict[str, int]] = None
+        self._conflicts_by_user: Optional[Dict[str, ResourceConflict]] = None
+        self._rule_results: Dict[str, List[str]] = {}
+        self._workload = None
+        self._paths = None
     
     def _build_dependency_graph(self):
         """Build adjacency lists for dependency traversal"""
@@ -50,146 +67,116 @@ class RuleEngine:
             self.depends_on[dep.taskId].append(dep.dependsOnTaskId)
             self.dependents[dep.dependsOnTaskId].append(dep.taskId)
     
+    def earliest_finish_map(self) -> Dict[str, int]:
+        """
+        Forward pass of CPM over task durations: earliest finish per task,
+        in days from project start (cached with the path schedule).
+        """
+        return self.path_schedule().earliest_finish
+    
     def calculate_critical_path(self) -> Tuple[List[str], int]:
         """
-        Calculate the critical path using CPM.
+        Calculate the critical path using CPM: the longest chain over task
+        durations, from the same schedule that gives float and the
+        near-critical paths.
         Returns: (list of task IDs in critical path, total duration in days)
         """
         if not self.tasks:
             return [], 0
         
-        # For simplicity, use due_date based path finding
-        # In real CPM, we'd use task duration estimates
-        
-        # Find tasks with no dependencies (start tasks)
-        start_tasks = [
-            t_id for t_id in self.tasks 
-            if not self.depends_on.get(t_id)
-        ]
-        
-        if not start_tasks:
-            # All tasks have dependencies - find earliest due date
-            start_tasks = [min(self.tasks.keys(), key=lambda x: normalize_datetime(self.tasks[x].due_date))]
-        
-        # Calculate earliest finish times (forward pass)
-        earliest_finish: Dict[str, datetime] = {}
-        
-        def get_earliest_finish(task_id: str, visited: Set[str] = None) -> datetime:
-            if visited is None:
-                visited = set()
-            
-            if task_id in visited:
-                return earliest_finish.get(task_id, normalize_datetime(self.tasks[task_id].due_date))
-            visited.add(task_id)
-            
-            if task_id in earliest_finish:
-                return earliest_finish[task_id]
-            
-            task = self.tasks.get(task_id)
-            if not task:
-                return now_utc()
-            
-            task_due = normalize_datetime(task.due_date)
-            
-            deps = self.depends_on.get(task_id, [])
-            if not deps:
-                earliest_finish[task_id] = task_due
-            else:
-                # Earliest finish is max of all dependency finishes
-                dep_finishes = [get_earliest_finish(d, visited.copy()) for d in deps if d in self.tasks]
-                if dep_finishes:
-                    earliest_finish[task_id] = max(dep_finishes + [task_due])
-                else:
-                    earliest_finish[task_id] = task_due
-            
-            return earliest_finish[task_id]
-        
-        # Calculate for all tasks
-        for task_id in self.tasks:
-            get_earliest_finish(task_id)
-        
-        # Find the longest path (critical path)
-        if not earliest_finish:
-            return list(self.tasks.keys())[:1], 0
-        
-        # End task is the one with latest finish
-        end_task = max(earliest_finish.keys(), key=lambda x: earliest_finish[x])
-        
-        # Trace back to find critical path
-        critical_path = []
-        current = end_task
-        visited = set()
-        
-        while current and current not in visited:
-            visited.add(current)
-            critical_path.append(current)
-            deps = self.depends_on.get(current, [])
-            if deps:
-                # Follow the dependency with latest finish time
-                valid_deps = [d for d in deps if d in earliest_finish]
-                if valid_deps:
-                    current = max(valid_deps, key=lambda x: earliest_finish[x])
-                else:
-                    break
-            else:
-                break
-        
-        critical_path.reverse()
-        
-        # Calculate total duration
-        if critical_path:
-            first_task = self.tasks.get(critical_path[0])
-            last_task = self.tasks.get(critical_path[-1])
-            if first_task and last_task:
-                last_due = normalize_datetime(last_task.due_date)
-                first_created = normalize_datetime(first_task.createdAt)
-                total_days = (last_due - first_created).days
-                return critical_path, max(0, total_days)
-        
-        return critical_path, 0
+        paths = self.path_schedule().longest_paths(1)
+        if not paths:
+            return [], 0
+        critical_path, total_days = paths[0]
+        return critical_path, total_days
+    
+    def calendar_span(self, path: List[str]) -> int:
+        """
+        Calendar days a chain covers: last task's due date minus the first
+        task's createdAt. Unlike the summed duration this counts overlapping
+        task spans only once.
+        """
+        if not path:
+            return 0
+        first_created = normalize_datetime(self.tasks[path[0]].createdAt)
+        last_due = normalize_datetime(self.tasks[path[-1]].due_date)
+        return max(0, (last_due - first_created).days)
     
     def detect_resource_conflicts(self) -> List[ResourceConflict]:
         """
         Find users with overlapping task assignments.
         Conflict = same user has multiple tasks with overlapping date ranges.
         """
-        conflicts = []
-        
-        # Group tasks by assignee
-        user_tasks: Dict[str, List[TaskInput]] = defaultdict(list)
-        for task in self.tasks.values():
-            if task.status != TaskStatus.DONE:
-                user_tasks[task.assigneeId].append(task)
-        
-        # Check for overlaps per user
-        for user_id, tasks in user_tasks.items():
-            if len(tasks) < 2:
-                continue
-            
-            # Sort by due date
-            sorted_tasks = sorted(tasks, key=lambda t: normalize_datetime(t.due_date))
-            
-            # Simple overlap detection: if more than 3 tasks in same week
-            overlapping_tasks = []
-            for i, task in enumerate(sorted_tasks):
-                task_due = normalize_datetime(task.due_date)
-                week_tasks = [t for t in sorted_tasks 
-                             if abs((normalize_datetime(t.due_date) - task_due).days) <= 7]
-                if len(week_tasks) >= 3 and task.id not in overlapping_tasks:
-                    overlapping_tasks.extend([t.id for t in week_tasks])
-            
-            if len(set(overlapping_tasks)) >= 3:
-                conflicts.append(ResourceConflict(
-                    userId=user_id,
-                    userName=sorted_tasks[0].assigneeName,
-                    taskIds=list(set(overlapping_tasks)),
-                    overlapDays=7
-                ))
-        
+        return list(self.conflicts_by_user().values())
+    
+    def workload_index(self):
+        """Per-assignee workload index over open tasks (cached)"""
+        if self._workload is None:
+            # Imported here: workload_index depends on this module's helpers
+            from services.workload_index import WorkloadIndex
+            self._workload = WorkloadIndex(list(self.tasks.values()))
+        return self._workload
+    
+    def path_schedule(self):
+        """Duration-based CPM: task float and the k longest chains (cached)"""
+        if self._paths is None:
+            # Imported here: near_critical depends on this module's helpers
+            from services.near_critical import PathSchedule
+            self._paths = PathSchedule(self.tasks, self.depends_on, self.dependents)
+        return self._paths
+    
+    def conflicts_by_user(self) -> Dict[str, ResourceConflict]:
+        """Resource conflicts keyed by assignee (cached)"""
+        if self._conflicts_by_user is not None:
+            return self._conflicts_by_user
+        
+        conflicts: Dict[str, ResourceConflict] = {}
+        for user_id, workload in self.workload_index().users.items():
+            conflict = self._detect_user_conflict(workload)
+            if conflict:
+                conflicts[user_id] = conflict
+        
+        self._conflicts_by_user = conflicts
         return conflicts
     
+    def _detect_user_conflict(self, workload) -> Optional[ResourceConflict]:
+        """Check one assignee's open tasks for overlaps"""
+        sorted_tasks = workload.tasks_by_due
+        if len(sorted_tasks) < 2:
+            return None
+        
+        # Simple overlap detection: if more than 3 tasks in same week.
+        # "Same week" means abs(timedelta.days) <= 7, i.e. due - 7d <= other < due + 8d
+        overlapping_tasks = []
+        seen = set()
+        for task_due, task in zip(workload.due_times, sorted_tasks):
+            week_tasks = workload.tasks_due_between(
+                task_due - timedelta(days=7), task_due + timedelta(days=8)
+            )
+            if len(week_tasks) >= 3 and task.id not in seen:
+                overlapping_tasks.extend([t.id for t in week_tasks])
+                seen.update(t.id for t in week_tasks)
+        
+        if len(set(overlapping_tasks)) >= 3:
+            return ResourceConflict(
+                userId=workload.user_id,
+                userName=sorted_tasks[0].assigneeName,
+                taskIds=list(set(overlapping_tasks)),
+                overlapDays=7
+            )
+        return None
+    
+    def _memoized(self, key: str, compute) -> List[str]:
+        """Cache per-task rule results for the lifetime of this engine"""
+        if key not in self._rule_results:
+            self._rule_results[key] = compute()
+        return list(self._rule_results[key])
+    
     def detect_blocked_tasks(self) -> List[str]:
         """Find tasks blocked by incomplete dependencies"""
+        return self._memoized('blocked', self._find_blocked_tasks)
+    
+    def _find_blocked_tasks(self) -> List[str]:
         blocked = []
         
         for task_id, deps in self.depends_on.items():
@@ -207,6 +194,9 @@ class RuleEngine:
     
     def detect_overdue_tasks(self) -> List[str]:
         """Find tasks past their due date"""
+        return self._memoized('overdue', self._find_overdue_tasks)
+    
+    def _find_overdue_tasks(self) -> List[str]:
         now = now_utc()
         overdue = []
         
@@ -278,23 +268,21 @@ class RuleEngine:
         # Ensure score is within bounds
         score = max(0, min(100, score))
         
-        # Determine risk level
-        if score >= 80:
-            level = "low"
-        elif score >= 60:
-            level = "medium"
-        elif score >= 40:
-            level = "high"
-        else:
-            level = "critical"
-        
-        return score, level, factors
+        return score, risk_level(score), factors
     
     def _calculate_max_depth(self) -> int:
         """Calculate maximum dependency chain depth"""
         if not self.dependencies:
             return 0
         
+        depths = self.depth_map()
+        return max(depths.values()) if depths else 0
+    
+    def depth_map(self) -> Dict[str, int]:
+        """Dependency chain depth per task (cached)"""
+        if self._depths is not None:
+            return self._depths
+        
         depths: Dict[str, int] = {}
         
         def get_depth(task_id: str, visited: Set[str] = None) -> int:
@@ -322,12 +310,16 @@ class RuleEngine:
         for task_id in self.tasks:
             get_depth(task_id)
         
-        return max(depths.values()) if depths else 0
+        self._depths = depths
+        return depths
     
     def _detect_at_risk_tasks(self) -> List[str]:
         """
         Find tasks due within 3 days that are still TODO.
         """
+        return self._memoized('at_risk', self._find_at_risk_tasks)
+    
+    def _find_at_risk_tasks(self) -> List[str]:
         now = now_utc()
         at_risk = []
         
@@ -388,11 +380,19 @@ class RuleEngine:
         
         return alerts
     
-    def generate_bottlenecks(self, critical_path: List[str]) -> List[Bottleneck]:
-        """Identify bottleneck tasks on critical path"""
+    def generate_bottlenecks(
+        self, critical_path: List[str], near_critical: Optional[List[TaskFloat]] = None
+    ) -> List[Bottleneck]:
+        """
+        Identify bottleneck tasks on the critical path and, when given,
+        near-critical tasks. With near-critical tasks, bottlenecks on more
+        of the longest chains and with less float rank first.
+        """
         bottlenecks = []
+        floats = {t.taskId: t for t in near_critical or []}
+        on_critical_path = set(critical_path)
         
-        for task_id in critical_path:
+        for task_id in dict.fromkeys(critical_path + list(floats)):
             task = self.tasks.get(task_id)
             if not task:
                 continue
@@ -409,11 +409,21 @@ class RuleEngine:
                         reason = f"Overdue by {abs(days_until_due)} days, blocking {dependent_count} tasks"
                         delay_impact = abs(days_until_due)
                     elif dependent_count >= 2:
-                        reason = f"Critical path task blocking {dependent_count} downstream tasks"
+                        if task_id in on_critical_path:
+                            reason = f"Critical path task blocking {dependent_count} downstream tasks"
+                        elif floats[task_id].floatDays == 0:
+                            reason = f"Zero-float task (ties the critical path) blocking {dependent_count} downstream tasks"
+                        else:
+                            reason = (f"Near-critical task ({floats[task_id].floatDays} days float) "
+                                      f"blocking {dependent_count} downstream tasks")
                         delay_impact = max(1, 7 - days_until_due)
                     else:
                         continue
                     
+                    path_count = floats[task_id].pathCount if task_id in floats else 0
+                    if path_count > 1:
+                        reason += f", on {path_count} of the longest chains"
+                    
                     bottlenecks.append(Bottleneck(
                         taskId=task_id,
                         taskTitle=task.title,
@@ -421,4 +431,14 @@ class RuleEngine:
                         reason=reason
                     ))
         
+        if floats:
+            def rank(bottleneck: Bottleneck):
+                near = floats.get(bottleneck.taskId)
+                return (
+                    -(near.pathCount if near else 0),
+                    near.floatDays if near else 0,
+                    -bottleneck.delayImpactDays
+                )
+            bottlenecks.sort(key=rank)
+        
         return bottlenecks[:5]  # Top 5 bottlenecks
@@ -0,0 +1,304 @@
+"""
+Scenario Engine - What-if simulation on top of a base RuleEngine
+Scenarios are copy-on-write overlays: only changed tasks/edges are stored,
+and only the downstream region they touch is recomputed. Edits that would
+close a dependency cycle are rejected; a base project that already has
+cycles is rescheduled in full, so it drops the same edges a fresh
+RuleEngine would.
+"""
+
+from collections import ChainMap
+from datetime import timedelta
+from typing import List, Dict, Set, Optional, Tuple
+
+from models.schemas import (
+    TaskInput, ResourceConflict, TaskStatus, WhatIfChange, WhatIfChangeType
+)
+from services.near_critical import duration_days
+from services.rule_engine import RuleEngine, normalize_datetime, now_utc
+from services.workload_index import UserWorkload
+
+
+class DependencyCycleError(ValueError):
+    """A what-if edit would make a task depend on itself"""
+
+
+class ScenarioEngine(RuleEngine):
+    """
+    A RuleEngine view that shares all unchanged state with a base engine.
+    Writes go to a private overlay layer, so the base is never mutated and
+    many scenarios can be evaluated against one base.
+    """
+
+    def __init__(self, base: RuleEngine, changes: List[WhatIfChange]):
+        # Intentionally not calling RuleEngine.__init__: no graph rebuild
+        self.base = base
+        self.tasks = ChainMap({}, base.tasks)
+        self.depends_on = ChainMap({}, base.depends_on)
+        self.dependents = ChainMap({}, base.dependents)
+        self.dependencies = base.dependencies
+        self._edge_delta = 0
+
+        # Tasks whose own schedule or incoming edges changed
+        self._schedule_changed: Set[str] = set()
+        # Tasks whose status changed (affects blocked/overdue of neighbours)
+        self._status_changed: Set[str] = set()
+        # Assignees whose workload changed
+        self._users_changed: Set[str] = set()
+
+        self._earliest_finish: Optional[Dict[str, int]] = None
+        self._depths: Optional[Dict[str, int]] = None
+        self._conflicts_by_user: Optional[Dict[str, ResourceConflict]] = None
+        self._rule_results: Dict[str, List[str]] = {}
+        self._workload = None
+        self._paths = None
+
+        for change in changes:
+            self._apply(change)
+
+        self.affected_task_ids = self._downstream(self._schedule_changed | self._status_changed)
+
+    # ================================
+    # Overlay mutation
+    # ================================
+
+    def _update_task(self, task_id: str, **fields) -> TaskInput:
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f"Unknown task '{task_id}' in scenario")
+        updated = task.model_copy(update=fields)
+        self.tasks[task_id] = updated
+        self._users_changed.add(task.assigneeId)
+        self._users_changed.add(updated.assigneeId)
+        return updated
+
+    def _own_list(self, layer: ChainMap, task_id: str) -> List[str]:
+        """Copy a base adjacency list into the overlay before mutating it"""
+        if task_id not in layer.maps[0]:
+            layer.maps[0][task_id] = list(layer.get(task_id, []))
+        return layer.maps[0][task_id]
+
+    def _apply(self, change: WhatIfChange):
+        if change.taskId not in self.tasks:
+            raise ValueError(f"Unknown task '{change.taskId}' in scenario")
+
+        if change.type == WhatIfChangeType.DELAY:
+            task = self.tasks[change.taskId]
+            self._update_task(
+                change.taskId,
+                due_date=task.due_date + timedelta(days=change.days or 0)
+            )
+            self._schedule_changed.add(change.taskId)
+
+        elif change.type == WhatIfChangeType.SET_STATUS:
+            if change.status is None:
+                raise ValueError("set_status change requires 'status'")
+            self._update_task(change.taskId, status=change.status)
+            self._status_changed.add(change.taskId)
+
+        elif change.type == WhatIfChangeType.REASSIGN:
+            if not change.assigneeId:
+                raise ValueError("reassign change requires 'assigneeId'")
+            self._update_task(
+                change.taskId,
+                assigneeId=change.assigneeId,
+                assigneeName=change.assigneeName
+            )
+
+        elif change.type == WhatIfChangeType.ADD_DEPENDENCY:
+            upstream = change.dependsOnTaskId
+            if upstream not in self.tasks:
+                raise ValueError(f"Unknown task '{upstream}' in scenario")
+            if upstream not in self.depends_on.get(change.taskId, []):
+                if upstream == change.taskId or upstream in self._downstream({change.taskId}):
+                    raise DependencyCycleError(
+                        f"'{change.taskId}' depending on '{upstream}' would create a dependency cycle"
+                    )
+                self._own_list(self.depends_on, change.taskId).append(upstream)
+                self._own_list(self.dependents, upstream).append(change.taskId)
+                self._edge_delta += 1
+                self._schedule_changed.add(change.taskId)
+
+        elif change.type == WhatIfChangeType.REMOVE_DEPENDENCY:
+            upstream = change.dependsOnTaskId
+            if upstream in self.depends_on.get(change.taskId, []):
+                self._own_list(self.depends_on, change.taskId).remove(upstream)
+                self._own_list(self.dependents, upstream).remove(change.taskId)
+                self._edge_delta -= 1
+                self._schedule_changed.add(change.taskId)
+
+    def _downstream(self, roots: Set[str]) -> Set[str]:
+        """Roots plus everything transitively depending on them"""
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            for child in self.dependents.get(stack.pop(), []):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return seen
+
+    # ================================
+    # Incremental recomputation
+    # ================================
+
+    def _recompute(self, base_values: Dict, region: Set[str], value_fn) -> Dict:
+        """
+        Recompute `region` in dependency order on top of `base_values`.
+        value_fn(task_id, dep_values) -> value for that task.
+        """
+        overlay: Dict = {}
+        values = ChainMap(overlay, base_values)
+        in_progress: Set[str] = set()
+
+        def visit(task_id: str):
+            if task_id in overlay:
+                return
+            in_progress.add(task_id)
+            dep_values = []
+            for dep in self.depends_on.get(task_id, []):
+                if dep not in self.tasks:
+                    continue
+                if dep in region and dep not in overlay and dep not in in_progress:
+                    visit(dep)
+                if dep in values:
+                    dep_values.append(values[dep])
+            in_progress.discard(task_id)
+            overlay[task_id] = value_fn(task_id, dep_values)
+
+        for task_id in region:
+            visit(task_id)
+        return values
+
+    def _base_cyclic(self) -> bool:
+        """The base schedule dropped cycle edges; which ones depends on the whole graph"""
+        return self.base.path_schedule().cyclic
+
+    def earliest_finish_map(self) -> Dict[str, int]:
+        if self._base_cyclic():
+            return super().earliest_finish_map()
+        if self._earliest_finish is None:
+            region = self._downstream(self._schedule_changed)
+
+            def finish(task_id: str, dep_finishes: List[int]) -> int:
+                return max(dep_finishes, default=0) + duration_days(self.tasks[task_id])
+
+            self._earliest_finish = self._recompute(
+                self.base.earliest_finish_map(), region, finish
+            )
+        return self._earliest_finish
+
+    def calculate_critical_path(self) -> Tuple[List[str], int]:
+        """
+        Longest duration chain, traced back from the latest-finishing end
+        task. Ties break in the base schedule's order, as in
+        PathSchedule.longest_paths, so an unchanged region keeps the
+        baseline's path.
+        """
+        if self._base_cyclic():
+            return super().calculate_critical_path()
+        finish = self.earliest_finish_map()
+        ends = [t for t in self.base.path_schedule().order if not self.dependents.get(t)]
+        if not ends:
+            return [], 0
+
+        end = max(ends, key=finish.__getitem__)
+        critical_path = [end]
+        seen = {end}
+        while True:
+            preds = [
+                p for p in dict.fromkeys(self.depends_on.get(critical_path[-1], ()))
+                if p in finish and p not in seen
+            ]
+            if not preds:
+                break
+            pred = max(preds, key=finish.__getitem__)
+            critical_path.append(pred)
+            seen.add(pred)
+        critical_path.reverse()
+        return critical_path, finish[end]
+
+    def depth_map(self) -> Dict[str, int]:
+        if self._base_cyclic():
+            return super().depth_map()
+        if self._depths is None:
+            region = self._downstream(self._schedule_changed)
+
+            def depth(task_id: str, dep_depths: List[int]) -> int:
+                if not self.depends_on.get(task_id):
+                    return 0
+                return 1 + max(dep_depths, default=0)
+
+            self._depths = self._recompute(self.base.depth_map(), region, depth)
+        return self._depths
+
+    def _calculate_max_depth(self) -> int:
+        if len(self.dependencies) + self._edge_delta <= 0:
+            return 0
+        depths = self.depth_map()
+        return max(depths.values()) if depths else 0
+
+    def conflicts_by_user(self) -> Dict[str, ResourceConflict]:
+        if self._conflicts_by_user is None:
+            conflicts = dict(self.base.conflicts_by_user())
+            for user_id in self._users_changed:
+                conflicts.pop(user_id, None)
+
+            if self._users_changed:
+                user_tasks: Dict[str, List[TaskInput]] = {u: [] for u in self._users_changed}
+                for task in self.tasks.values():
+                    if task.assigneeId in user_tasks and task.status != TaskStatus.DONE:
+                        user_tasks[task.assigneeId].append(task)
+                for user_id, tasks in user_tasks.items():
+                    if not tasks:
+                        continue
+                    conflict = self._detect_user_conflict(UserWorkload(user_id, tasks))
+                    if conflict:
+                        conflicts[user_id] = conflict
+
+            self._conflicts_by_user = conflicts
+        return self._conflicts_by_user
+
+    def _patch(self, base_ids: List[str], touched: Dict[str, None], predicate) -> List[str]:
+        """Reuse a base per-task result list, re-evaluating only touched tasks"""
+        kept = [t for t in base_ids if t not in touched]
+        return kept + [t for t in touched if predicate(t)]
+
+    def _find_overdue_tasks(self) -> List[str]:
+        now = now_utc()
+        touched = dict.fromkeys(self.tasks.maps[0])
+
+        def is_overdue(task_id: str) -> bool:
+            task = self.tasks[task_id]
+            return task.status != TaskStatus.DONE and normalize_datetime(task.due_date) < now
+
+        return self._patch(self.base.detect_overdue_tasks(), touched, is_overdue)
+
+    def _find_at_risk_tasks(self) -> List[str]:
+        now = now_utc()
+        touched = dict.fromkeys(self.tasks.maps[0])
+
+        def is_at_risk(task_id: str) -> bool:
+            task = self.tasks[task_id]
+            if task.status != TaskStatus.TODO:
+                return False
+            return 0 <= (normalize_datetime(task.due_date) - now).days <= 3
+
+        return self._patch(self.base._detect_at_risk_tasks(), touched, is_at_risk)
+
+    def _find_blocked_tasks(self) -> List[str]:
+        touched = dict.fromkeys(self.depends_on.maps[0])
+        for task_id in self._status_changed:
+            touched[task_id] = None
+            touched.update(dict.fromkeys(self.dependents.get(task_id, [])))
+
+        def is_blocked(task_id: str) -> bool:
+            task = self.tasks.get(task_id)
+            if not task or task.status == TaskStatus.DONE:
+                return False
+            return any(
+                self.tasks.get(d) and self.tasks[d].status != TaskStatus.DONE
+                for d in self.depends_on.get(task_id, [])
+            )
+
+        return self._patch(self.base.detect_blocked_tasks(), touched, is_blocked)
@@ -0,0 +1,96 @@
+"""
+Stream Parser - Incremental extraction of dependency objects from LLM output
+Emits each element of the "dependencies" array as soon as its closing
+brace arrives, without waiting for the rest of the completion.
+"""
+
+import json
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalDependencyParser:
+    """
+    Character-level scanner over a growing JSON document.
+    Tracks string/escape state and nesting depth, finds the array that
+    follows the "dependencies" key, and decodes each top-level object in
+    that array as soon as it is complete. Code fences and other text
+    around the JSON are ignored.
+    """
+
+    KEY = '"dependencies"'
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_string = False
+        self._escaped = False
+        self._array_found = False
+        self._array_depth = 0  # nesting depth of the dependencies array
+        self._depth = 0
+        self._object_start = -1
+        self.finished = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add text; return dependency dicts completed by it"""
+        if self.finished or not chunk:
+            return []
+        self._buffer += chunk
+        if not self._array_found and not self._find_array():
+            return []
+        return self._scan()
+
+    def _find_array(self) -> bool:
+        key_at = self._buffer.find(self.KEY)
+        if key_at < 0:
+            return False
+        bracket = self._buffer.find("[", key_at + len(self.KEY))
+        if bracket < 0:
+            return False
+        self._array_found = True
+        self._pos = bracket + 1
+        self._depth = self._array_depth = 1
+        return True
+
+    def _scan(self) -> List[Dict]:
+        completed = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._depth == self._array_depth:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._depth == self._array_depth and self._object_start >= 0:
+                    raw = buffer[self._object_start:self._pos + 1]
+                    self._object_start = -1
+                    try:
+                        completed.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed streamed dependency: {e}")
+                elif self._depth < self._array_depth:
+                    self.finished = True
+                    self._pos += 1
+                    break
+            self._pos += 1
+
+        # Drop consumed text that no pending object needs
+        keep_from = self._object_start if self._object_start >= 0 else self._pos
+        self._buffer = self._buffer[keep_from:]
+        self._pos -= keep_from
+        if self._object_start >= 0:
+            self._object_start = 0
+        return completed
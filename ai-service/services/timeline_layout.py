@@ -0,0 +1,350 @@
+"""
+Timeline Layout - Server-side Gantt layout with time-window paging
+Bars are packed into swimlane rows once per project (greedy interval
+packing: each task, in start order, takes the lowest row that is free by
+its start day), so row numbers are stable across pages and the client
+only positions what it receives. A page is a time window: tasks mode
+returns the bars overlapping it plus routed dependency edges; when the
+window holds more than maxBars tasks (zoomed out), each swimlane is
+summarized into fixed-width time buckets instead. Layouts are kept per
+(project version, swimlane) in each pool worker, so paging through one
+project builds its layout once per worker instead of on every page. The
+version is the caller's (project id plus whatever it changes with, e.g.
+the latest updatedAt); without one the project content is hashed.
+"""
+
+import hashlib
+import heapq
+import math
+from collections import OrderedDict
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import (
+    Priority, ProjectInput, TaskInput, TaskStatus, TimelineBar, TimelineEdge, TimelineLane,
+    TimelineRequest, TimelineResponse, TimelineSummary
+)
+from services.rule_engine import RuleEngine, normalize_datetime, now_utc
+from config import settings
+
+# Auto-sized summary buckets aim for about this many columns per window
+SUMMARY_BUCKETS = 120
+MAX_SUMMARY_BUCKETS = 2000
+
+# Horizontal stub (in days) before an edge turns
+EDGE_STUB = 0.25
+
+_LANE_ORDER = {
+    "status": [s.value for s in TaskStatus],
+    "priority": [p.value for p in Priority],
+}
+
+
+def _lane_of(task: TaskInput, swimlane: str) -> Tuple[str, str]:
+    """(key, label) of the task's swimlane"""
+    if swimlane == "assignee":
+        return task.assigneeId, task.assigneeName or task.assigneeId
+    if swimlane == "status":
+        return task.status.value, task.status.value.replace("_", " ")
+    if swimlane == "priority":
+        return task.priority.value, task.priority.value
+    return "all", "All tasks"
+
+
+def pack_rows(spans: List[Tuple[int, int, str]]) -> Dict[str, int]:
+    """
+    Greedy interval packing of (start, end, task_id) spans, end exclusive.
+    Processing spans by start and reusing the lowest free row uses the
+    minimum number of rows (the peak overlap) in O(n log n).
+    """
+    rows: Dict[str, int] = {}
+    busy: List[Tuple[int, int]] = []  # (end, row) of rows in use
+    free: List[int] = []
+    row_count = 0
+    for start, end, task_id in sorted(spans):
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            row = heapq.heappop(free)
+        else:
+            row = row_count
+            row_count += 1
+        rows[task_id] = row
+        heapq.heappush(busy, (end, row))
+    return rows
+
+
+def route_edge(x1: float, y1: float, x2: float, y2: float) -> List[List[float]]:
+    """
+    Orthogonal route from a predecessor's end (x1, y1) to a successor's
+    start (x2, y2). Forward edges turn once near the predecessor; backward
+    edges (overlapping bars) wrap around through the gap above or below
+    the successor's row.
+    """
+    if x2 >= x1:
+        if y1 == y2:
+            return [[x1, y1], [x2, y2]]
+        xm = x1 + min(EDGE_STUB, (x2 - x1) / 2)
+        points = [[x1, y1], [xm, y1], [xm, y2], [x2, y2]]
+    else:
+        ym = y2 - 0.5 if y2 > y1 else y2 + 0.5
+        out_x, in_x = x1 + EDGE_STUB, x2 - EDGE_STUB
+        points = [[x1, y1], [out_x, y1], [out_x, ym], [in_x, ym], [in_x, y2], [x2, y2]]
+    # Drop zero-length segments
+    route = [points[0]]
+    for point in points[1:]:
+        if point != route[-1]:
+            route.append(point)
+    return route
+
+
+class TimelineLayout:
+    """
+    Row assignment and day coordinates for every task of one project.
+    Kept as plain (start, end, row) tuples; TimelineBar models are only
+    built for the bars a page returns.
+    """
+
+    def __init__(self, engine: RuleEngine, swimlane: str):
+        self.engine = engine
+        self.origin: Optional[date] = None
+        self.spans: Dict[str, Tuple[int, int, int]] = {}  # task id -> (start, end, row)
+        self.lane_of: Dict[str, str] = {}
+        self.lanes: List[TimelineLane] = []
+        self.total_days = 0
+        self.row_count = 0
+        if not engine.tasks:
+            return
+
+        created = {task_id: normalize_datetime(t.createdAt) for task_id, t in engine.tasks.items()}
+        first = min(created.values())
+        origin = datetime(first.year, first.month, first.day)
+        self.origin = origin.date()
+
+        self.schedule = engine.path_schedule()
+        critical_path, _ = engine.calculate_critical_path()
+        self.critical_path = set(critical_path)
+        self.critical_edges = set(zip(critical_path, critical_path[1:]))
+        self.overdue = set(engine.detect_overdue_tasks())
+        self.blocked = set(engine.detect_blocked_tasks())
+
+        # Spans per lane; lanes keep their first-seen label
+        by_lane: Dict[str, List[Tuple[int, int, str]]] = {}
+        labels: Dict[str, str] = {}
+        for task_id, task in engine.tasks.items():
+            key, label = _lane_of(task, swimlane)
+            start = (created[task_id] - origin).days
+            by_lane.setdefault(key, []).append((start, start + self.schedule.duration[task_id], task_id))
+            labels.setdefault(key, label)
+            self.lane_of[task_id] = key
+
+        order = _LANE_ORDER.get(swimlane)
+        if order:
+            keys = sorted(by_lane, key=order.index)
+        else:
+            keys = sorted(by_lane, key=lambda k: (labels[k].lower(), k))
+
+        offset = 0
+        for key in keys:
+            rows = pack_rows(by_lane[key])
+            row_count = max(rows.values()) + 1
+            self.lanes.append(TimelineLane(
+                key=key, label=labels[key], rowOffset=offset,
+                rowCount=row_count, taskCount=len(rows)
+            ))
+            for start, end, task_id in by_lane[key]:
+                self.spans[task_id] = (start, end, offset + rows[task_id])
+                if end > self.total_days:
+                    self.total_days = end
+            offset += row_count
+        self.row_count = offset
+
+    def day(self, value: date) -> int:
+        return (value - self.origin).days
+
+    def critical(self, task_id: str) -> bool:
+        """On criticalPathIds (other zero-float tasks are only near-critical)"""
+        return task_id in self.critical_path
+
+    def visible(self, start_day: int, end_day: int) -> List[str]:
+        """Tasks overlapping [start_day, end_day), top to bottom and left to right"""
+        spans = self.spans
+        task_ids = [
+            task_id for task_id, (start, end, _) in spans.items()
+            if start < end_day and end > start_day
+        ]
+        task_ids.sort(key=lambda task_id: (spans[task_id][2], spans[task_id][0]))
+        return task_ids
+
+    def bar(self, task_id: str) -> TimelineBar:
+        task = self.engine.tasks[task_id]
+        start, end, row = self.spans[task_id]
+        float_days = self.schedule.float_days(task_id)
+        return TimelineBar(
+            taskId=task_id,
+            title=task.title,
+            status=task.status,
+            lane=self.lane_of[task_id],
+            row=row,
+            startDay=start,
+            endDay=end,
+            floatDays=float_days,
+            critical=task_id in self.critical_path,
+            overdue=task_id in self.overdue,
+            blocked=task_id in self.blocked
+        )
+
+    def edges(self, task_ids: List[str]) -> List[TimelineEdge]:
+        """Routes for dependencies with at least one end among `task_ids`"""
+        pairs = dict.fromkeys(
+            (pred, task_id)
+            for task_id in task_ids
+            for pred in self.engine.depends_on.get(task_id, ())
+        )
+        pairs.update(dict.fromkeys(
+            (task_id, succ)
+            for task_id in task_ids
+            for succ in self.engine.dependents.get(task_id, ())
+        ))
+
+        routes = []
+        for pred, succ in pairs:
+            a, b = self.spans.get(pred), self.spans.get(succ)
+            if a is None or b is None or pred == succ:
+                continue
+            routes.append(((a[2], a[1], succ), TimelineEdge(
+                fromTaskId=pred,
+                toTaskId=succ,
+                points=route_edge(a[1], a[2], b[0], b[2]),
+                critical=(pred, succ) in self.critical_edges
+            )))
+        routes.sort(key=itemgetter(0))
+        return [edge for _, edge in routes]
+
+    def summaries(self, task_ids: List[str], start_day: int, end_day: int, bucket_days: int) -> List[TimelineSummary]:
+        """
+        Per-lane counts of tasks overlapping each bucket. Buckets are
+        aligned to multiples of bucket_days from the origin so they do not
+        shift as the window pages. Each count is a difference array.
+        """
+        first = start_day // bucket_days
+        last = -(-end_day // bucket_days)  # exclusive
+        width = last - first
+        if width > MAX_SUMMARY_BUCKETS:
+            raise ValueError("Too many buckets; widen bucketDays or narrow the window")
+
+        # lane -> [tasks, done, overdue, critical] difference arrays
+        counts: Dict[str, List[List[int]]] = {}
+        for task_id in task_ids:
+            lane = self.lane_of[task_id]
+            diffs = counts.get(lane)
+            if diffs is None:
+                diffs = counts[lane] = [[0] * (width + 1) for _ in range(4)]
+            start, end, _ = self.spans[task_id]
+            lo = max(start // bucket_days, first) - first
+            hi = min((end - 1) // bucket_days, last - 1) - first + 1
+            flags = (
+                True,
+                self.engine.tasks[task_id].status == TaskStatus.DONE,
+                task_id in self.overdue,
+                self.critical(task_id)
+            )
+            for diff, flag in zip(diffs, flags):
+                if flag:
+                    diff[lo] += 1
+                    diff[hi] -= 1
+
+        summaries = []
+        for lane in self.lanes:
+            diffs = counts.get(lane.key)
+            if diffs is None:
+                continue
+            running = [0, 0, 0, 0]
+            for i in range(width):
+                for c in range(4):
+                    running[c] += diffs[c][i]
+                if running[0]:
+                    summaries.append(TimelineSummary(
+                        lane=lane.key,
+                        startDay=(first + i) * bucket_days,
+                        days=bucket_days,
+                        taskCount=running[0],
+                        doneCount=running[1],
+                        overdueCount=running[2],
+                        criticalCount=running[3]
+                    ))
+        return summaries
+
+
+# (project key, swimlane) -> layout, least recently used first
+_layouts: "OrderedDict[Tuple[str, str], TimelineLayout]" = OrderedDict()
+
+
+def project_key(project: ProjectInput, version: Optional[str] = None) -> str:
+    """
+    Cache key of a project's layout. Includes the UTC day because overdue
+    flags depend on now_utc(). With the caller's version this is just the
+    project id and version; otherwise the pydantic JSON dump is hashed,
+    which costs O(n) on every page (still cheaper than the layout).
+    """
+    day = now_utc().date().isoformat()
+    if version is not None:
+        return f"{day}:{project.id}:{version}"
+    digest = hashlib.sha256(day.encode())
+    digest.update(project.model_dump_json().encode())
+    return digest.hexdigest()
+
+
+def cached_layout(project: ProjectInput, swimlane: str, version: Optional[str] = None) -> TimelineLayout:
+    """Layout for a project and swimlane, built once per worker while cached"""
+    key = (project_key(project, version), swimlane)
+    layout = _layouts.get(key)
+    if layout is not None:
+        _layouts.move_to_end(key)
+        return layout
+
+    engine = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    layout = TimelineLayout(engine, swimlane)
+    _layouts[key] = layout
+    while len(_layouts) > settings.TIMELINE_LAYOUT_CACHE_SIZE:
+        _layouts.popitem(last=False)
+    return layout
+
+
+def timeline_page(request: TimelineRequest) -> TimelineResponse:
+    """Layout of the requested window at the level of detail it needs"""
+    layout = cached_layout(request.project, request.swimlane, request.version)
+    if layout.origin is None:
+        return TimelineResponse(success=True)
+
+    start_day = layout.day(request.start) if request.start else 0
+    end_day = layout.day(request.end) if request.end else layout.total_days
+    if end_day < start_day:
+        raise ValueError("end must not be before start")
+
+    visible = layout.visible(start_day, end_day)
+    lod = request.lod
+    if lod == "auto":
+        lod = "summary" if len(visible) > request.maxBars else "tasks"
+
+    response = TimelineResponse(
+        success=True,
+        origin=layout.origin,
+        totalDays=layout.total_days,
+        windowStartDay=start_day,
+        windowEndDay=end_day,
+        lod=lod,
+        rowCount=layout.row_count,
+        totalTasks=len(layout.spans),
+        visibleTasks=len(visible),
+        lanes=layout.lanes
+    )
+    if lod == "tasks":
+        response.bars = [layout.bar(task_id) for task_id in visible]
+        response.edges = layout.edges(visible)
+    else:
+        bucket_days = request.bucketDays or max(1, math.ceil((end_day - start_day) / SUMMARY_BUCKETS))
+        response.bucketDays = bucket_days
+        response.summaries = layout.summaries(visible, start_day, end_day, bucket_days)
+    return response
@@ -0,0 +1,263 @@
+"""
+Wire Format - Negotiated MessagePack bodies for the analysis endpoints
+Requests sent as application/x-msgpack may carry projects and task lists
+in a columnar layout (dictionary-encoded strings, epoch-millisecond dates)
+that skips repeated keys and ISO date strings. Responses are MessagePack
+(dates as epoch milliseconds) when the Accept header asks for it; JSON
+stays the default both ways, and negotiated responses carry Vary: Accept.
+
+Columnar task table (all columns the same length):
+
+    {"columnar": "tasks", "strings": [...], "tasks": {
+        "id": [str idx], "title": [str], "description": [str | None],
+        "status": [str idx], "priority": [str idx],
+        "assigneeId": [str idx], "assigneeName": [str idx | None],
+        "due_date": [epoch ms], "createdAt": [epoch ms]}}
+
+Columnar project: the same plus "id", "name", "description",
+"workspaceId", "start_date"/"end_date" (epoch ms or None), "columnar":
+"project" and a "dependencies" table with "id", "taskId",
+"dependsOnTaskId", "type" (all string indexes).
+"""
+
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+
+from models.schemas import ProjectInput, TaskInput
+from services.gc_pause import gc_paused
+
+
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack")
+MSGPACK_MEDIA_TYPE = MSGPACK_MEDIA_TYPES[0]
+
+EPOCH = datetime(1970, 1, 1)
+
+TASK_COLUMNS = ("id", "title", "description", "status", "priority",
+                "assigneeId", "assigneeName", "due_date", "createdAt")
+TASK_STRING_COLUMNS = {"id", "status", "priority", "assigneeId", "assigneeName"}
+DEPENDENCY_COLUMNS = ("id", "taskId", "dependsOnTaskId", "type")
+
+_task_list = TypeAdapter(List[TaskInput])
+
+# Set per request by WireRoute, read when the response body is rendered
+_respond_msgpack: ContextVar[bool] = ContextVar("respond_msgpack", default=False)
+_response_model: ContextVar[Any] = ContextVar("response_model", default=None)
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";")[0].strip().lower()
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True if the Accept header lists a MessagePack type with q > 0"""
+    for part in (accept or "").split(","):
+        media, *params = part.split(";")
+        if media.strip().lower() not in MSGPACK_MEDIA_TYPES:
+            continue
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def to_epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    """Datetime (naive = UTC) -> epoch milliseconds"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def encode_project(project: ProjectInput) -> Dict:
+    """ProjectInput -> columnar project (the inverse of decode_columnar)"""
+    index: Dict[str, int] = {}
+
+    def ref(value: str) -> int:
+        if value not in index:
+            index[value] = len(index)
+        return index[value]
+
+    tasks = project.tasks
+    deps = project.existingDependencies
+    return {
+        "columnar": "project",
+        "id": project.id,
+        "name": project.name,
+        "description": project.description,
+        "workspaceId": project.workspaceId,
+        "start_date": to_epoch_ms(project.start_date),
+        "end_date": to_epoch_ms(project.end_date),
+        "tasks": {
+            "id": [ref(t.id) for t in tasks],
+            "title": [t.title for t in tasks],
+            "description": [t.description for t in tasks],
+            "status": [ref(t.status.value) for t in tasks],
+            "priority": [ref(t.priority.value) for t in tasks],
+            "assigneeId": [ref(t.assigneeId) for t in tasks],
+            "assigneeName": [ref(t.assigneeName) if t.assigneeName else None for t in tasks],
+            "due_date": [to_epoch_ms(t.due_date) for t in tasks],
+            "createdAt": [to_epoch_ms(t.createdAt) for t in tasks],
+        },
+        "dependencies": {
+            "id": [ref(d.id) for d in deps],
+            "taskId": [ref(d.taskId) for d in deps],
+            "dependsOnTaskId": [ref(d.dependsOnTaskId) for d in deps],
+            "type": [ref(d.type.value) for d in deps],
+        },
+        "strings": list(index),
+    }
+
+
+def _rows(columns: Dict[str, List], names: tuple, string_columns: set, strings: List[str]) -> List[Dict]:
+    """Column lists -> row dicts, resolving dictionary-encoded strings"""
+    count = len(columns["id"])
+    resolved = []
+    for name in names:
+        values = columns.get(name) or [None] * count
+        if name in string_columns:
+            values = [strings[i] if i is not None else None for i in values]
+        resolved.append(values)
+    return [dict(zip(names, row)) for row in zip(*resolved)]
+
+
+def decode_columnar(value: Dict) -> Any:
+    """
+    Columnar project or task table -> validated models.
+    Epoch-millisecond dates are parsed by pydantic-core, like ISO strings.
+    """
+    strings = value["strings"]
+    tasks = _rows(value["tasks"], TASK_COLUMNS, TASK_STRING_COLUMNS, strings)
+    if value["columnar"] == "tasks":
+        return _task_list.validate_python(tasks)
+    dependencies = _rows(
+        value.get("dependencies") or {"id": []},
+        DEPENDENCY_COLUMNS, set(DEPENDENCY_COLUMNS), strings
+    )
+    return ProjectInput.model_validate({
+        "id": value["id"],
+        "name": value["name"],
+        "description": value.get("description"),
+        "workspaceId": value.get("workspaceId"),
+        "start_date": value.get("start_date"),
+        "end_date": value.get("end_date"),
+        "tasks": tasks,
+        "existingDependencies": dependencies
+    })
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, dict) and "columnar" in value:
+        return decode_columnar(value)
+    if isinstance(value, list) and value and isinstance(value[0], dict) and "columnar" in value[0]:
+        return [decode_columnar(item) for item in value]
+    return value
+
+
+def decode_body(body: bytes) -> Any:
+    """
+    MessagePack request body -> JSON-compatible object; columnar parts are
+    already validated models, which the endpoint's body model accepts as is.
+    """
+    with gc_paused():
+        payload = msgpack.unpackb(body, timestamp=3)
+        if isinstance(payload, dict):
+            return {key: _expand(value) for key, value in payload.items()}
+        return payload
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Types msgpack cannot pack: dates as epoch milliseconds, enums as values"""
+    if isinstance(value, datetime):
+        return to_epoch_ms(value)
+    if isinstance(value, date):
+        return to_epoch_ms(datetime(value.year, value.month, value.day))
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def _native(content: Any) -> Any:
+    """
+    FastAPI has already turned the response into JSON types (ISO date
+    strings); re-validate it against the route's response model to get
+    real datetimes back, so MessagePack bodies carry epoch milliseconds.
+    """
+    model = _response_model.get()
+    if model is None:
+        return content
+    if model not in _adapters:
+        _adapters[model] = TypeAdapter(model)
+    adapter = _adapters[model]
+    try:
+        return adapter.dump_python(adapter.validate_python(content))
+    except ValidationError:
+        return content
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON by default, MessagePack when the request's Accept header asked for it"""
+
+    def render(self, content: Any) -> bytes:
+        if _respond_msgpack.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(_native(content), default=_msgpack_default, use_bin_type=True)
+        return super().render(content)
+
+
+class WireRoute(APIRoute):
+    """
+    Route that accepts MessagePack request bodies and renders
+    NegotiatedResponse bodies in the negotiated format.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def wire_route_handler(request: Request) -> Response:
+            _respond_msgpack.set(wants_msgpack(request.headers.get("accept")))
+            _response_model.set(self.response_model)
+            if _media_type(request.headers.get("content-type")) in MSGPACK_MEDIA_TYPES:
+                request = await self._as_json_request(request)
+            response = await handler(request)
+            # Same URL, two representations: caches must key on Accept
+            vary = response.headers.get("vary")
+            if not vary:
+                response.headers["Vary"] = "Accept"
+            elif "accept" not in [v.strip().lower() for v in vary.split(",")]:
+                response.headers["Vary"] = f"{vary}, Accept"
+            return response
+
+        return wire_route_handler
+
+    @staticmethod
+    async def _as_json_request(request: Request) -> Request:
+        body = await request.body()
+        try:
+            decoded = decode_body(body) if body else None
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid MessagePack body: {e}")
+
+        # FastAPI only hands JSON content types to the body validator
+        headers = [
+            (name, b"application/json" if name == b"content-type" else value)
+            for name, value in request.scope["headers"]
+        ]
+        json_request = Request({**request.scope, "headers": headers}, request.receive)
+        json_request._body = body
+        json_request._json = decoded
+        return json_request
@@ -0,0 +1,154 @@
+"""
+Workload Index - Per-assignee daily workload with O(1) window queries
+Task spans (createdAt -> due_date) and due dates are histogrammed into
+daily buckets with difference arrays over the queried range, then
+prefix-summed so any window sum is two lookups.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from itertools import accumulate
+from typing import List, Dict, Optional, Tuple
+
+from models.schemas import TaskInput, TaskStatus
+from services.rule_engine import normalize_datetime
+
+
+def _day(dt: datetime) -> int:
+    return normalize_datetime(dt).toordinal()
+
+
+class UserWorkload:
+    """
+    Workload of one assignee.
+    Daily histograms are built lazily, only over the window a heatmap asks
+    for, so one task with an extreme date costs nothing for conflict
+    detection and no more than the requested window for heatmaps.
+    active_prefix[i] = task-days active on days base .. base+i-1
+    due_prefix[i]    = tasks due on days base .. base+i-1
+    """
+
+    def __init__(self, user_id: str, tasks: List[TaskInput]):
+        self.user_id = user_id
+        self.user_name = next((t.assigneeName for t in tasks if t.assigneeName), None)
+
+        # Sorted by due date; conflict detection bisects over due_times
+        self.tasks_by_due = sorted(tasks, key=lambda t: normalize_datetime(t.due_date))
+        self.due_times = [normalize_datetime(t.due_date) for t in self.tasks_by_due]
+
+        self.spans = []
+        for task in tasks:
+            due = _day(task.due_date)
+            self.spans.append((min(_day(task.createdAt), due), due))
+
+        self.origin = min(start for start, _ in self.spans)
+        self.last = max(end for _, end in self.spans)
+
+        self._window: Optional[Tuple[int, int]] = None  # days [base, end) the prefixes cover
+        self.active_prefix: List[int] = [0]
+        self.due_prefix: List[int] = [0]
+
+    def prepare(self, start_day: int, end_day: int):
+        """Build the histograms over days [start_day, end_day), clamped to the tasks' span"""
+        lo, hi = max(start_day, self.origin), min(end_day, self.last + 1)
+        if self._window and self._window[0] <= lo and hi <= self._window[1]:
+            return
+        length = max(hi - lo, 0)
+
+        # Difference array for spans (clipped to the window), histogram for due dates
+        span_delta = [0] * (length + 1)
+        due_hist = [0] * length
+        for start, end in self.spans:
+            if end < lo or start >= hi:
+                continue
+            span_delta[max(start, lo) - lo] += 1
+            span_delta[min(end, hi - 1) - lo + 1] -= 1
+            if end < hi:
+                due_hist[end - lo] += 1
+
+        active = list(accumulate(span_delta[:length]))
+        self.active_prefix = [0] + list(accumulate(active))
+        self.due_prefix = [0] + list(accumulate(due_hist))
+        self._window = (lo, max(hi, lo))
+
+    def _range_sum(self, prefix: List[int], start_day: int, end_day: int) -> int:
+        """Sum over days [start_day, end_day) in O(1); the window must be prepared"""
+        base = self._window[0]
+        lo = min(max(start_day - base, 0), len(prefix) - 1)
+        hi = min(max(end_day - base, 0), len(prefix) - 1)
+        return prefix[hi] - prefix[lo] if hi > lo else 0
+
+    def active_task_days(self, start_day: int, end_day: int) -> int:
+        self.prepare(start_day, end_day)
+        return self._range_sum(self.active_prefix, start_day, end_day)
+
+    def due_count(self, start_day: int, end_day: int) -> int:
+        self.prepare(start_day, end_day)
+        return self._range_sum(self.due_prefix, start_day, end_day)
+
+    def tasks_due_between(self, start: datetime, end: datetime) -> List[TaskInput]:
+        """Tasks with start <= due < end, in due order (O(log n + k))"""
+        lo = bisect_left(self.due_times, start)
+        hi = bisect_left(self.due_times, end)
+        return self.tasks_by_due[lo:hi]
+
+
+class WorkloadIndex:
+    """Workload per assignee for a set of tasks"""
+
+    def __init__(self, tasks: List[TaskInput], include_done: bool = False):
+        grouped: Dict[str, List[TaskInput]] = defaultdict(list)
+        for task in tasks:
+            if include_done or task.status != TaskStatus.DONE:
+                grouped[task.assigneeId].append(task)
+        self.users: Dict[str, UserWorkload] = {
+            user_id: UserWorkload(user_id, user_tasks)
+            for user_id, user_tasks in grouped.items()
+        }
+
+    def get(self, user_id: str) -> Optional[UserWorkload]:
+        return self.users.get(user_id)
+
+    def bounds(self) -> Optional[tuple]:
+        """(first day, last day) covered by any assignee, as dates"""
+        if not self.users:
+            return None
+        first = min(u.origin for u in self.users.values())
+        last = max(u.last for u in self.users.values())
+        return date.fromordinal(first), date.fromordinal(last)
+
+    def heatmap(
+        self,
+        start: date,
+        end: date,
+        window_days: int,
+        user_ids: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Rows of fixed-width buckets between start and end (inclusive).
+        Each bucket costs O(1) regardless of task count.
+        """
+        start_day, end_day = start.toordinal(), end.toordinal() + 1
+        rows = []
+        for user_id in user_ids or sorted(self.users):
+            workload = self.users.get(user_id)
+            if workload:
+                workload.prepare(start_day, end_day)
+            buckets = []
+            for bucket_start in range(start_day, end_day, window_days):
+                bucket_end = min(bucket_start + window_days, end_day)
+                task_days = workload.active_task_days(bucket_start, bucket_end) if workload else 0
+                buckets.append({
+                    "start": date.fromordinal(bucket_start),
+                    "days": bucket_end - bucket_start,
+                    "activeTaskDays": task_days,
+                    "avgActiveTasks": round(task_days / (bucket_end - bucket_start), 3),
+                    "dueCount": workload.due_count(bucket_start, bucket_end) if workload else 0
+                })
+            rows.append({
+                "userId": user_id,
+                "userName": workload.user_name if workload else None,
+                "buckets": buckets
+            })
+        return rows
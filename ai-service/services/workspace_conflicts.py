@@ -0,0 +1,147 @@
+"""
+Workspace Conflicts - Cross-project resource conflicts for a whole workspace
+Builds one interval tree per assignee over createdAt -> due_date spans of
+open tasks from every project, then sweeps each assignee's spans to find
+the days they carry too many concurrent tasks from more than one project.
+"""
+
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import ProjectInput, ResourceConflict, TaskStatus
+from services.interval_tree import IntervalTree
+from services.rule_engine import normalize_datetime
+
+
+def _day(dt: datetime) -> int:
+    return normalize_datetime(dt).toordinal()
+
+
+class AssigneeSpans:
+    """All open task spans of one assignee across the workspace"""
+
+    def __init__(self, user_id: str, user_name: Optional[str], spans: List[Tuple[int, int, Tuple[str, str]]]):
+        self.user_id = user_id
+        self.user_name = user_name
+        self.tree = IntervalTree(spans)  # payload: (task id, project id)
+        self.project_ids = sorted({payload[1] for _, _, payload in spans})
+        self.first_day = min(start for start, _, _ in spans)
+        self.last_day = max(end for _, end, _ in spans)
+
+    def overloaded_segments(
+        self, lo: int, hi: int, threshold: int
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int, Tuple[str, str]]]]:
+        """
+        Maximal day ranges in [lo, hi] with at least `threshold` concurrent
+        tasks spanning two or more projects, plus the spans in the window.
+        """
+        spans = self.tree.overlapping(lo, hi)
+        events = []
+        for start, end, (_, project_id) in spans:
+            events.append((max(start, lo), 1, project_id))
+            events.append((min(end, hi) + 1, -1, project_id))
+        events.sort()
+
+        segments: List[Tuple[int, int]] = []
+        per_project: Counter = Counter()
+        active = 0
+        i = 0
+        while i < len(events):
+            day = events[i][0]
+            while i < len(events) and events[i][0] == day:
+                _, delta, project_id = events[i]
+                active += delta
+                per_project[project_id] += delta
+                if not per_project[project_id]:
+                    del per_project[project_id]
+                i += 1
+            if i == len(events):
+                break
+            if active >= threshold and len(per_project) >= 2:
+                next_day = events[i][0]
+                if segments and segments[-1][1] == day - 1:
+                    segments[-1] = (segments[-1][0], next_day - 1)
+                else:
+                    segments.append((day, next_day - 1))
+        return segments, spans
+
+
+class WorkspaceConflictIndex:
+    """Per-assignee interval trees over every project in a workspace"""
+
+    def __init__(self, projects: List[ProjectInput], include_done: bool = False):
+        spans: Dict[str, list] = defaultdict(list)
+        names: Dict[str, str] = {}
+        for project in projects:
+            for task in project.tasks:
+                if not include_done and task.status == TaskStatus.DONE:
+                    continue
+                due = _day(task.due_date)
+                spans[task.assigneeId].append((min(_day(task.createdAt), due), due, (task.id, project.id)))
+                if task.assigneeName:
+                    names.setdefault(task.assigneeId, task.assigneeName)
+        self.assignees: Dict[str, AssigneeSpans] = {
+            user_id: AssigneeSpans(user_id, names.get(user_id), user_spans)
+            for user_id, user_spans in spans.items()
+        }
+
+    def _window(self, spans: AssigneeSpans, start: Optional[date], end: Optional[date]) -> Tuple[int, int]:
+        lo = start.toordinal() if start else spans.first_day
+        hi = end.toordinal() if end else spans.last_day
+        return lo, hi
+
+    def conflicts(
+        self,
+        threshold: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[ResourceConflict]:
+        """Cross-project overloads, most overlap days first"""
+        conflicts = []
+        for user_id, spans in self.assignees.items():
+            if len(spans.project_ids) < 2 or len(spans.tree) < threshold:
+                continue
+            lo, hi = self._window(spans, start, end)
+            segments, window_spans = spans.overloaded_segments(lo, hi, threshold)
+            if not segments:
+                continue
+
+            # Tasks touching any overloaded segment (segments are disjoint and sorted)
+            segment_ends = [seg_end for _, seg_end in segments]
+            task_ids, project_ids = set(), set()
+            for task_start, task_end, (task_id, project_id) in window_spans:
+                k = bisect_left(segment_ends, task_start)
+                if k < len(segments) and segments[k][0] <= task_end:
+                    task_ids.add(task_id)
+                    project_ids.add(project_id)
+
+            peak, _ = spans.tree.max_concurrency(lo, hi)
+            conflicts.append(ResourceConflict(
+                userId=user_id,
+                userName=spans.user_name,
+                taskIds=sorted(task_ids),
+                overlapDays=sum(seg_end - seg_start + 1 for seg_start, seg_end in segments),
+                projectIds=sorted(project_ids),
+                maxConcurrent=peak
+            ))
+        conflicts.sort(key=lambda c: (-c.overlapDays, c.userId))
+        return conflicts
+
+    def assignee_loads(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+        """Peak concurrency per assignee within the window"""
+        loads = []
+        for user_id in sorted(self.assignees):
+            spans = self.assignees[user_id]
+            lo, hi = self._window(spans, start, end)
+            peak, peak_day = spans.tree.max_concurrency(lo, hi)
+            loads.append({
+                "userId": user_id,
+                "userName": spans.user_name,
+                "projectIds": spans.project_ids,
+                "taskCount": len(spans.tree),
+                "maxConcurrent": peak,
+                "peakDay": date.fromordinal(peak_day) if peak_day else None
+            })
+        return loads
@@ -0,0 +1,64 @@
+"""
+Shared fixtures: seeded random projects for comparing the incremental and
+indexed structures against brute-force references.
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.schemas import DependencyInput, ProjectInput, TaskInput  # noqa: E402
+
+WORDS = (
+    "design implement test deploy api database schema frontend backend "
+    "auth login page review docs setup migrate"
+).split()
+
+
+def random_project(
+    n: int = 50,
+    seed: int = 1,
+    deps_per_task: float = 1.5,
+    users: int = 5,
+    project_id: str = "p1",
+    workspace_id: str = None
+) -> ProjectInput:
+    """Tasks with random spans, statuses and assignees; edges only point forward, so the graph is a DAG"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    tasks = []
+    for i in range(n):
+        created = now - timedelta(days=rng.randint(0, 60), hours=rng.randint(0, 23))
+        tasks.append(TaskInput(
+            id=f"{project_id}-t{i}",
+            title=" ".join(rng.sample(WORDS, 3)),
+            description=" ".join(rng.sample(WORDS, 5)),
+            status=rng.choice(["TODO", "IN_PROGRESS", "DONE"]),
+            priority=rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            assigneeId=f"u{rng.randint(0, users - 1)}",
+            assigneeName=f"User {i % users}",
+            due_date=created + timedelta(days=rng.randint(1, 90)),
+            createdAt=created
+        ))
+    dependencies = []
+    for i in range(int(n * deps_per_task) if n > 1 else 0):
+        a, b = sorted(rng.sample(range(n), 2))
+        dependencies.append(DependencyInput(
+            id=f"{project_id}-d{i}",
+            taskId=f"{project_id}-t{b}",
+            dependsOnTaskId=f"{project_id}-t{a}"
+        ))
+    return ProjectInput(
+        id=project_id, name=f"Project {project_id}", workspaceId=workspace_id,
+        tasks=tasks, existingDependencies=dependencies
+    )
+
+
+@pytest.fixture
+def make_project():
+    return random_project
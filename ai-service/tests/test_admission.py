@@ -0,0 +1,148 @@
+"""
+Admission gates, shedding by Content-Length and the 503 + Retry-After response
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from main import app
+from models.schemas import RiskScoreResponse
+from routers import analysis
+from services import admission
+from services.admission import INTERACTIVE, AdmissionGate, CpuScheduler, Overloaded
+from services.response_cache import response_cache
+
+
+def test_gate_of_one_queues_then_sheds():
+    gate = AdmissionGate("test", INTERACTIVE, concurrency=1, queue_size=1, max_wait=5.0)
+
+    async def run():
+        release = asyncio.Event()
+        order = []
+
+        async def hold(name):
+            async with gate.slot():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(hold("first"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(hold("queued"))
+        await asyncio.sleep(0.01)
+        counts = (gate.active, gate.waiting, gate.saturated())
+
+        shed = None
+        try:
+            async with gate.slot():
+                pass
+        except Overloaded as exc:
+            shed = exc
+        release.set()
+        await asyncio.gather(first, queued)
+        return counts, order, shed
+
+    counts, order, shed = asyncio.run(run())
+    assert counts == (1, 1, True)
+    assert order == ["first", "queued"]
+    assert shed is not None and shed.retry_after >= 1 and "test is overloaded" in str(shed)
+    assert gate.stats()["shed"] == 1 and not gate.saturated()
+
+
+def test_queued_request_is_shed_after_max_wait():
+    gate = AdmissionGate("test", INTERACTIVE, concurrency=1, queue_size=1, max_wait=0.05)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded):
+            async with gate.slot():
+                pass
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    stats = gate.stats()
+    assert (stats["running"], stats["queued"], stats["shed"]) == (0, 0, 1)
+
+
+def test_saturated_parent_sheds_the_child():
+    parent = AdmissionGate("cpu-pool", INTERACTIVE, concurrency=1, queue_size=0, max_wait=1.0)
+    child = AdmissionGate("risk", INTERACTIVE, concurrency=4, queue_size=4, max_wait=1.0, parent=parent)
+    assert not child.saturated()
+    parent.active = 1
+    assert child.saturated()
+    parent.service_time = 30.0
+    assert child.retry_after() == 30
+
+
+@pytest.fixture
+def busy_scheduler(monkeypatch):
+    """A scheduler whose interactive risk gate (size 1) has a request running"""
+    for name, value in [("CPU_POOL_WORKERS", 1), ("ADMISSION_POOL_QUEUE_SIZE", 0),
+                        ("ADMISSION_CONCURRENCY", 1), ("ADMISSION_QUEUE_SIZE", 0)]:
+        monkeypatch.setattr(settings, name, value)
+    scheduler = CpuScheduler()
+    scheduler._gate("risk", INTERACTIVE).active = 1
+    monkeypatch.setattr(admission, "cpu_scheduler", scheduler)
+    monkeypatch.setattr(analysis, "cpu_scheduler", scheduler)
+    response_cache._entries.clear()
+    yield scheduler
+    response_cache._entries.clear()
+
+
+def body_of(project):
+    return json.dumps({"project": project.model_dump(mode="json")})
+
+
+def post(body):
+    return TestClient(app).post(
+        "/api/v1/risk/calculate", content=body, headers={"Content-Type": "application/json"}
+    )
+
+
+def test_middleware_sheds_small_bodies_before_the_router(busy_scheduler, make_project, monkeypatch):
+    calls = []
+
+    async def calculate_risk(project):
+        calls.append(project.id)
+
+    monkeypatch.setattr(analysis, "_calculate_risk", calculate_risk)
+    response = post(body_of(make_project(5)))
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["success"] is False and "overloaded" in response.json()["error"]
+    assert calls == []
+
+
+def test_ambiguous_sizes_are_shed_at_the_gate(busy_scheduler, make_project, monkeypatch):
+    body = body_of(make_project(3))
+    # Threshold where this body could be either lane, so the middleware lets it through
+    monkeypatch.setattr(settings, "LARGE_PROJECT_TASK_THRESHOLD", len(body) // 200)
+    assert busy_scheduler.lane_hint(len(body)) is None
+
+    response = post(body)
+    assert response.status_code == 503 and "Retry-After" in response.headers
+    assert busy_scheduler._gate("risk", INTERACTIVE).stats()["shed"] == 1
+
+
+def test_bulk_bodies_skip_a_busy_interactive_lane(busy_scheduler, make_project, monkeypatch):
+    async def calculate_risk(project):
+        return RiskScoreResponse(success=True, riskScore=90, riskLevel="LOW", factors={})
+
+    monkeypatch.setattr(analysis, "_calculate_risk", calculate_risk)
+    body = body_of(make_project(5))
+    monkeypatch.setattr(settings, "LARGE_PROJECT_TASK_THRESHOLD", len(body) // 2000)
+
+    response = post(body)
+    assert response.status_code == 200 and response.json()["riskScore"] == 90
@@ -0,0 +1,138 @@
+"""
+MinHash/LSH duplicate groups against exact pairwise Jaccard
+"""
+
+import os
+import random
+import subprocess
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from services.duplicate_detector import (
+    MIN_TITLE_SIMILARITY, DuplicateDetector, _words, collapse_duplicates, find_duplicates, jaccard
+)
+
+VOCABULARY = [f"w{i}" for i in range(400)]
+
+
+def random_tasks(make_project, seed, n=200, copies=40):
+    """Random titles from a large vocabulary plus near-copies of some tasks"""
+    rng = random.Random(seed)
+    tasks = [
+        t.model_copy(update={
+            "title": " ".join(rng.sample(VOCABULARY, rng.randint(4, 8))),
+            "description": " ".join(rng.sample(VOCABULARY, rng.randint(0, 12)))
+        })
+        for t in make_project(n, seed=seed).tasks
+    ]
+    for i in range(copies):
+        original = rng.choice(tasks[:n])
+        title = original.title.split()
+        if rng.random() < 0.5:
+            title[rng.randrange(len(title))] = rng.choice(VOCABULARY)
+        tasks.append(original.model_copy(update={
+            "id": f"copy{i}",
+            "title": " ".join(title).upper() if rng.random() < 0.3 else " ".join(title),
+            "createdAt": original.createdAt + timedelta(hours=1)
+        }))
+    return tasks
+
+
+def qualifying_pairs(tasks, threshold):
+    words = [_words(t.title) | _words(t.description or "") for t in tasks]
+    titles = [_words(t.title) for t in tasks]
+    return {
+        (a, b)
+        for a in range(len(tasks)) for b in range(a + 1, len(tasks))
+        if jaccard(titles[a], titles[b]) >= MIN_TITLE_SIMILARITY and jaccard(words[a], words[b]) >= threshold
+    }
+
+
+def components(n, pairs):
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for a, b in pairs:
+        parent[find(a)] = find(b)
+    return {i: find(i) for i in range(n)}
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("threshold", [0.5, 0.7, 0.9])
+def test_groups_are_built_from_verified_pairs(make_project, seed, threshold):
+    tasks = random_tasks(make_project, seed)
+    index = {t.id: i for i, t in enumerate(tasks)}
+    pairs = qualifying_pairs(tasks, threshold)
+    component = components(len(tasks), pairs)
+
+    grouped = set()
+    for group in find_duplicates(tasks, threshold):
+        members = [index[task_id] for task_id in group.taskIds]
+        assert not grouped & set(members)
+        grouped.update(members)
+        # Within one exact component, and connected by qualifying pairs alone
+        assert len({component[i] for i in members}) == 1
+        inside = {(a, b) for a, b in pairs if a in members and b in members}
+        sub = components(len(tasks), inside)
+        assert len({sub[i] for i in members}) == 1
+        assert group.similarity >= threshold
+        assert group.canonicalTaskId == group.taskIds[0]
+
+
+def test_similar_pairs_are_found(make_project):
+    # Identical titles always share every band; for the rest, a pair with
+    # title Jaccard >= 0.5 becomes a candidate with probability >= 0.82
+    identical, similar, found = 0, 0, 0
+    for seed in range(8):
+        tasks = random_tasks(make_project, seed)
+        together = {}
+        for n, group in enumerate(find_duplicates(tasks, 0.5)):
+            together.update({task_id: n for task_id in group.taskIds})
+
+        for a, b in qualifying_pairs(tasks, 0.5):
+            same_group = tasks[a].id in together and together[tasks[a].id] == together.get(tasks[b].id)
+            if _words(tasks[a].title) == _words(tasks[b].title):
+                identical += 1
+                assert same_group
+            else:
+                similar += 1
+                found += same_group
+    assert identical > 0 and similar > 0
+    assert found >= 0.82 * similar
+
+
+def test_band_keys_do_not_depend_on_the_hash_seed(make_project):
+    script = (
+        "import sys; sys.path.insert(0, 'tests'); from conftest import random_project; "
+        "from services.duplicate_detector import DuplicateDetector; "
+        "print(DuplicateDetector(random_project(100, seed=5).tasks)._band_keys())"
+    )
+    root = Path(__file__).resolve().parent.parent
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONHASHSEED": str(seed)}
+        ).stdout
+        for seed in (1, 2, 3)
+    }
+    assert len(outputs) == 1
+    assert str(DuplicateDetector(make_project(100, seed=5).tasks)._band_keys()) + "\n" in outputs
+
+
+def test_collapse_keeps_the_earliest_task(make_project):
+    tasks = random_tasks(make_project, 11, n=50, copies=10)
+    groups = find_duplicates(tasks, 0.8)
+    kept = {t.id for t in collapse_duplicates(tasks, 0.8)}
+
+    assert groups
+    for group in groups:
+        assert set(group.taskIds) & kept == {group.canonicalTaskId}
+        created = {t.id: t.createdAt for t in tasks if t.id in group.taskIds}
+        assert created[group.canonicalTaskId] == min(created.values())
@@ -0,0 +1,108 @@
+"""
+Interval tree queries and the workspace conflict sweep against per-day scans
+"""
+
+import random
+from collections import defaultdict
+from datetime import date
+
+import pytest
+
+from services.interval_tree import IntervalTree
+from services.workspace_conflicts import WorkspaceConflictIndex, _day
+
+
+def random_intervals(rng, count):
+    intervals = []
+    for i in range(count):
+        start = rng.randint(0, 200)
+        intervals.append((start, start + rng.choice([0, 0, 1, 5, 20, 80]), i))
+    return intervals
+
+
+def brute_peak(intervals, lo, hi):
+    best, best_at = 0, None
+    for point in range(lo, hi + 1):
+        active = sum(1 for start, end, _ in intervals if start <= point <= end)
+        if active > best:
+            best, best_at = active, point
+    return best, best_at
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_overlap_queries_match_linear_scan(seed):
+    rng = random.Random(seed)
+    intervals = random_intervals(rng, rng.randint(0, 120))
+    tree = IntervalTree(intervals)
+    assert len(tree) == len(intervals)
+
+    for _ in range(50):
+        lo = rng.randint(-10, 300)
+        hi = lo + rng.choice([0, 1, 10, 100])
+        expected = sorted(iv for iv in intervals if iv[0] <= hi and iv[1] >= lo)
+        assert sorted(tree.overlapping(lo, hi)) == expected
+        assert tree.max_concurrency(lo, hi) == brute_peak(intervals, lo, hi)
+
+
+def workspace(make_project, seed):
+    rng = random.Random(seed)
+    return [
+        make_project(rng.randint(0, 40), seed=seed * 10 + i, users=4, project_id=f"p{i}")
+        for i in range(rng.randint(1, 4))
+    ]
+
+
+def reference_conflicts(projects, threshold, lo=None, hi=None):
+    """Per assignee and day: open tasks active that day and their projects"""
+    spans = defaultdict(list)
+    for project in projects:
+        for task in project.tasks:
+            if task.status != "DONE":
+                due = _day(task.due_date)
+                spans[task.assigneeId].append((min(_day(task.createdAt), due), due, task.id, project.id))
+
+    conflicts = {}
+    for user_id, user_spans in spans.items():
+        first = lo if lo is not None else min(s[0] for s in user_spans)
+        last = hi if hi is not None else max(s[1] for s in user_spans)
+        overloaded, task_ids, project_ids, peak = 0, set(), set(), 0
+        for day in range(first, last + 1):
+            active = [s for s in user_spans if s[0] <= day <= s[1]]
+            peak = max(peak, len(active))
+            if len(active) >= threshold and len({s[3] for s in active}) >= 2:
+                overloaded += 1
+                task_ids.update(s[2] for s in active)
+                project_ids.update(s[3] for s in active)
+        if overloaded:
+            conflicts[user_id] = (sorted(task_ids), overloaded, sorted(project_ids), peak)
+    return conflicts
+
+
+@pytest.mark.parametrize("seed", range(25))
+@pytest.mark.parametrize("threshold", [2, 4, 8])
+def test_workspace_conflicts_match_daily_scan(make_project, seed, threshold):
+    projects = workspace(make_project, seed)
+    index = WorkspaceConflictIndex(projects)
+
+    found = {
+        c.userId: (c.taskIds, c.overlapDays, c.projectIds, c.maxConcurrent)
+        for c in index.conflicts(threshold)
+    }
+    assert found == reference_conflicts(projects, threshold)
+
+
+def test_windowed_conflicts_match_daily_scan(make_project):
+    for seed in range(15):
+        projects = workspace(make_project, seed)
+        index = WorkspaceConflictIndex(projects)
+        days = [_day(t.due_date) for p in projects for t in p.tasks]
+        if not days:
+            continue
+        lo = random.Random(seed).randint(min(days) - 30, max(days))
+        hi = lo + 20
+
+        found = {
+            c.userId: (c.taskIds, c.overlapDays, c.projectIds, c.maxConcurrent)
+            for c in index.conflicts(3, date.fromordinal(lo), date.fromordinal(hi))
+        }
+        assert found == reference_conflicts(projects, 3, lo, hi)
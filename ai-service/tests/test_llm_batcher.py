@@ -0,0 +1,203 @@
+"""
+Micro-batching: flush triggers, lane separation and splitting answers per project
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from config import settings
+from services.candidate_filter import CandidatePair
+from services.llm_batcher import BatchEntry, DependencyBatcher
+from services.llm_providers import LLMProvider, MockProvider
+from services.llm_service import LLMService
+from services.rate_limiter import Lane
+
+
+class RecordingService:
+    """Stands in for LLMService: answers each project with its own task ids"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def detect_prefiltered(self, tasks, existing_deps, candidates, lane):
+        self.calls.append((lane, [tasks[0].id]))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [tasks[0].id]
+
+    async def detect_batch(self, entries, lane):
+        self.calls.append((lane, [entry.tasks[0].id for entry in entries]))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [[entry.tasks[0].id] for entry in entries]
+
+
+def submit_all(batcher, projects, lane=Lane.INTERACTIVE, spacing=0.0):
+    async def run():
+        async def one(i, project):
+            await asyncio.sleep(i * spacing)
+            return await batcher.submit(project.tasks, [], None, lane)
+        return await asyncio.gather(*(one(i, p) for i, p in enumerate(projects)))
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def projects(make_project):
+    return [make_project(3, seed=i, project_id=f"p{i}") for i in range(6)]
+
+
+def test_concurrent_calls_share_one_batch(projects):
+    service = RecordingService()
+    batcher = DependencyBatcher(service, window=0.02, max_wait=1.0, max_projects=10)
+
+    results = submit_all(batcher, projects[:3])
+    assert results == [[p.tasks[0].id] for p in projects[:3]]
+    assert service.calls == [(Lane.INTERACTIVE, [p.tasks[0].id for p in projects[:3]])]
+    assert batcher.stats()["avgBatchSize"] == 3
+
+
+def test_quiet_window_flushes_before_max_wait(projects):
+    service = RecordingService()
+    batcher = DependencyBatcher(service, window=0.02, max_wait=5.0, max_projects=10)
+
+    started = time.monotonic()
+    assert submit_all(batcher, projects[:1]) == [[projects[0].tasks[0].id]]
+    assert time.monotonic() - started < 1.0
+    # A batch of one goes through the single-project path
+    assert service.calls == [(Lane.INTERACTIVE, [projects[0].tasks[0].id])]
+
+
+def test_max_wait_caps_a_steady_stream(projects):
+    service = RecordingService()
+    # Calls keep arriving inside the window; only max_wait ends the first batch
+    batcher = DependencyBatcher(service, window=0.1, max_wait=0.15, max_projects=10)
+
+    submit_all(batcher, projects, spacing=0.05)
+    sizes = [len(ids) for _, ids in service.calls]
+    assert len(sizes) >= 2 and sum(sizes) == len(projects)
+    assert [i for _, ids in service.calls for i in ids] == [p.tasks[0].id for p in projects]
+
+
+def test_full_batch_runs_without_waiting(projects):
+    service = RecordingService()
+    batcher = DependencyBatcher(service, window=5.0, max_wait=5.0, max_projects=3)
+
+    started = time.monotonic()
+    submit_all(batcher, projects)
+    assert time.monotonic() - started < 1.0
+    assert [len(ids) for _, ids in service.calls] == [3, 3]
+
+
+def test_lanes_are_batched_separately(projects):
+    service = RecordingService()
+    batcher = DependencyBatcher(service, window=0.02, max_wait=1.0, max_projects=10)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(p.tasks, [], None, Lane.INTERACTIVE) for p in projects[:2]),
+            *(batcher.submit(p.tasks, [], None, Lane.BACKGROUND) for p in projects[2:4])
+        )
+
+    assert asyncio.run(run()) == [[p.tasks[0].id] for p in projects[:4]]
+    assert sorted(service.calls) == sorted([
+        (Lane.INTERACTIVE, [p.tasks[0].id for p in projects[:2]]),
+        (Lane.BACKGROUND, [p.tasks[0].id for p in projects[2:4]]),
+    ])
+
+
+def test_failure_reaches_every_caller(projects):
+    batcher = DependencyBatcher(RecordingService(fail=True), window=0.02, max_wait=1.0, max_projects=10)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(p.tasks, [], None, Lane.INTERACTIVE) for p in projects[:3]),
+            return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_batch_answer_is_split_per_project(make_project):
+    service = LLMService(providers=[MockProvider(latency_ms=0)])
+    projects = [make_project(4, seed=i, project_id=f"q{i}") for i in range(3)]
+
+    async def run():
+        entries = [BatchEntry(p.tasks, [], None) for p in projects]
+        batched = await service.detect_batch(entries)
+        single = [await service.detect_prefiltered(p.tasks, [], None) for p in projects]
+        return batched, single
+
+    batched, single = asyncio.run(run())
+    pairs = [{(s.taskId, s.dependsOnTaskId) for s in suggestions} for suggestions in batched]
+    assert pairs == [{(s.taskId, s.dependsOnTaskId) for s in suggestions} for suggestions in single]
+    for project, suggestions in zip(projects, pairs):
+        ids = {t.id for t in project.tasks}
+        assert all(a in ids and b in ids for a, b in suggestions)
+
+
+def test_cross_project_and_ambiguous_ids_are_dropped(make_project):
+    service = LLMService(providers=[])
+    first = make_project(2, seed=1, project_id="a")
+    second = make_project(2, seed=2, project_id="b")
+    shared = second.tasks[1].model_copy(update={"id": first.tasks[0].id})
+    response = json.dumps({"dependencies": [
+        {"taskId": "p1:a-t1", "dependsOnTaskId": "p1:a-t0", "confidence": 0.9},
+        {"taskId": "b-t0", "dependsOnTaskId": "p2:a-t0", "confidence": 0.9},  # prefix dropped
+        {"taskId": "p1:a-t1", "dependsOnTaskId": "p2:b-t0", "confidence": 0.9},  # spans projects
+        {"taskId": "a-t0", "dependsOnTaskId": "b-t0", "confidence": 0.9},  # a-t0 is in both
+        {"taskId": "p2:b-t0", "dependsOnTaskId": "p2:a-t0", "confidence": 0.5},  # below the bar
+    ]})
+
+    async def run():
+        entries = [BatchEntry(first.tasks, [], None), BatchEntry([second.tasks[0], shared], [], None)]
+        return service._parse_batch_response(response, entries)
+
+    results = asyncio.run(run())
+    assert [[(s.taskId, s.dependsOnTaskId) for s in r] for r in results] == [
+        [("a-t1", "a-t0")],
+        [("b-t0", "a-t0")],
+    ]
+
+
+@pytest.mark.parametrize("mode", ["record", "replay"])
+def test_record_and_replay_never_batch(monkeypatch, mode):
+    service = LLMService(providers=[])
+    monkeypatch.setattr(settings, "LLM_BATCH_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "live")
+    assert service.batching_enabled()
+    monkeypatch.setattr(settings, "LLM_PROVIDER", mode)
+    assert not service.batching_enabled()
+
+
+class CannedProvider(LLMProvider):
+    name = "canned"
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+    async def complete(self, prompt):
+        return json.dumps({"dependencies": [
+            {"taskId": a, "dependsOnTaskId": b, "confidence": 0.9} for a, b in self.pairs
+        ]})
+
+
+def test_cap_applies_after_candidate_restriction(make_project):
+    tasks = make_project(12, seed=3).tasks
+    ids = [t.id for t in tasks]
+    outside = [(ids[i + 1], ids[i]) for i in range(6)]
+    inside = [(ids[i], ids[i - 6]) for i in range(6, 12)]
+    candidates = [CandidatePair(a, b, 1.0, 1.0, "test") for a, b in inside]
+
+    # The model lists six pairs outside the pre-screened set before the allowed ones
+    service = LLMService(providers=[CannedProvider(outside + inside)])
+    suggestions = asyncio.run(service.detect_prefiltered(tasks, [], candidates))
+    assert [(s.taskId, s.dependsOnTaskId) for s in suggestions] == inside[:5]
+
+    async def batch():
+        return await service.detect_batch([BatchEntry(tasks, [], candidates)])
+
+    assert asyncio.run(batch()) == [suggestions]
@@ -0,0 +1,83 @@
+"""
+Record/replay round trips, replay misses and the provider interface
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from services import llm_providers
+from services.llm_providers import LLMProvider, MockProvider, RecordReplayProvider, prompt_hash
+
+
+class CountingProvider(MockProvider):
+    def __init__(self):
+        super().__init__(latency_ms=0)
+        self.calls = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        return await super().complete(prompt)
+
+
+PROMPTS = [
+    'Tasks: [{"id": "a"}, {"id": "b"}, {"id": "c"}]',
+    'Tasks: [{"id": "x"}, {"id": "y"}]',
+]
+
+
+def collect(stream):
+    async def run():
+        return "".join([chunk async for chunk in stream])
+    return asyncio.run(run())
+
+
+def test_replay_returns_what_was_recorded(tmp_path):
+    inner = CountingProvider()
+    recorder = RecordReplayProvider(str(tmp_path), "record", inner)
+    recorded = [asyncio.run(recorder.complete(prompt)) for prompt in PROMPTS]
+    assert inner.calls == 2 and recorder.name == "record:mock"
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{prompt_hash(p)}.json" for p in PROMPTS)
+
+    replay = RecordReplayProvider(str(tmp_path), "replay")
+    assert [asyncio.run(replay.complete(prompt)) for prompt in PROMPTS] == recorded
+    assert collect(replay.stream(PROMPTS[0])) == recorded[0]
+    assert inner.calls == 2
+
+
+def test_streamed_recordings_replay_whole(tmp_path):
+    recorder = RecordReplayProvider(str(tmp_path), "record", MockProvider(latency_ms=0))
+    streamed = collect(recorder.stream(PROMPTS[1]))
+    assert streamed == MockProvider.respond(PROMPTS[1])
+    assert asyncio.run(RecordReplayProvider(str(tmp_path), "replay").complete(PROMPTS[1])) == streamed
+
+
+def test_replay_miss_raises_lookup_error(tmp_path):
+    RecordReplayProvider(str(tmp_path), "record", MockProvider(latency_ms=0))
+    replay = RecordReplayProvider(str(tmp_path), "replay")
+    with pytest.raises(LookupError):
+        asyncio.run(replay.complete("never recorded"))
+    with pytest.raises(LookupError):
+        collect(replay.stream("never recorded"))
+
+
+def test_relative_directory_is_under_the_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_providers, "SERVICE_DIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path.parent)
+    provider = RecordReplayProvider("recordings", "replay")
+    assert provider.directory == os.path.join(str(tmp_path), "recordings")
+    assert os.path.isdir(provider.directory)
+
+
+def test_modes_and_interface_are_checked(tmp_path):
+    with pytest.raises(ValueError):
+        RecordReplayProvider(str(tmp_path), "playback")
+    with pytest.raises(ValueError):
+        RecordReplayProvider(str(tmp_path), "record")
+
+    class Incomplete(LLMProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
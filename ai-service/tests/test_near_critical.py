@@ -0,0 +1,98 @@
+"""
+K longest chains and task float against exhaustive path enumeration
+"""
+
+import random
+
+import pytest
+
+from models.schemas import DependencyInput
+from services import engine_jobs
+from services.near_critical import duration_days
+from services.rule_engine import RuleEngine, normalize_datetime
+
+
+def all_chains(engine):
+    """Every chain from a task without prerequisites to one without dependents"""
+    preds = {t: set(engine.depends_on.get(t, ())) for t in engine.tasks}
+    succs = {t: set(engine.dependents.get(t, ())) for t in engine.tasks}
+    chains = []
+
+    def extend(path):
+        if not succs[path[-1]]:
+            chains.append(list(path))
+        for s in succs[path[-1]]:
+            extend(path + [s])
+
+    for task_id in engine.tasks:
+        if not preds[task_id]:
+            extend([task_id])
+    return chains
+
+
+def chain_length(engine, chain):
+    return sum(duration_days(engine.tasks[t]) for t in chain)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_k_longest_match_enumeration(make_project, seed):
+    rng = random.Random(seed)
+    project = make_project(rng.randint(1, 12), seed=seed, deps_per_task=rng.choice([0.5, 1.5, 3]))
+    engine = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    chains = all_chains(engine)
+    lengths = sorted((chain_length(engine, c) for c in chains), reverse=True)
+
+    for k in (1, 3, 10):
+        paths = engine.path_schedule().longest_paths(k)
+        assert [length for _, length in paths] == lengths[:k]
+        assert len({tuple(path) for path, _ in paths}) == len(paths)
+        for path, length in paths:
+            assert path in chains
+            assert chain_length(engine, path) == length
+
+    path, length = engine.calculate_critical_path()
+    assert (length, path in chains) == (lengths[0], True)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_float_matches_longest_chain_through_each_task(make_project, seed):
+    project = make_project(random.Random(seed).randint(1, 12), seed=seed)
+    engine = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    schedule = engine.path_schedule()
+    chains = all_chains(engine)
+    longest = max(chain_length(engine, c) for c in chains)
+
+    for task_id in engine.tasks:
+        through = max(chain_length(engine, c) for c in chains if task_id in c)
+        assert schedule.float_days(task_id) == longest - through
+
+    _, floats = schedule.near_critical(3, 5)
+    assert {f.taskId for f in floats} == {t for t in engine.tasks if schedule.float_days(t) <= 5}
+    assert [f.floatDays for f in floats] == sorted(f.floatDays for f in floats)
+
+
+def test_cycle_edges_are_ignored(make_project):
+    project = make_project(8, seed=3, deps_per_task=2)
+    cyclic = project.existingDependencies + [
+        DependencyInput(id="back", taskId=project.tasks[0].id, dependsOnTaskId=project.tasks[-1].id)
+    ]
+    schedule = RuleEngine(tasks=project.tasks, dependencies=cyclic).path_schedule()
+
+    assert sorted(schedule.order) == sorted(t.id for t in project.tasks)
+    for path, length in schedule.longest_paths(5):
+        assert len(set(path)) == len(path)
+        assert sum(schedule.duration[t] for t in path) == length
+        assert length <= schedule.length
+
+
+def test_total_days_is_the_calendar_span(make_project):
+    for seed in range(20):
+        project = make_project(30, seed=seed)
+        engine = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+        response = engine_jobs.critical_path(project)
+        path = [engine.tasks[t] for t in response.criticalPathIds]
+
+        span = (normalize_datetime(path[-1].due_date) - normalize_datetime(path[0].createdAt)).days
+        assert response.totalDays == max(0, span)
+        assert response.durationDays == sum(duration_days(t) for t in path)
+        assert response.durationDays == response.nearCriticalPaths[0].lengthDays
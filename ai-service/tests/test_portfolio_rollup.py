@@ -0,0 +1,125 @@
+"""
+Portfolio rollup running sums against aggregates recomputed from scratch
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.schemas import TaskStatus
+from routers import analysis
+from services.portfolio_rollup import PortfolioRollup
+from services.rule_engine import RuleEngine, risk_level
+
+WORKSPACES = ["a", "b", None]
+
+
+def reference(scored, workspace_id, worst):
+    """Weighted score, total weight, worst projects and per-factor aggregates"""
+    projects = [item for item in scored.values() if (item[0].workspaceId or "default") == workspace_id]
+    if not projects:
+        return None
+    weight = {
+        project.id: max(1, sum(t.status != TaskStatus.DONE for t in project.tasks))
+        for project, _, _ in projects
+    }
+    total = sum(weight.values())
+    score = round(sum(weight[project.id] * s for project, s, _ in projects) / total)
+    ranking = [project_id for _, project_id in sorted((s, project.id) for project, s, _ in projects)[:worst]]
+
+    factors = {}
+    for project, _, project_factors in projects:
+        for name, factor in project_factors.items():
+            acc = factors.setdefault(name, [0, 0, 0, None])
+            acc[0] += weight[project.id] * factor["penalty"]
+            acc[1] += factor.get("count", 0)
+            acc[2] += factor["penalty"] > 0
+            if "maxDepth" in factor:
+                acc[3] = max(acc[3] or 0, factor["maxDepth"])
+    return score, total, ranking, {
+        name: (round(acc[0] / total, 2), acc[1], acc[2], acc[3]) for name, acc in factors.items()
+    }
+
+
+def observed(rollup, workspace_id, worst):
+    portfolio = rollup.portfolio(workspace_id, worst)
+    if portfolio.projectCount == 0:
+        assert portfolio.riskScore is None
+        return None
+    assert portfolio.riskLevel == risk_level(portfolio.riskScore)
+    assert sum(portfolio.levelCounts.values()) == portfolio.projectCount
+    return portfolio.riskScore, portfolio.totalWeight, [p.projectId for p in portfolio.worstProjects], {
+        f.factor: (f.avgPenalty, f.count, f.projectsAffected, f.maxDepth) for f in portfolio.factors
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_running_sums_match_recomputed_aggregates(make_project, seed):
+    rng = random.Random(seed)
+    rollup = PortfolioRollup()
+    scored = {}
+    projects = [make_project(rng.randint(5, 40), seed=seed * 100 + i, project_id=f"p{i}") for i in range(20)]
+
+    for _ in range(150):
+        project = rng.choice(projects)
+        if rng.random() < 0.15:
+            rollup.remove(project.id)
+            scored.pop(project.id, None)
+            continue
+        # Move between workspaces and drop tasks, so scores and weights change
+        project = project.model_copy(update={
+            "workspaceId": rng.choice(WORKSPACES),
+            "tasks": project.tasks[:rng.randint(1, len(project.tasks))]
+        })
+        score, level, factors = RuleEngine(project.tasks, project.existingDependencies).calculate_risk_score()
+        rollup.update(project, score, level, factors)
+        scored[project.id] = (project, score, factors)
+
+        for workspace_id in ("a", "b", "default"):
+            assert observed(rollup, workspace_id, 5) == reference(scored, workspace_id, 5)
+
+
+def test_retain_drops_projects_missing_from_a_refresh(make_project):
+    rollup = PortfolioRollup()
+    scored = {}
+    for i in range(8):
+        project = make_project(20, seed=i, project_id=f"p{i}", workspace_id="a" if i < 6 else "b")
+        score, level, factors = RuleEngine(project.tasks, project.existingDependencies).calculate_risk_score()
+        rollup.update(project, score, level, factors)
+        scored[project.id] = (project, score, factors)
+
+    assert rollup.retain("a", {"p0", "p1", "p2", "p3"}) == 2
+    for project_id in ("p4", "p5"):
+        del scored[project_id]
+    assert observed(rollup, "a", 10) == reference(scored, "a", 10)
+    assert observed(rollup, "b", 10) == reference(scored, "b", 10)
+
+    assert rollup.retain("a", set()) == 4
+    assert observed(rollup, "a", 10) is None
+
+
+def test_partial_refresh_keeps_the_other_projects(make_project, monkeypatch):
+    async def run_inline(endpoint, size, fn, *args, lane=None):
+        return fn(*args)
+
+    monkeypatch.setattr(analysis.cpu_scheduler, "run", run_inline)
+    monkeypatch.setattr(analysis, "portfolio_rollup", PortfolioRollup())
+    client = TestClient(app)
+    projects = [make_project(10, seed=i, project_id=f"p{i}").model_dump(mode="json") for i in range(4)]
+
+    def refresh(sent, **options):
+        return client.post("/api/v1/portfolio/refresh", json={"workspaceId": "w", "projects": sent, **options})
+
+    def ids():
+        body = client.get("/api/v1/portfolio/w", params={"projectIds": True}).json()
+        return sorted(body["projectIds"])
+
+    assert client.get("/api/v1/portfolio/w").json()["projectIds"] is None
+    assert client.get("/api/v1/portfolio/w", params={"projectIds": True}).json()["projectIds"] == []
+    refresh(projects[:2])
+    assert refresh(projects[2:3], replace=False).json()["projectCount"] == 3
+    assert ids() == ["p0", "p1", "p2"]
+    assert refresh(projects[3:]).json()["projectCount"] == 1
+    assert ids() == ["p3"]
@@ -0,0 +1,110 @@
+"""
+Profiles router: the secret check, profiled requests and downloads
+"""
+
+import os
+import pstats
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from main import app
+from routers import profiles
+from services import profiler
+from services.profiler import ProfileSession, ProfileStore
+
+SECRET = "let-me-profile"
+PROFILED = "/api/v1/portfolio/nowhere"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SECRET", SECRET)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_INTERVAL_MS", 1.0)
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    monkeypatch.setattr(profiles, "profile_store", store)
+    client = TestClient(app)
+    client.store = store
+    return client
+
+
+@pytest.mark.parametrize("header", [None, "", "wrong", SECRET + "x"])
+def test_profiles_need_the_secret(client, header):
+    headers = {} if header is None else {"X-Profile": header}
+    assert client.get("/api/v1/profiles", headers=headers).status_code == 403
+    assert client.get("/api/v1/profiles/anything", headers=headers).status_code == 403
+
+
+def test_no_configured_secret_denies_everyone(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SECRET", "")
+    assert client.get("/api/v1/profiles", headers={"X-Profile": ""}).status_code == 403
+    response = client.get(PROFILED, headers={"X-Profile": ""})
+    assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+
+
+def test_wrong_secret_is_not_profiled(client):
+    response = client.get(PROFILED, headers={"X-Profile": "wrong"})
+    assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+    assert client.store.list() == []
+
+
+def test_cprofile_round_trip(client, tmp_path):
+    response = client.get(PROFILED, headers={"X-Profile": SECRET, "X-Request-Id": "req/1 ok"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert profile_id == "req1ok"
+
+    listed = client.get("/api/v1/profiles", headers={"X-Profile": SECRET}).json()["profiles"]
+    assert [(p["id"], p["mode"], p["path"], p["statusCode"]) for p in listed] == [
+        (profile_id, "cprofile", PROFILED, 200)
+    ]
+
+    download = client.get(f"/api/v1/profiles/{profile_id}", headers={"X-Profile": SECRET})
+    assert download.status_code == 200
+    saved = tmp_path / "download.pstats"
+    saved.write_bytes(download.content)
+    assert pstats.Stats(str(saved)).total_calls > 0
+
+
+def test_sample_mode_downloads_collapsed_stacks(client):
+    response = client.get(PROFILED, params={"profile": SECRET, "profile_mode": "sample"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    download = client.get(f"/api/v1/profiles/{profile_id}", headers={"X-Profile": SECRET})
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/plain")
+    assert client.store.get(profile_id)["mode"] == "sample"
+
+
+def test_unknown_profile_is_404(client):
+    assert client.get("/api/v1/profiles/missing", headers={"X-Profile": SECRET}).status_code == 404
+
+
+def test_old_profiles_are_pruned(client):
+    ids = [client.get(PROFILED, headers={"X-Profile": SECRET}).headers["X-Profile-Id"] for _ in range(5)]
+    assert len(set(ids)) == 5
+    assert len(client.store.list()) == 3
+
+
+def test_failed_start_releases_the_store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+
+    def broken_start(self):
+        raise RuntimeError("profiler already active")
+
+    monkeypatch.setattr(ProfileSession, "start", broken_start)
+    with pytest.raises(RuntimeError):
+        store.begin("first", "cprofile", "/api/v1/x")
+
+    monkeypatch.undo()
+    session = store.begin("second", "sample", "/api/v1/x")
+    assert session is not None
+    session.finish(200)
+    assert store.get("second")["statusCode"] == 200
+
+
+def test_relative_directory_is_under_the_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "SERVICE_DIR", str(tmp_path))
+    assert ProfileStore("profiles", 3).directory == os.path.join(str(tmp_path), "profiles")
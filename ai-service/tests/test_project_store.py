@@ -0,0 +1,159 @@
+"""
+Direct read path over the sqlite:/// stand-in against the equivalent ProjectInput
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from main import app
+from models.schemas import DependencyType
+from routers import analysis
+from services.project_store import ProjectStore
+
+SCHEMA = """
+CREATE TABLE "User" (id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE "Project" (id TEXT PRIMARY KEY, name TEXT, description TEXT, "workspaceId" TEXT,
+                        start_date, end_date);
+CREATE TABLE "Task" (id TEXT PRIMARY KEY, "projectId" TEXT, title TEXT, description TEXT, status TEXT,
+                     priority TEXT, "assigneeId" TEXT, due_date, "createdAt");
+CREATE TABLE "TaskDependency" (id TEXT PRIMARY KEY, "taskId" TEXT, "dependsOnTaskId" TEXT, type TEXT);
+"""
+
+
+def epoch_ms(value):
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def named(project):
+    """Assignee names as the User join would return them"""
+    return project.model_copy(update={"tasks": [
+        t.model_copy(update={"assigneeName": f"Name {t.assigneeId}" if t.assigneeId != "u0" else None})
+        for t in project.tasks
+    ]})
+
+
+def write_db(path, projects):
+    """Prisma tables; dates alternate between ISO strings and epoch milliseconds"""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for project in projects:
+        conn.execute('INSERT INTO "Project" VALUES (?, ?, ?, ?, ?, ?)', (
+            project.id, project.name, project.description, project.workspaceId,
+            epoch_ms(project.start_date) if project.start_date else None,
+            project.end_date.isoformat() + "Z" if project.end_date else None
+        ))
+        for i, t in enumerate(project.tasks):
+            if t.assigneeName:
+                conn.execute('INSERT OR IGNORE INTO "User" VALUES (?, ?)', (t.assigneeId, t.assigneeName))
+            conn.execute('INSERT INTO "Task" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                t.id, project.id, t.title, t.description, t.status.value, t.priority.value, t.assigneeId,
+                t.due_date.isoformat() if i % 2 else epoch_ms(t.due_date),
+                t.createdAt.isoformat() if i % 2 else epoch_ms(t.createdAt)
+            ))
+        for i, d in enumerate(project.existingDependencies):
+            conn.execute('INSERT INTO "TaskDependency" VALUES (?, ?, ?, ?)', (
+                d.id, d.taskId, d.dependsOnTaskId, None if i % 3 == 0 else d.type.value
+            ))
+    conn.commit()
+    return conn
+
+
+def whole_ms(project):
+    """Dates at millisecond precision, so the epoch-ms rows decode exactly"""
+    def trim(value):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000) if value else value
+    return project.model_copy(update={
+        "start_date": trim(project.start_date),
+        "end_date": trim(project.end_date),
+        "tasks": [t.model_copy(update={"due_date": trim(t.due_date), "createdAt": trim(t.createdAt)})
+                  for t in project.tasks],
+        "existingDependencies": [
+            d.model_copy(update={"type": DependencyType.FINISH_TO_START if i % 3 == 0 else d.type})
+            for i, d in enumerate(project.existingDependencies)
+        ],
+    })
+
+
+def in_order(project):
+    return project.model_copy(update={
+        "tasks": sorted(project.tasks, key=lambda t: t.id),
+        "existingDependencies": sorted(project.existingDependencies, key=lambda d: d.id),
+    })
+
+
+def load(path, project_id):
+    async def run():
+        store = ProjectStore(f"sqlite:///{path}")
+        try:
+            return await store.load_project(project_id)
+        finally:
+            await store.close()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def projects(make_project):
+    first = make_project(40, seed=1, project_id="p1", workspace_id="w1").model_copy(update={
+        "description": "first", "start_date": datetime(2026, 3, 1, 9, 30), "end_date": datetime(2026, 9, 1)
+    })
+    second = make_project(15, seed=2, project_id="p2")
+    return [whole_ms(named(first)), whole_ms(named(second))]
+
+
+def test_loaded_project_equals_the_posted_one(tmp_path, projects):
+    path = tmp_path / "app.db"
+    write_db(path, projects).close()
+
+    for project in projects:
+        loaded = load(path, project.id)
+        assert in_order(loaded) == in_order(project)
+
+    assert load(path, "missing") is None
+
+
+@pytest.mark.parametrize("column, value", [
+    ("due_date", None),
+    ('"assigneeId"', None),
+    ("status", "BLOCKED"),
+    ("priority", "URGENT"),
+])
+def test_bad_task_rows_fail_validation(tmp_path, projects, column, value):
+    path = tmp_path / "app.db"
+    conn = write_db(path, projects)
+    conn.execute(f'UPDATE "Task" SET {column} = ? WHERE id = ?', (value, projects[0].tasks[3].id))
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ValidationError):
+        load(path, "p1")
+    assert in_order(load(path, "p2")) == in_order(projects[1])
+
+
+def test_bad_dependency_type_fails_validation(tmp_path, projects):
+    path = tmp_path / "app.db"
+    conn = write_db(path, projects)
+    conn.execute('UPDATE "TaskDependency" SET type = ? WHERE id = ?', ("SOMETIMES", projects[0].existingDependencies[1].id))
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ValidationError):
+        load(path, "p1")
+
+
+def test_bad_rows_are_a_422(tmp_path, projects, monkeypatch):
+    path = tmp_path / "app.db"
+    conn = write_db(path, projects)
+    conn.execute('UPDATE "Task" SET due_date = NULL WHERE "projectId" = ?', ("p1",))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(analysis, "project_store", ProjectStore(f"sqlite:///{path}"))
+
+    client = TestClient(app)
+    response = client.post("/api/v1/projects/p1/risk")
+    assert response.status_code == 422 and "p1" in response.json()["detail"]
+    assert client.post("/api/v1/projects/missing/risk").status_code == 404
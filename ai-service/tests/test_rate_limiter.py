@@ -0,0 +1,124 @@
+"""
+Provider limiter: lane order, refill rate, cancelled waiters and queue budgets
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.rate_limiter import Lane, ProviderLimiter, QueueBudgetExceeded, TokenBucket
+
+
+def drained(rpm, tpm=0):
+    """A limiter with no request quota left; tpm 0 leaves tokens unlimited"""
+    limiter = ProviderLimiter("test", rpm, tpm)
+    limiter.requests.drain(time.monotonic())
+    return limiter
+
+
+def test_bucket_refills_at_the_configured_rate():
+    bucket = TokenBucket(per_minute=60)
+    bucket.updated = 0.0
+    bucket.consume(60, now=0.0)
+
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(3, now=1.0) == pytest.approx(2.0)
+    # Never above capacity, and oversized requests only need a full bucket
+    assert bucket.wait_time(0, now=1000.0) == 0 and bucket.tokens == 60
+    assert bucket.wait_time(500, now=1000.0) == 0
+    assert TokenBucket(per_minute=0).wait_time(10 ** 9, now=0.0) == 0
+
+
+def test_interactive_is_admitted_before_background():
+    limiter = drained(rpm=1200)  # one request every 50ms
+    admitted = []
+
+    async def call(name, lane):
+        await limiter.acquire(1, lane, budget=5.0)
+        admitted.append(name)
+
+    async def run():
+        waiters = []
+        for name, lane in [("bg1", Lane.BACKGROUND), ("batch", Lane.BATCH), ("bg2", Lane.BACKGROUND),
+                           ("ui1", Lane.INTERACTIVE), ("ui2", Lane.INTERACTIVE)]:
+            waiters.append(asyncio.create_task(call(name, lane)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(run())
+    assert admitted == ["ui1", "ui2", "batch", "bg1", "bg2"]
+
+
+def test_queued_waiters_are_admitted_at_the_refill_rate():
+    limiter = drained(rpm=600)  # one request every 100ms
+
+    async def run():
+        started = time.monotonic()
+        times = []
+
+        async def call():
+            await limiter.acquire(1, Lane.INTERACTIVE, budget=5.0)
+            times.append(time.monotonic() - started)
+
+        await asyncio.gather(*(call() for _ in range(4)))
+        return times
+
+    times = asyncio.run(run())
+    assert times[0] >= 0.09
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert all(0.08 <= gap <= 0.2 for gap in gaps)
+
+
+@pytest.mark.parametrize("how", ["cancel", "budget"])
+def test_abandoned_waiter_spends_no_quota(how):
+    limiter = drained(rpm=600)
+
+    async def run():
+        first = asyncio.create_task(limiter.acquire(1, Lane.INTERACTIVE, budget=0.03 if how == "budget" else 5.0))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(limiter.acquire(1, Lane.BACKGROUND, budget=5.0))
+        await asyncio.sleep(0.01)
+        if how == "cancel":
+            first.cancel()
+        started = time.monotonic()
+        await second
+        waited = time.monotonic() - started
+        with pytest.raises(asyncio.CancelledError if how == "cancel" else QueueBudgetExceeded):
+            await first
+        return waited
+
+    waited = asyncio.run(run())
+    # The second waiter gets the first refilled request, not the one after it
+    assert waited < 0.15
+    assert limiter.requests.tokens < 0.5
+    assert limiter.stats()["queued"] == {"interactive": 0, "batch": 0, "background": 0}
+
+
+def test_budget_bounds_the_queue_wait():
+    limiter = drained(rpm=6)  # one request every 10s
+
+    async def run():
+        with pytest.raises(QueueBudgetExceeded):
+            await limiter.acquire(1, Lane.INTERACTIVE, budget=0)
+
+        started = time.monotonic()
+        with pytest.raises(QueueBudgetExceeded, match="background lane"):
+            await limiter.acquire(1, Lane.BACKGROUND, budget=0.05)
+        return time.monotonic() - started
+
+    assert 0.04 <= asyncio.run(run()) < 0.5
+    assert limiter.stats()["queued"]["background"] == 0
+
+
+def test_token_quota_gates_large_prompts():
+    limiter = ProviderLimiter("test", rpm=0, tpm=60_000)  # 1000 tokens/s
+
+    async def run():
+        await limiter.acquire(60_000, Lane.INTERACTIVE, budget=1.0)
+        started = time.monotonic()
+        await limiter.acquire(100, Lane.INTERACTIVE, budget=1.0)
+        return time.monotonic() - started
+
+    assert 0.08 <= asyncio.run(run()) < 0.3
@@ -0,0 +1,144 @@
+"""
+Single-flight response cache and the ETag handling of the analysis endpoints
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.schemas import RiskScoreResponse
+from routers import analysis
+from services.response_cache import ResponseCache, etag_matches, response_cache
+
+
+def test_sources_are_miss_coalesced_then_hit():
+    cache = ResponseCache(ttl_seconds=60, max_entries=8)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        first = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)))
+        return first, await cache.get_or_compute("k", compute)
+
+    first, later = asyncio.run(run())
+    assert sorted(source for _, source in first) == ["COALESCED", "COALESCED", "MISS"]
+    assert later == ("value", "HIT")
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    cache = ResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def compute():
+            await gate.wait()
+            return "value"
+
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, cache.get("k")
+
+    assert asyncio.run(run()) == (("value", "COALESCED"), "value")
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    cache = ResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        results = await asyncio.gather(
+            *(cache.get_or_compute("k", compute) for _ in range(2)), return_exceptions=True
+        )
+        return results, cache.get("k"), cache._inflight
+
+    results, cached, inflight = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cached is None and not inflight
+
+
+def test_uncacheable_values_are_not_stored():
+    cache = ResponseCache(ttl_seconds=60, max_entries=8)
+
+    async def compute():
+        return {"success": False}
+
+    async def run():
+        await cache.get_or_compute("k", compute, cacheable=lambda v: v["success"])
+        return await cache.get_or_compute("k", compute, cacheable=lambda v: v["success"])
+
+    assert asyncio.run(run())[1] == "MISS"
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('W/"abc"', True), ('"abc"', True), ('"x", W/"abc"', True), ("*", True), ('"abcd"', False), ("", False),
+])
+def test_weak_etag_comparison(header, matches):
+    assert etag_matches(header, 'W/"abc"') is matches
+
+
+@pytest.fixture
+def client(monkeypatch):
+    response_cache._entries.clear()
+    calls = []
+
+    async def calculate_risk(project):
+        calls.append(project.id)
+        if project.name == "broken":
+            return RiskScoreResponse(success=False, error="engine failed")
+        return RiskScoreResponse(success=True, riskScore=80, riskLevel="LOW", factors={})
+
+    monkeypatch.setattr(analysis, "_calculate_risk", calculate_risk)
+    client = TestClient(app)
+    client.calls = calls
+    yield client
+    response_cache._entries.clear()
+
+
+def test_etag_revalidates_with_304(client, make_project):
+    body = {"project": make_project(5).model_dump(mode="json")}
+
+    first = client.post("/api/v1/risk/calculate", json=body)
+    assert first.status_code == 200 and first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    second = client.post("/api/v1/risk/calculate", json=body)
+    assert (second.headers["X-Cache"], second.headers["ETag"]) == ("HIT", etag)
+
+    revalidated = client.post("/api/v1/risk/calculate", json=body, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == etag
+    assert client.calls == ["p1"]
+
+    other = client.post("/api/v1/risk/calculate", json={"project": make_project(6).model_dump(mode="json")},
+                        headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+
+
+def test_failures_are_no_store_without_etag(client, make_project):
+    project = make_project(5).model_copy(update={"name": "broken"})
+    body = {"project": project.model_dump(mode="json")}
+
+    for _ in range(2):
+        response = client.post("/api/v1/risk/calculate", json=body)
+        assert response.json()["success"] is False
+        assert response.headers["Cache-Control"] == "no-store"
+        assert response.headers["X-Cache"] == "MISS"
+        assert "ETag" not in response.headers
+    assert len(client.calls) == 2
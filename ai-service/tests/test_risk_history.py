@@ -0,0 +1,113 @@
+"""
+Risk history buckets, trends, dedupe and pruning against plain Python references
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.risk_history import RiskHistoryStore, to_epoch
+
+START = datetime(2026, 1, 1)
+FACTORS = {"overdue": {"count": 2, "penalty": 10, "taskIds": ["t1", "t2"]}}
+
+
+@pytest.fixture
+def store():
+    # No retention: the fixed dates below are older than any wall-clock window
+    store = RiskHistoryStore(":memory:")
+    yield store
+    store.close()
+
+
+def random_snapshots(seed, count=300):
+    rng = random.Random(seed)
+    return [
+        {
+            "analyzed_at": START + timedelta(seconds=rng.randint(0, 20 * 86400)),
+            "risk_score": rng.randint(0, 100),
+            "critical_path_length": rng.randint(0, 40),
+            "open_tasks": rng.randint(0, 200)
+        }
+        for _ in range(count)
+    ]
+
+
+def fill(store, snapshots, project_id="p1"):
+    for snap in snapshots:
+        store.append(
+            project_id, snap["analyzed_at"], snap["risk_score"], "LOW",
+            snap["critical_path_length"], 200, snap["open_tasks"], FACTORS
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("bucket_seconds", [3600, 86400, 7 * 86400])
+def test_history_buckets_match_brute_force(store, seed, bucket_seconds):
+    snapshots = random_snapshots(seed)
+    fill(store, snapshots)
+    fill(store, random_snapshots(seed + 100, 50), project_id="other")
+    since, until = START + timedelta(days=3), START + timedelta(days=15)
+
+    buckets = {}
+    for snap in snapshots:
+        ts = to_epoch(snap["analyzed_at"])
+        if to_epoch(since) <= ts < to_epoch(until):
+            buckets.setdefault(int(ts // bucket_seconds), []).append(snap)
+
+    points = store.history("p1", since, until, bucket_seconds)
+    assert [p["ts"] for p in points] == [b * bucket_seconds for b in sorted(buckets)]
+    for point in points:
+        rows = buckets[point["ts"] // bucket_seconds]
+        scores = [r["risk_score"] for r in rows]
+        assert point["samples"] == len(rows)
+        assert point["riskScore"] == pytest.approx(sum(scores) / len(rows))
+        assert (point["minRiskScore"], point["maxRiskScore"]) == (min(scores), max(scores))
+        assert point["openTasks"] == pytest.approx(sum(r["open_tasks"] for r in rows) / len(rows))
+
+
+def test_rolling_average_and_velocity(store):
+    # Open tasks fall by 5 a day and the score climbs by 2 a day
+    for day in range(10):
+        store.append("p1", START + timedelta(days=day), 40 + 2 * day, "MEDIUM", 10, 100, 100 - 5 * day, FACTORS)
+
+    trend = store.trend("p1", START, START + timedelta(days=10), 86400, window=3)
+    scores = [p["riskScore"] for p in trend["points"]]
+    for i, point in enumerate(trend["rolling"]):
+        window = scores[max(0, i - 2):i + 1]
+        assert point["value"] == pytest.approx(sum(window) / len(window))
+    assert trend["riskVelocity"] == pytest.approx(2.0)
+    assert trend["burnDownVelocity"] == pytest.approx(5.0)
+    assert trend["projectedCompletionDays"] == pytest.approx(55 / 5.0)
+
+
+def test_skip_if_unchanged_only_drops_repeats_of_the_latest(store):
+    def write(day, score):
+        return store.append(
+            "p1", START + timedelta(days=day), score, "LOW", 3, 10, 5, FACTORS, skip_if_unchanged=True
+        )
+
+    assert write(0, 80) is True
+    assert write(1, 80) is False
+    assert write(2, 70) is True
+    assert write(3, 80) is True
+    assert write(4, 80) is False
+
+    latest = store.latest("p1")
+    assert latest["analyzedAt"] == START + timedelta(days=3)
+    assert latest["factors"] == {"overdue": {"count": 2, "penalty": 10}}
+    assert sum(p["samples"] for p in store.history("p1", START, START + timedelta(days=10), 86400)) == 3
+
+
+def test_prune_drops_rows_past_retention(store):
+    snapshots = random_snapshots(3)
+    fill(store, snapshots)
+    store.retention_days = 30
+    now = START + timedelta(days=40)
+    cutoff = to_epoch(now) - 30 * 86400
+
+    expected = sum(1 for s in snapshots if to_epoch(s["analyzed_at"]) < cutoff)
+    assert store.prune(now) == expected
+    remaining = store.history("p1", START, now, 86400)
+    assert sum(p["samples"] for p in remaining) == len(snapshots) - expected
@@ -0,0 +1,234 @@
+"""
+Risk scheduler refreshes driven directly: staggering, backoff, eviction,
+edge-triggered alerts and snapshot refreshes without a database
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from config import settings
+from models.schemas import RiskAnalysis
+from services import risk_scheduler as scheduler_module
+from services.admission import Overloaded
+from services.response_cache import response_cache
+from services.risk_scheduler import RiskScheduler
+
+INTERVAL = 100.0
+JITTER = 0.1
+
+
+class FakeStore:
+    """project_store stand-in; `projects` maps id -> project (missing = deleted)"""
+
+    def __init__(self, projects=None, enabled=True):
+        self.projects = projects or {}
+        self.enabled = enabled
+        self.loads = []
+
+    async def load_project(self, project_id):
+        self.loads.append(project_id)
+        return self.projects.get(project_id)
+
+
+class FakeAnalysis:
+    """run_analysis stand-in: scores come from `scores`, or it raises `error`"""
+
+    def __init__(self):
+        self.scores = {}
+        self.error = None
+        self.calls = []
+
+    async def __call__(self, project, lane, endpoint, suggestions=None, dedupe_history=False):
+        self.calls.append((project.id, suggestions))
+        if self.error:
+            raise self.error
+        return analysis_for(project, self.scores.get(project.id, 90))
+
+
+def analysis_for(project, score):
+    return RiskAnalysis(
+        projectId=project.id, riskScore=score, riskLevel="low", criticalPathIds=[],
+        bottlenecks=[], alerts=[], suggestedDependencies=[], resourceConflicts=[],
+        analyzedAt=datetime.utcnow()
+    )
+
+
+@pytest.fixture
+def env(monkeypatch):
+    store, analysis, alerts = FakeStore(), FakeAnalysis(), []
+
+    async def send_risk_alert(project_id, project_name, risk_score, risk_level):
+        alerts.append((project_id, risk_score))
+
+    monkeypatch.setattr(scheduler_module, "project_store", store)
+    monkeypatch.setattr(scheduler_module, "run_analysis", analysis)
+    monkeypatch.setattr(scheduler_module, "send_risk_alert", send_risk_alert)
+    monkeypatch.setattr(settings, "RISK_ALERT_THRESHOLD", 50)
+    response_cache._entries.clear()
+    yield store, analysis, alerts
+    response_cache._entries.clear()
+
+
+def make_scheduler(**overrides):
+    options = dict(interval=INTERVAL, jitter=JITTER, concurrency=2, max_projects=50, idle_ttl=1000.0)
+    options.update(overrides)
+    return RiskScheduler(**options)
+
+
+def refresh(scheduler, *watched):
+    """Run _refresh for each project in turn, with the slots start() would create"""
+    async def run():
+        scheduler._slots = asyncio.Semaphore(scheduler.concurrency)
+        for w in watched:
+            w.running = True
+            await scheduler._refresh(w)
+        # Let spawned alert tasks finish
+        await asyncio.gather(*scheduler._background)
+    asyncio.run(run())
+
+
+def delay_of(watched):
+    return watched.next_run - time.monotonic()
+
+
+def test_first_runs_are_staggered_across_the_interval():
+    scheduler = make_scheduler(max_projects=1000)
+    before = time.monotonic()
+    offsets = [scheduler.register(f"project-{i}").next_run - before for i in range(400)]
+
+    # Spread over the interval, capped at a minute so long intervals still start soon
+    spread = min(INTERVAL, 60.0)
+    assert all(0 <= o < spread + 1 for o in offsets)
+    # Roughly uniform: every tenth of the spread gets some projects
+    buckets = {int(o // (spread / 10)) for o in offsets}
+    assert buckets == set(range(10))
+    # Deterministic per id, so a restart keeps the same spread
+    assert make_scheduler()._stagger("project-7") == scheduler._stagger("project-7")
+
+
+def test_failures_back_off_and_success_resets(env, make_project):
+    store, analysis, _ = env
+    project = make_project(5)
+    store.projects[project.id] = project
+    scheduler = make_scheduler()
+    watched = scheduler.register(project.id)
+    random.seed(3)
+
+    analysis.error = RuntimeError("LLM down")
+    for failures in range(1, 6):
+        refresh(scheduler, watched)
+        assert watched.failures == failures and not watched.running
+        factor = min(2 ** failures, 8)
+        assert INTERVAL * (1 - JITTER) * factor - 1 <= delay_of(watched) <= INTERVAL * (1 + JITTER) * factor
+    assert scheduler.stats()["failing"] == 1
+
+    # Shedding is not a failure: no extra backoff
+    analysis.error = Overloaded("analyze", "background", 5)
+    refresh(scheduler, watched)
+    assert watched.failures == 5
+
+    analysis.error = None
+    refresh(scheduler, watched)
+    assert watched.failures == 0 and watched.analysis.riskScore == 90
+    assert delay_of(watched) <= INTERVAL * (1 + JITTER)
+    assert scheduler.stats() == {"watched": 1, "running": 0, "warm": 1, "failing": 0}
+
+
+def test_deleted_projects_are_unwatched(env, make_project):
+    store, analysis, _ = env
+    scheduler = make_scheduler()
+    watched = scheduler.register("gone")
+    refresh(scheduler, watched)
+    assert store.loads == ["gone"] and analysis.calls == []
+    assert scheduler.latest("gone") is None and scheduler.stats()["watched"] == 0
+
+
+def test_idle_and_excess_projects_are_evicted(env):
+    scheduler = make_scheduler(max_projects=3, idle_ttl=60.0)
+    for i in range(3):
+        scheduler.register(f"p{i}")
+    scheduler._projects["p0"].last_seen -= 61
+    scheduler._evict()
+    assert sorted(scheduler._projects) == ["p1", "p2"]
+
+    scheduler._projects["p1"].last_seen -= 30
+    scheduler.register("p3")
+    scheduler.register("p4")
+    # Over the cap: the least recently seen goes first
+    assert sorted(scheduler._projects) == ["p2", "p3", "p4"]
+
+
+def test_refreshes_do_not_keep_a_project_alive(env, make_project):
+    store, _, _ = env
+    project = make_project(5)
+    store.projects[project.id] = project
+    scheduler = make_scheduler(idle_ttl=60.0)
+    watched = scheduler.register(project.id)
+    watched.last_seen -= 50
+
+    refresh(scheduler, watched)
+    assert time.monotonic() - watched.last_seen >= 50
+    watched.last_seen -= 20
+    scheduler._evict()
+    assert scheduler.stats()["watched"] == 0
+
+
+def test_alerts_fire_only_when_crossing_below(env, make_project):
+    store, analysis, alerts = env
+    project = make_project(5)
+    store.projects[project.id] = project
+    scheduler = make_scheduler()
+    watched = scheduler.register(project.id)
+
+    for score in [90, 40, 30, 45, 80, 20, 20]:
+        analysis.scores[project.id] = score
+        refresh(scheduler, watched)
+    assert alerts == [(project.id, 40), (project.id, 20)]
+
+
+def test_suggestions_are_reused_while_the_text_is_unchanged(env, make_project):
+    store, analysis, _ = env
+    project = make_project(5)
+    store.projects[project.id] = project
+    scheduler = make_scheduler()
+    watched = scheduler.register(project.id)
+
+    refresh(scheduler, watched)
+    refresh(scheduler, watched)
+    renamed = project.model_copy(update={"tasks": [
+        project.tasks[0].model_copy(update={"title": "something else"}), *project.tasks[1:]
+    ]})
+    store.projects[project.id] = renamed
+    refresh(scheduler, watched)
+    assert [s is not None for _, s in analysis.calls] == [False, True, False]
+
+
+def test_snapshots_are_refreshed_once_without_a_database(env, make_project):
+    store, analysis, _ = env
+    store.enabled = False
+    project = make_project(5)
+    scheduler = make_scheduler()
+    watched = scheduler.register(project.id, project)
+
+    for _ in range(3):
+        refresh(scheduler, watched)
+    assert [p for p, _ in analysis.calls] == [project.id]
+    assert store.loads == []
+
+    # A newer snapshot from a request gets its own refresh
+    scheduler.register(project.id, project.model_copy(update={"name": "renamed"}))
+    refresh(scheduler, watched)
+    refresh(scheduler, watched)
+    assert len(analysis.calls) == 2
+
+    # A failed refresh is retried
+    scheduler.register(project.id, project)
+    analysis.error = RuntimeError("boom")
+    refresh(scheduler, watched)
+    analysis.error = None
+    refresh(scheduler, watched)
+    assert len(analysis.calls) == 4
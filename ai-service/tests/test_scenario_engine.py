@@ -0,0 +1,196 @@
+"""
+ScenarioEngine overlays against a RuleEngine rebuilt from the changed project
+"""
+
+import random
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.schemas import DependencyInput, WhatIfChange, WhatIfChangeType
+from routers import analysis
+from services.near_critical import duration_days
+from services.rule_engine import RuleEngine
+from services.scenario_engine import DependencyCycleError, ScenarioEngine
+
+
+def random_changes(project, rng, count):
+    task_ids = [t.id for t in project.tasks]
+    changes = []
+    for _ in range(count):
+        kind = rng.choice(list(WhatIfChangeType))
+        task_id = rng.choice(task_ids)
+        if kind == WhatIfChangeType.DELAY:
+            changes.append(WhatIfChange(type=kind, taskId=task_id, days=rng.randint(-10, 30)))
+        elif kind == WhatIfChangeType.SET_STATUS:
+            changes.append(WhatIfChange(type=kind, taskId=task_id, status=rng.choice(["TODO", "IN_PROGRESS", "DONE"])))
+        elif kind == WhatIfChangeType.REASSIGN:
+            changes.append(WhatIfChange(type=kind, taskId=task_id, assigneeId=f"u{rng.randint(0, 6)}"))
+        elif kind == WhatIfChangeType.ADD_DEPENDENCY:
+            # Only forward edges, so the rebuilt graph stays a DAG
+            i, j = sorted(rng.sample(range(len(task_ids)), 2))
+            changes.append(WhatIfChange(type=kind, taskId=task_ids[j], dependsOnTaskId=task_ids[i]))
+        else:
+            dep = rng.choice(project.existingDependencies)
+            changes.append(WhatIfChange(type=kind, taskId=dep.taskId, dependsOnTaskId=dep.dependsOnTaskId))
+    return changes
+
+
+def rebuild(project, changes):
+    """The project with the changes applied, as plain task and edge lists"""
+    tasks = {t.id: t for t in project.tasks}
+    edges = [(d.taskId, d.dependsOnTaskId) for d in project.existingDependencies]
+    for change in changes:
+        task = tasks[change.taskId]
+        if change.type == WhatIfChangeType.DELAY:
+            tasks[task.id] = task.model_copy(update={"due_date": task.due_date + timedelta(days=change.days)})
+        elif change.type == WhatIfChangeType.SET_STATUS:
+            tasks[task.id] = task.model_copy(update={"status": change.status})
+        elif change.type == WhatIfChangeType.REASSIGN:
+            tasks[task.id] = task.model_copy(update={"assigneeId": change.assigneeId, "assigneeName": None})
+        elif change.type == WhatIfChangeType.ADD_DEPENDENCY:
+            if (change.taskId, change.dependsOnTaskId) not in edges:
+                edges.append((change.taskId, change.dependsOnTaskId))
+        elif (change.taskId, change.dependsOnTaskId) in edges:
+            edges.remove((change.taskId, change.dependsOnTaskId))
+    dependencies = [
+        DependencyInput(id=f"e{i}", taskId=task_id, dependsOnTaskId=upstream)
+        for i, (task_id, upstream) in enumerate(edges)
+    ]
+    return list(tasks.values()), dependencies
+
+
+def summary(engine):
+    score, level, factors = engine.calculate_risk_score()
+    return {
+        "score": score,
+        "level": level,
+        "factors": {name: (f.get("count"), f.get("maxDepth"), f["penalty"]) for name, f in factors.items()},
+        "overdue": set(engine.detect_overdue_tasks()),
+        "blocked": set(engine.detect_blocked_tasks()),
+        "at_risk": set(engine._detect_at_risk_tasks()),
+        "conflicts": {user: set(c.taskIds) for user, c in engine.conflicts_by_user().items()},
+    }
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_overlay_matches_rebuilt_engine(make_project, seed):
+    rng = random.Random(seed)
+    project = make_project(rng.randint(5, 60), seed=seed, users=6)
+    base = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    changes = random_changes(project, rng, rng.randint(1, 5))
+
+    scenario = ScenarioEngine(base, changes)
+    tasks, dependencies = rebuild(project, changes)
+    rebuilt = RuleEngine(tasks=tasks, dependencies=dependencies)
+
+    assert summary(scenario) == summary(rebuilt)
+
+    # Ties may pick a different chain; the length and the chain itself must be valid
+    path, length = scenario.calculate_critical_path()
+    _, expected_length = rebuilt.calculate_critical_path()
+    assert length == expected_length
+    assert sum(duration_days(scenario.tasks[t]) for t in path) == length
+    for upstream, task_id in zip(path, path[1:]):
+        assert upstream in scenario.depends_on[task_id]
+
+
+def test_overlay_leaves_base_untouched(make_project):
+    project = make_project(40, seed=7)
+    base = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    before = summary(base), base.calculate_critical_path()
+
+    dep = project.existingDependencies[0]
+    ScenarioEngine(base, [
+        WhatIfChange(type=WhatIfChangeType.DELAY, taskId=project.tasks[0].id, days=20),
+        WhatIfChange(type=WhatIfChangeType.SET_STATUS, taskId=project.tasks[1].id, status="DONE"),
+        WhatIfChange(type=WhatIfChangeType.REMOVE_DEPENDENCY, taskId=dep.taskId, dependsOnTaskId=dep.dependsOnTaskId),
+    ]).calculate_risk_score()
+
+    assert (summary(base), base.calculate_critical_path()) == before
+
+
+def test_empty_scenario_keeps_baseline_path(make_project):
+    for seed in range(20):
+        project = make_project(30, seed=seed)
+        base = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+        assert ScenarioEngine(base, []).calculate_critical_path() == base.calculate_critical_path()
+
+
+def test_unknown_task_is_rejected(make_project):
+    base = RuleEngine(tasks=make_project(5).tasks, dependencies=[])
+    with pytest.raises(ValueError):
+        ScenarioEngine(base, [WhatIfChange(type=WhatIfChangeType.DELAY, taskId="missing", days=1)])
+
+
+def with_back_edges(project, rng, count):
+    """The project plus reversed copies of some edges, each closing a cycle"""
+    back = [
+        DependencyInput(id=f"back{i}", taskId=dep.dependsOnTaskId, dependsOnTaskId=dep.taskId)
+        for i, dep in enumerate(rng.sample(project.existingDependencies, count))
+    ]
+    return project.model_copy(update={"existingDependencies": project.existingDependencies + back})
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_cyclic_base_matches_rebuilt_engine(make_project, seed):
+    rng = random.Random(seed)
+    project = with_back_edges(make_project(rng.randint(5, 40), seed=seed, users=6), rng, rng.randint(1, 4))
+    base = RuleEngine(tasks=project.tasks, dependencies=project.existingDependencies)
+    assert base.path_schedule().cyclic
+    changes = [
+        c for c in random_changes(project, rng, rng.randint(1, 6))
+        if c.type != WhatIfChangeType.ADD_DEPENDENCY
+    ]
+
+    scenario = ScenarioEngine(base, changes)
+    rebuilt = RuleEngine(*rebuild(project, changes))
+    assert summary(scenario) == summary(rebuilt)
+    assert scenario.calculate_critical_path() == rebuilt.calculate_critical_path()
+
+
+def test_edits_closing_a_cycle_are_rejected(make_project):
+    project = make_project(10, seed=2, deps_per_task=0)
+    first, second, third = (t.id for t in project.tasks[:3])
+    base = RuleEngine(tasks=project.tasks, dependencies=[])
+    chain = [
+        WhatIfChange(type=WhatIfChangeType.ADD_DEPENDENCY, taskId=second, dependsOnTaskId=first),
+        WhatIfChange(type=WhatIfChangeType.ADD_DEPENDENCY, taskId=third, dependsOnTaskId=second),
+    ]
+    ScenarioEngine(base, chain)
+
+    for closing in [(first, third), (first, first)]:
+        change = WhatIfChange(type=WhatIfChangeType.ADD_DEPENDENCY, taskId=closing[0], dependsOnTaskId=closing[1])
+        with pytest.raises(DependencyCycleError):
+            ScenarioEngine(base, chain + [change])
+
+    # Removing the middle edge first makes the same edit acyclic
+    unlink = WhatIfChange(type=WhatIfChangeType.REMOVE_DEPENDENCY, taskId=third, dependsOnTaskId=second)
+    close = WhatIfChange(type=WhatIfChangeType.ADD_DEPENDENCY, taskId=first, dependsOnTaskId=third)
+    ScenarioEngine(base, chain + [unlink, close])
+
+
+def test_cycle_is_a_422(make_project, monkeypatch):
+    async def run_inline(endpoint, size, fn, *args, lane=None):
+        return fn(*args)
+
+    monkeypatch.setattr(analysis.cpu_scheduler, "run", run_inline)
+    project = make_project(5, seed=1, deps_per_task=0)
+    a, b = project.tasks[0].id, project.tasks[1].id
+    body = {
+        "project": project.model_dump(mode="json"),
+        "scenarios": [{"name": "loop", "changes": [
+            {"type": "ADD_DEPENDENCY", "taskId": a, "dependsOnTaskId": b},
+            {"type": "ADD_DEPENDENCY", "taskId": b, "dependsOnTaskId": a},
+        ]}]
+    }
+
+    response = TestClient(app).post("/api/v1/what-if", json=body)
+    assert response.status_code == 422
+    assert "cycle" in response.json()["detail"]
+
+    body["scenarios"][0]["changes"].pop()
+    response = TestClient(app).post("/api/v1/what-if", json=body)
+    assert response.status_code == 200 and response.json()["scenarios"][0]["success"]
@@ -0,0 +1,92 @@
+"""
+Incremental dependency parsing against json.loads over random chunkings
+"""
+
+import json
+import random
+
+import pytest
+
+from services.stream_parser import IncrementalDependencyParser
+
+# Characters that stress the scanner's string and escape tracking
+TRICKY = ['{', '}', '[', ']', '"', '\\', '\\"', ',', ':', 'é', '\n', ' ', 'x']
+
+
+def random_string(rng):
+    return "".join(rng.choice(TRICKY) for _ in range(rng.randint(0, 8)))
+
+
+def random_value(rng, depth=0):
+    kind = rng.randint(0, 5 if depth < 3 else 2)
+    if kind == 0:
+        return random_string(rng)
+    if kind == 1:
+        return rng.choice([rng.randint(-5, 5), rng.random(), True, None])
+    if kind == 2:
+        return rng.random() < 0.5
+    if kind == 3:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return {random_string(rng): random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))}
+
+
+def random_dependency(rng):
+    dependency = {
+        "taskId": f"t{rng.randint(0, 99)}",
+        "dependsOnTaskId": f"t{rng.randint(0, 99)}",
+        "confidence": round(rng.random(), 2),
+        "reason": random_string(rng)
+    }
+    for _ in range(rng.randint(0, 2)):
+        dependency[random_string(rng)] = random_value(rng)
+    return dependency
+
+
+def random_chunks(text, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.choice([1, 1, 2, 3, 7, 20, 100])
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def parse_streamed(chunks):
+    parser = IncrementalDependencyParser()
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    return parser, emitted
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_streamed_objects_match_json_loads(seed):
+    rng = random.Random(seed)
+    document = {"dependencies": [random_dependency(rng) for _ in range(rng.randint(0, 6))]}
+    if rng.random() < 0.5:
+        document = {"summary": random_value(rng), **document, "notes": random_value(rng)}
+    body = json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2]))
+    text = rng.choice(["", "Here you go:\n```json\n"]) + body + rng.choice(["", "\n```\nDone { ["])
+
+    parser, emitted = parse_streamed(random_chunks(text, rng))
+    assert emitted == json.loads(body)["dependencies"]
+    assert parser.finished
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    first, second = {"taskId": "a", "reason": "}"}, {"taskId": "b", "reason": "{\"x"}
+    text = json.dumps({"dependencies": [first, second]})
+    parser = IncrementalDependencyParser()
+    first_end = text.index(json.dumps(first)) + len(json.dumps(first))
+
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [first]
+    assert parser.feed(text[first_end:]) == [second]
+    assert parser.finished
+    assert parser.feed("more") == []
+
+
+def test_malformed_object_is_skipped():
+    parser, emitted = parse_streamed(['{"dependencies": [{"a": 1,}, ', '{"b": 2}]}'])
+    assert emitted == [{"b": 2}]
+    assert parser.finished
@@ -0,0 +1,145 @@
+"""
+Timeline row packing, paging and summaries against per-day references
+"""
+
+import random
+from datetime import timedelta
+
+import pytest
+
+from models.schemas import TaskStatus, TimelineRequest
+from services import timeline_layout
+from services.rule_engine import RuleEngine
+from services.timeline_layout import TimelineLayout, cached_layout, pack_rows, timeline_page
+
+
+def peak_overlap(spans):
+    return max((sum(1 for s, e, _ in spans if s <= point < e) for point, _, _ in spans), default=0)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_pack_rows_uses_peak_overlap_rows(seed):
+    rng = random.Random(seed)
+    spans = []
+    for i in range(rng.randint(1, 80)):
+        start = rng.randint(0, 100)
+        spans.append((start, start + rng.randint(1, 30), f"t{i}"))
+
+    rows = pack_rows(spans)
+    assert set(rows) == {task_id for _, _, task_id in spans}
+    assert max(rows.values()) + 1 == peak_overlap(spans)
+
+    by_row = {}
+    for start, end, task_id in spans:
+        by_row.setdefault(rows[task_id], []).append((start, end))
+    for row_spans in by_row.values():
+        row_spans.sort()
+        for (_, end), (start, _) in zip(row_spans, row_spans[1:]):
+            assert end <= start
+
+
+@pytest.mark.parametrize("swimlane", ["assignee", "status", "priority", "none"])
+def test_lanes_pack_their_own_tasks(make_project, swimlane):
+    project = make_project(150, seed=4)
+    layout = TimelineLayout(RuleEngine(project.tasks, project.existingDependencies), swimlane)
+
+    offset = 0
+    for lane in layout.lanes:
+        assert lane.rowOffset == offset
+        members = [task_id for task_id, key in layout.lane_of.items() if key == lane.key]
+        spans = [(layout.spans[t][0], layout.spans[t][1], t) for t in members]
+        assert lane.taskCount == len(members)
+        assert lane.rowCount == peak_overlap(spans)
+        assert all(offset <= layout.spans[t][2] < offset + lane.rowCount for t in members)
+        offset += lane.rowCount
+    assert layout.row_count == offset
+    assert layout.total_days == max(end for _, end, _ in layout.spans.values())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pages_and_summaries_match_brute_force(make_project, seed):
+    rng = random.Random(seed)
+    project = make_project(rng.randint(1, 120), seed=seed)
+    layout = TimelineLayout(RuleEngine(project.tasks, project.existingDependencies), "assignee")
+
+    for _ in range(10):
+        start_day = rng.randint(-10, layout.total_days)
+        end_day = start_day + rng.randint(1, 60)
+        visible = layout.visible(start_day, end_day)
+        assert set(visible) == {
+            t for t, (start, end, _) in layout.spans.items() if start < end_day and end > start_day
+        }
+
+        bucket_days = rng.choice([1, 3, 7])
+        found = {(s.lane, s.startDay): s for s in layout.summaries(visible, start_day, end_day, bucket_days)}
+        expected = {}
+        for bucket in range(start_day // bucket_days, -(-end_day // bucket_days)):
+            lo, hi = bucket * bucket_days, (bucket + 1) * bucket_days
+            for task_id in visible:
+                start, end, _ = layout.spans[task_id]
+                if start < hi and end > lo:
+                    counts = expected.setdefault((layout.lane_of[task_id], lo), [0, 0, 0, 0])
+                    counts[0] += 1
+                    counts[1] += layout.engine.tasks[task_id].status == TaskStatus.DONE
+                    counts[2] += task_id in layout.overdue
+                    counts[3] += task_id in layout.critical_path
+        assert {
+            key: [s.taskCount, s.doneCount, s.overdueCount, s.criticalCount] for key, s in found.items()
+        } == expected
+
+
+def test_page_edges_and_critical_flags(make_project):
+    project = make_project(60, seed=9)
+    response = timeline_page(TimelineRequest(project=project, lod="tasks"))
+    engine = RuleEngine(project.tasks, project.existingDependencies)
+    path, _ = engine.calculate_critical_path()
+
+    assert response.visibleTasks == response.totalTasks == 60
+    assert {b.taskId for b in response.bars if b.critical} == set(path)
+    assert {(e.fromTaskId, e.toTaskId) for e in response.edges} == {
+        (d.dependsOnTaskId, d.taskId) for d in project.existingDependencies
+    }
+    assert {(e.fromTaskId, e.toTaskId) for e in response.edges if e.critical} == set(zip(path, path[1:]))
+
+    summary = timeline_page(TimelineRequest(project=project, maxBars=10))
+    assert summary.lod == "summary" and not summary.bars
+
+
+def test_layouts_are_cached_per_project_and_swimlane(make_project, monkeypatch):
+    monkeypatch.setattr(timeline_layout, "_layouts", type(timeline_layout._layouts)())
+    monkeypatch.setattr(timeline_layout.settings, "TIMELINE_LAYOUT_CACHE_SIZE", 2)
+    project = make_project(30, seed=1)
+
+    layout = cached_layout(project, "assignee")
+    assert cached_layout(project.model_copy(deep=True), "assignee") is layout
+    assert cached_layout(project, "status") is not layout
+
+    changed = project.model_copy(deep=True)
+    changed.tasks[0] = changed.tasks[0].model_copy(update={"due_date": changed.tasks[0].due_date + timedelta(days=1)})
+    assert cached_layout(changed, "assignee") is not layout
+
+    # Size 2: the assignee layout of the original project was evicted
+    assert len(timeline_layout._layouts) == 2
+    assert cached_layout(project, "assignee") is not layout
+
+
+def test_caller_version_skips_hashing_the_project(make_project, monkeypatch):
+    monkeypatch.setattr(timeline_layout, "_layouts", type(timeline_layout._layouts)())
+    project = make_project(30, seed=2)
+    layout = cached_layout(project, "assignee", "v1")
+
+    def no_hashing(self, **kwargs):
+        raise AssertionError("versioned lookups must not serialize the project")
+
+    monkeypatch.setattr(type(project), "model_dump_json", no_hashing)
+    assert cached_layout(project, "assignee", "v1") is layout
+    page = timeline_page(TimelineRequest(project=project, swimlane="assignee", version="v1", lod="tasks"))
+    assert page.totalTasks == 30
+
+    assert cached_layout(project, "assignee", "v2") is not layout
+    other = project.model_copy(update={"id": "other-project"})
+    assert cached_layout(other, "assignee", "v1") is not layout
+
+    monkeypatch.undo()
+    # Without a version the content hash is the key
+    assert cached_layout(project, "assignee") is not layout
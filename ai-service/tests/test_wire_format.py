@@ -0,0 +1,152 @@
+"""
+Columnar MessagePack round trips, Accept negotiation and Vary: Accept
+"""
+
+import gc
+import random
+from datetime import datetime, timezone
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.schemas import DependencyType, RiskScoreResponse
+from routers import analysis
+from services.gc_pause import gc_paused
+from services.response_cache import response_cache
+from services.wire_format import MSGPACK_MEDIA_TYPE, decode_body, decode_columnar, encode_project, wants_msgpack
+
+
+def at_ms(value):
+    """What an epoch-millisecond date decodes to: UTC, sub-millisecond digits dropped"""
+    if value is None:
+        return None
+    return value.replace(microsecond=value.microsecond // 1000 * 1000, tzinfo=timezone.utc)
+
+
+def varied(project, seed):
+    """Optional fields left empty and non-default enums, so every column is exercised"""
+    rng = random.Random(seed)
+    tasks = [
+        t.model_copy(update={
+            "description": None if rng.random() < 0.3 else t.description,
+            "assigneeName": None if rng.random() < 0.3 else t.assigneeName,
+        })
+        for t in project.tasks
+    ]
+    deps = [d.model_copy(update={"type": rng.choice(list(DependencyType))}) for d in project.existingDependencies]
+    return project.model_copy(update={
+        "tasks": tasks,
+        "existingDependencies": deps,
+        "description": "roadmap" if seed % 2 else None,
+        "start_date": datetime(2026, 1, 2, 3, 4, 5, 678901) if seed % 2 else None,
+    })
+
+
+def expected(project):
+    return project.model_copy(update={
+        "tasks": [
+            t.model_copy(update={"due_date": at_ms(t.due_date), "createdAt": at_ms(t.createdAt)})
+            for t in project.tasks
+        ],
+        "start_date": at_ms(project.start_date),
+        "end_date": at_ms(project.end_date),
+    })
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_columnar_project_round_trips(make_project, seed):
+    project = varied(make_project(random.Random(seed).randint(0, 60), seed=seed), seed)
+    packed = msgpack.packb(encode_project(project), use_bin_type=True)
+
+    decoded = decode_columnar(msgpack.unpackb(packed))
+    assert decoded == expected(project)
+
+    body = decode_body(msgpack.packb({"project": encode_project(project), "paths": 3}, use_bin_type=True))
+    assert body == {"project": expected(project), "paths": 3}
+
+
+def test_columnar_task_table_decodes_to_tasks(make_project):
+    project = make_project(20, seed=4)
+    table = {**encode_project(project), "columnar": "tasks"}
+    assert decode_columnar(table) == expected(project).tasks
+
+
+@pytest.mark.parametrize("accept, wanted", [
+    ("application/x-msgpack", True),
+    ("application/msgpack", True),
+    ("Application/Vnd.Msgpack; charset=binary", True),
+    ("application/json, application/x-msgpack;q=0.5", True),
+    ("application/x-msgpack;q=0", False),
+    ("application/x-msgpack; q=0.0", False),
+    ("application/x-msgpack;q=zero", False),
+    ("application/json", False),
+    ("*/*", False),
+    ("", False),
+    (None, False),
+])
+def test_wants_msgpack(accept, wanted):
+    assert wants_msgpack(accept) is wanted
+
+
+def test_gc_paused_restores_the_collector():
+    assert gc.isenabled()
+    with pytest.raises(RuntimeError):
+        with gc_paused():
+            assert not gc.isenabled()
+            raise RuntimeError("decode failed")
+    assert gc.isenabled()
+
+    gc.disable()
+    try:
+        with gc_paused():
+            pass
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    response_cache._entries.clear()
+
+    async def calculate_risk(project):
+        return RiskScoreResponse(success=True, riskScore=len(project.tasks), riskLevel="LOW", factors={})
+
+    monkeypatch.setattr(analysis, "_calculate_risk", calculate_risk)
+    yield TestClient(app)
+    response_cache._entries.clear()
+
+
+def test_responses_vary_on_accept(client, make_project):
+    project = make_project(7)
+    as_json = client.post("/api/v1/risk/calculate", json={"project": project.model_dump(mode="json")})
+    assert as_json.headers["content-type"].startswith("application/json")
+    assert "Accept" in [v.strip() for v in as_json.headers["Vary"].split(",")]
+
+    as_msgpack = client.post(
+        "/api/v1/risk/calculate",
+        content=msgpack.packb({"project": encode_project(project)}, use_bin_type=True),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+    )
+    assert as_msgpack.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert "Accept" in [v.strip() for v in as_msgpack.headers["Vary"].split(",")]
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+
+
+def test_q_zero_gets_json(client, make_project):
+    response = client.post(
+        "/api/v1/risk/calculate",
+        json={"project": make_project(3).model_dump(mode="json")},
+        headers={"Accept": "application/x-msgpack;q=0, application/json"}
+    )
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json()["riskScore"] == 3
+
+
+def test_bad_msgpack_body_is_400(client):
+    response = client.post(
+        "/api/v1/risk/calculate", content=b"\xc1\xc1", headers={"Content-Type": MSGPACK_MEDIA_TYPE}
+    )
+    assert response.status_code == 400
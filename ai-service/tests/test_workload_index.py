@@ -0,0 +1,97 @@
+"""
+Workload index windows and resource conflicts against per-day and O(n²) references
+"""
+
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+
+from models.schemas import TaskStatus
+from services.rule_engine import RuleEngine, normalize_datetime
+from services.workload_index import WorkloadIndex
+
+
+def open_tasks_by_user(tasks):
+    grouped = defaultdict(list)
+    for task in tasks:
+        if task.status != TaskStatus.DONE:
+            grouped[task.assigneeId].append(task)
+    return grouped
+
+
+def day_counts(tasks):
+    """Active tasks and due tasks on each day, counted one task-day at a time"""
+    active, due = defaultdict(int), defaultdict(int)
+    for task in tasks:
+        end = normalize_datetime(task.due_date).toordinal()
+        start = min(normalize_datetime(task.createdAt).toordinal(), end)
+        for day in range(start, end + 1):
+            active[day] += 1
+        due[end] += 1
+    return active, due
+
+
+def reference_conflicts(tasks):
+    """The original quadratic same-week scan"""
+    conflicts = {}
+    for user_id, user_tasks in open_tasks_by_user(tasks).items():
+        if len(user_tasks) < 2:
+            continue
+        sorted_tasks = sorted(user_tasks, key=lambda t: normalize_datetime(t.due_date))
+        overlapping = []
+        for task in sorted_tasks:
+            task_due = normalize_datetime(task.due_date)
+            week = [t for t in sorted_tasks if abs((normalize_datetime(t.due_date) - task_due).days) <= 7]
+            if len(week) >= 3 and task.id not in overlapping:
+                overlapping.extend(t.id for t in week)
+        if len(set(overlapping)) >= 3:
+            conflicts[user_id] = set(overlapping)
+    return conflicts
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_window_sums_match_day_counts(make_project, seed):
+    rng = random.Random(seed)
+    tasks = make_project(rng.randint(1, 80), seed=seed, users=4).tasks
+    index = WorkloadIndex(tasks)
+
+    for user_id, user_tasks in open_tasks_by_user(tasks).items():
+        workload = index.get(user_id)
+        active, due = day_counts(user_tasks)
+        for _ in range(30):
+            start = workload.origin + rng.randint(-20, workload.last - workload.origin + 20)
+            end = start + rng.randint(0, 40)
+            assert workload.active_task_days(start, end) == sum(active[d] for d in range(start, end))
+            assert workload.due_count(start, end) == sum(due[d] for d in range(start, end))
+
+
+@pytest.mark.parametrize("window_days", [1, 3, 7, 30])
+def test_heatmap_buckets_match_day_counts(make_project, window_days):
+    tasks = make_project(120, seed=window_days, users=5).tasks
+    index = WorkloadIndex(tasks)
+    first, last = index.bounds()
+    start, end = first + timedelta(days=5), last - timedelta(days=5)
+
+    grouped = open_tasks_by_user(tasks)
+    rows = index.heatmap(start, end, window_days, user_ids=sorted(grouped) + ["nobody"])
+    for row in rows:
+        active, due = day_counts(grouped.get(row["userId"], []))
+        day = start.toordinal()
+        for bucket in row["buckets"]:
+            days = range(day, day + bucket["days"])
+            assert bucket["start"].toordinal() == day
+            assert bucket["activeTaskDays"] == sum(active[d] for d in days)
+            assert bucket["dueCount"] == sum(due[d] for d in days)
+            day += bucket["days"]
+        assert day == end.toordinal() + 1
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_conflicts_match_quadratic_scan(make_project, seed):
+    project = make_project(random.Random(seed).randint(2, 90), seed=seed, users=3)
+    engine = RuleEngine(tasks=project.tasks, dependencies=[])
+
+    found = {user_id: set(c.taskIds) for user_id, c in engine.conflicts_by_user().items()}
+    assert found == reference_conflicts(project.tasks)
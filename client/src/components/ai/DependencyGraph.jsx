@@ -109,19 +109,37 @@ const nodeTypes = {
 
 /**
  * DependencyGraph - Interactive visualization of task dependencies
+ * With a server timeline page (GanttTimeline's onPageLoad), nodes within a
+ * level follow the page's swimlane rows and critical flags come from the
+ * same layout, so the graph and the Gantt chart agree.
  */
 const DependencyGraph = ({
     tasks = [],
     dependencies = [],
     criticalPath = [],
+    timeline = null,
     onNodeClick,
     className = ''
 }) => {
     const [nodes, setNodes, onNodesChange] = useNodesState([])
     const [edges, setEdges, onEdgesChange] = useEdgesState([])
 
-    // Critical path set for quick lookup
-    const criticalPathSet = useMemo(() => new Set(criticalPath), [criticalPath])
+    // Critical path sets for quick lookup; edges are critical only between consecutive path tasks
+    const { criticalPathSet, criticalEdgeSet, rowOf } = useMemo(() => {
+        const bars = timeline?.lod === 'tasks' ? timeline.bars : []
+        const edges = timeline?.lod === 'tasks' ? timeline.edges : []
+        return {
+            criticalPathSet: new Set([
+                ...criticalPath,
+                ...bars.filter(bar => bar.critical).map(bar => bar.taskId)
+            ]),
+            criticalEdgeSet: new Set([
+                ...criticalPath.slice(1).map((taskId, i) => `${criticalPath[i]}->${taskId}`),
+                ...edges.filter(edge => edge.critical).map(edge => `${edge.fromTaskId}->${edge.toTaskId}`)
+            ]),
+            rowOf: new Map(bars.map(bar => [bar.taskId, bar.row]))
+        }
+    }, [criticalPath, timeline])
 
     // Build nodes and edges from tasks and dependencies
     useEffect(() => {
@@ -194,6 +212,9 @@ const DependencyGraph = ({
         const ySpacing = 120
 
         levelGroups.forEach((levelTasks, level) => {
+            if (rowOf.size > 0) {
+                levelTasks.sort((a, b) => (rowOf.get(a.id) ?? Infinity) - (rowOf.get(b.id) ?? Infinity))
+            }
             levelTasks.forEach((task, index) => {
                 const yOffset = (levelTasks.length - 1) / 2
                 newNodes.push({
@@ -217,7 +238,7 @@ const DependencyGraph = ({
 
         // Create edges
         const newEdges = dependencies.map(dep => {
-            const isCriticalEdge = criticalPathSet.has(dep.taskId) && criticalPathSet.has(dep.dependsOnTaskId)
+            const isCriticalEdge = criticalEdgeSet.has(`${dep.dependsOnTaskId}->${dep.taskId}`)
             const isAISuggested = dep.isAISuggested && dep.acceptedByUser === null
 
             return {
@@ -244,7 +265,7 @@ const DependencyGraph = ({
 
         setNodes(newNodes)
         setEdges(newEdges)
-    }, [tasks, dependencies, criticalPathSet, setNodes, setEdges])
+    }, [tasks, dependencies, criticalPathSet, criticalEdgeSet, rowOf, setNodes, setEdges])
 
     const handleNodeClick = useCallback((event, node) => {
         onNodeClick?.(node.data)
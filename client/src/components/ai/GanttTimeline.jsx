@@ -1,91 +1,146 @@
-import { useMemo } from 'react'
-import { Calendar, AlertTriangle } from 'lucide-react'
+import { useState, useEffect, useCallback, useMemo } from 'react'
+import { useAuth } from '@clerk/clerk-react'
+import {
+    Calendar, AlertTriangle, ChevronLeft, ChevronRight,
+    ZoomIn, ZoomOut, RefreshCw
+} from 'lucide-react'
+import api from '../../configs/api'
+
+const DAY_MS = 1000 * 60 * 60 * 24
+const ROW_HEIGHT = 28
+const MAX_BARS = 400
+const MIN_WINDOW_DAYS = 7
+// Matches the AI service's NEAR_CRITICAL_FLOAT_DAYS default
+const NEAR_CRITICAL_FLOAT_DAYS = 3
+
+/**
+ * Timeline origin (day 0) as a Date. JSON responses carry an ISO date
+ * string, MessagePack responses (AI_WIRE_FORMAT=msgpack) epoch milliseconds.
+ */
+const parseOrigin = (origin) => {
+    if (origin === null || origin === undefined) return null
+    const date = typeof origin === 'number' || /^\d+$/.test(origin)
+        ? new Date(Number(origin))
+        : new Date(origin)
+    return Number.isNaN(date.getTime()) ? null : date
+}
+
+const dayToDate = (origin, day) => new Date(origin.getTime() + day * DAY_MS)
+
+const toIsoDay = (date) => date.toISOString().slice(0, 10)
+
+const formatDay = (origin, day) => dayToDate(origin, day).toLocaleDateString('en-US', {
+    month: 'short', day: 'numeric', timeZone: 'UTC'
+})
 
 /**
  * GanttTimeline - Visual timeline of tasks with dependency awareness
- * Shows task durations, critical path, and deadline proximity
+ * Pages are laid out by the AI service (/api/ai/timeline): bars come with
+ * swimlane rows, float and critical flags, and zoomed-out windows come
+ * back as per-lane bucket summaries, so only the visible window is sent.
  */
 const GanttTimeline = ({
-    tasks = [],
-    criticalPath = [],
-    dependencies = [],
+    projectId,
+    refreshKey,
+    onPageLoad,
     className = ''
 }) => {
-    // Calculate timeline bounds
-    const { minDate, maxDate, totalDays, bars } = useMemo(() => {
-        if (tasks.length === 0) return { minDate: null, maxDate: null, totalDays: 0, bars: [] }
-
-        const dates = tasks.map(t => new Date(t.due_date))
-        const createdDates = tasks.map(t => new Date(t.createdAt))
-
-        const min = new Date(Math.min(...createdDates, ...dates))
-        const max = new Date(Math.max(...dates))
-
-        // Add padding
-        min.setDate(min.getDate() - 2)
-        max.setDate(max.getDate() + 2)
-
-        const days = Math.ceil((max - min) / (1000 * 60 * 60 * 24))
-
-        const criticalSet = new Set(criticalPath)
-        const now = new Date()
-
-        const taskBars = tasks.map(task => {
-            const created = new Date(task.createdAt)
-            const due = new Date(task.due_date)
-            const startOffset = Math.max(0, Math.ceil((created - min) / (1000 * 60 * 60 * 24)))
-            const duration = Math.max(1, Math.ceil((due - created) / (1000 * 60 * 60 * 24)))
-
-            const isOverdue = now > due && task.status !== 'DONE'
-            const isDueSoon = !isOverdue && (due - now) / (1000 * 60 * 60 * 24) <= 3 && task.status !== 'DONE'
-            const isCritical = criticalSet.has(task.id)
-
-            return {
-                ...task,
-                startOffset,
-                duration,
-                widthPercent: (duration / days) * 100,
-                leftPercent: (startOffset / days) * 100,
-                isOverdue,
-                isDueSoon,
-                isCritical
-            }
-        })
-
-        return { minDate: min, maxDate: max, totalDays: days, bars: taskBars }
-    }, [tasks, criticalPath])
-
-    // Generate date markers
+    const { getToken } = useAuth()
+    const [swimlane, setSwimlane] = useState('assignee')
+    const [range, setRange] = useState(null) // { start, end } ISO days; null = whole project
+    const [page, setPage] = useState(null)
+    const [loading, setLoading] = useState(false)
+    const [error, setError] = useState(null)
+
+    const fetchPage = useCallback(async () => {
+        if (!projectId) return
+
+        setLoading(true)
+        setError(null)
+        const token = await getToken()
+        const headers = { Authorization: `Bearer ${token}` }
+
+        try {
+            const params = { swimlane, maxBars: MAX_BARS, ...range }
+            const response = await api.get(`/api/ai/timeline/${projectId}`, { headers, params })
+            setPage(response.data)
+            onPageLoad?.(response.data)
+        } catch (err) {
+            console.error('Failed to load timeline:', err)
+            setError(err.response?.data?.message || 'Failed to load timeline')
+        } finally {
+            setLoading(false)
+        }
+    }, [projectId, swimlane, range, refreshKey, onPageLoad, getToken])
+
+    useEffect(() => {
+        fetchPage()
+    }, [fetchPage])
+
+    const origin = useMemo(() => parseOrigin(page?.origin), [page?.origin])
+    const windowStart = page?.windowStartDay || 0
+    const windowDays = Math.max(1, (page?.windowEndDay || 0) - windowStart)
+
+    const leftPercent = (day) => ((day - windowStart) / windowDays) * 100
+
+    const showDays = (start, end) => setRange({
+        start: toIsoDay(dayToDate(origin, start)),
+        end: toIsoDay(dayToDate(origin, end))
+    })
+
+    // Pan by half a window, zoom around the window centre
+    const pan = (direction) => {
+        const shift = Math.max(1, Math.round(windowDays / 2)) * direction
+        showDays(windowStart + shift, windowStart + windowDays + shift)
+    }
+
+    const zoom = (factor) => {
+        const days = Math.max(MIN_WINDOW_DAYS, Math.round(windowDays * factor))
+        const start = Math.max(0, Math.round(windowStart + (windowDays - days) / 2))
+        showDays(start, start + days)
+    }
+
+    // Date markers
     const dateMarkers = useMemo(() => {
-        if (!minDate || totalDays === 0) return []
+        if (!origin) return []
 
         const markers = []
-        const markerInterval = Math.max(1, Math.floor(totalDays / 7))
+        const markerInterval = Math.max(1, Math.floor(windowDays / 7))
 
-        for (let i = 0; i <= totalDays; i += markerInterval) {
-            const date = new Date(minDate)
-            date.setDate(date.getDate() + i)
+        for (let i = 0; i <= windowDays; i += markerInterval) {
             markers.push({
-                date,
-                leftPercent: (i / totalDays) * 100,
-                label: date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' })
+                leftPercent: (i / windowDays) * 100,
+                label: formatDay(origin, windowStart + i)
             })
         }
 
         return markers
-    }, [minDate, totalDays])
+    }, [origin, windowStart, windowDays])
 
     // Today marker position
     const todayPosition = useMemo(() => {
-        if (!minDate || !maxDate) return null
-        const now = new Date()
-        if (now < minDate || now > maxDate) return null
+        if (!origin) return null
+        const today = (Date.now() - origin.getTime()) / DAY_MS
+        if (today < windowStart || today > windowStart + windowDays) return null
+        return ((today - windowStart) / windowDays) * 100
+    }, [origin, windowStart, windowDays])
 
-        const daysFromStart = Math.ceil((now - minDate) / (1000 * 60 * 60 * 24))
-        return (daysFromStart / totalDays) * 100
-    }, [minDate, maxDate, totalDays])
+    const maxBucketCount = useMemo(
+        () => Math.max(1, ...(page?.summaries || []).map(s => s.taskCount)),
+        [page]
+    )
 
-    if (tasks.length === 0) {
+    const getBarColor = (bar) => {
+        if (bar.status === 'DONE') return 'bg-emerald-500'
+        if (bar.overdue) return 'bg-red-500'
+        if (origin && bar.status !== 'DONE' && dayToDate(origin, bar.endDay) - Date.now() <= 3 * DAY_MS) return 'bg-amber-500'
+        if (bar.critical) return 'bg-purple-500'
+        if (bar.floatDays <= NEAR_CRITICAL_FLOAT_DAYS) return 'bg-violet-300 dark:bg-violet-400'
+        if (bar.status === 'IN_PROGRESS') return 'bg-blue-500'
+        return 'bg-zinc-400 dark:bg-zinc-600'
+    }
+
+    if (page && page.totalTasks === 0) {
         return (
             <div className={`flex items-center justify-center h-40 rounded-xl bg-zinc-50 dark:bg-zinc-800/50 ${className}`}>
                 <div className="text-center text-zinc-500">
@@ -96,28 +151,33 @@ const GanttTimeline = ({
         )
     }
 
-    const getBarColor = (bar) => {
-        if (bar.status === 'DONE') return 'bg-emerald-500'
-        if (bar.isOverdue) return 'bg-red-500'
-        if (bar.isDueSoon) return 'bg-amber-500'
-        if (bar.isCritical) return 'bg-purple-500'
-        if (bar.status === 'IN_PROGRESS') return 'bg-blue-500'
-        return 'bg-zinc-400 dark:bg-zinc-600'
-    }
+    const lanes = page?.lanes || []
+    const rowCount = page?.rowCount || 0
+    const laneByKey = new Map(lanes.map(lane => [lane.key, lane]))
 
     return (
         <div className={`rounded-xl border border-zinc-200 dark:border-zinc-800 overflow-hidden ${className}`}>
             {/* Header */}
-            <div className="flex items-center justify-between p-4 border-b border-zinc-200 dark:border-zinc-800 bg-zinc-50 dark:bg-zinc-900/50">
+            <div className="flex flex-wrap items-center justify-between gap-3 p-4 border-b border-zinc-200 dark:border-zinc-800 bg-zinc-50 dark:bg-zinc-900/50">
                 <div className="flex items-center gap-2">
                     <Calendar className="w-5 h-5 text-purple-500" />
                     <h3 className="font-semibold text-zinc-900 dark:text-white">Project Timeline</h3>
+                    {page && (
+                        <span className="text-xs text-zinc-500 dark:text-zinc-400">
+                            {page.visibleTasks} of {page.totalTasks} tasks
+                            {page.lod === 'summary' && ` · ${page.bucketDays}-day buckets`}
+                        </span>
+                    )}
                 </div>
                 <div className="flex items-center gap-4 text-xs">
                     <div className="flex items-center gap-1.5">
                         <div className="w-3 h-3 rounded bg-purple-500"></div>
                         <span className="text-zinc-600 dark:text-zinc-400">Critical Path</span>
                     </div>
+                    <div className="flex items-center gap-1.5">
+                        <div className="w-3 h-3 rounded bg-violet-300 dark:bg-violet-400"></div>
+                        <span className="text-zinc-600 dark:text-zinc-400">Near-Critical</span>
+                    </div>
                     <div className="flex items-center gap-1.5">
                         <div className="w-3 h-3 rounded bg-red-500"></div>
                         <span className="text-zinc-600 dark:text-zinc-400">Overdue</span>
@@ -127,67 +187,160 @@ const GanttTimeline = ({
                         <span className="text-zinc-600 dark:text-zinc-400">Due Soon</span>
                     </div>
                 </div>
-            </div>
-
-            {/* Timeline */}
-            <div className="p-4 relative">
-                {/* Date markers */}
-                <div className="relative h-6 mb-2 border-b border-zinc-200 dark:border-zinc-700">
-                    {dateMarkers.map((marker, i) => (
-                        <div
-                            key={i}
-                            className="absolute text-xs text-zinc-500 dark:text-zinc-400 transform -translate-x-1/2"
-                            style={{ left: `${marker.leftPercent}%` }}
+                <div className="flex items-center gap-1">
+                    <select
+                        value={swimlane}
+                        onChange={(e) => setSwimlane(e.target.value)}
+                        className="mr-2 px-2 py-1 text-xs rounded-lg border border-zinc-200 dark:border-zinc-700 bg-white dark:bg-zinc-800 text-zinc-700 dark:text-zinc-300"
+                    >
+                        <option value="assignee">By assignee</option>
+                        <option value="status">By status</option>
+                        <option value="priority">By priority</option>
+                        <option value="none">No lanes</option>
+                    </select>
+                    {[
+                        { icon: ChevronLeft, label: 'Earlier', onClick: () => pan(-1) },
+                        { icon: ZoomOut, label: 'Zoom out', onClick: () => zoom(2) },
+                        { icon: ZoomIn, label: 'Zoom in', onClick: () => zoom(0.5) },
+                        { icon: ChevronRight, label: 'Later', onClick: () => pan(1) }
+                    ].map(({ icon: Icon, label, onClick }) => (
+                        <button
+                            key={label}
+                            title={label}
+                            onClick={onClick}
+                            disabled={!origin || loading}
+                            className="p-1.5 rounded-lg hover:bg-zinc-200 dark:hover:bg-zinc-800 text-zinc-600 dark:text-zinc-400 disabled:opacity-40"
                         >
-                            {marker.label}
-                        </div>
+                            <Icon className="w-4 h-4" />
+                        </button>
                     ))}
+                    {loading && <RefreshCw className="w-4 h-4 ml-1 text-purple-500 animate-spin" />}
                 </div>
+            </div>
 
-                {/* Today indicator */}
-                {todayPosition !== null && (
-                    <div
-                        className="absolute top-14 bottom-4 w-0.5 bg-cyan-500 z-10"
-                        style={{ left: `${todayPosition}%` }}
-                    >
-                        <div className="absolute -top-5 left-1/2 transform -translate-x-1/2 text-xs font-medium text-cyan-500 bg-zinc-900 px-1 rounded">
-                            Today
-                        </div>
-                    </div>
-                )}
-
-                {/* Task bars */}
-                <div className="relative space-y-2 mt-4">
-                    {bars.map((bar, index) => (
-                        <div key={bar.id} className="relative h-10 flex items-center">
-                            {/* Task label */}
-                            <div className="w-40 flex-shrink-0 pr-3 truncate text-sm text-zinc-700 dark:text-zinc-300">
-                                {bar.isCritical && <AlertTriangle className="w-3 h-3 inline mr-1 text-purple-500" />}
-                                {bar.title}
+            {error && (
+                <div className="px-4 py-2 text-sm text-red-600 dark:text-red-400">{error}</div>
+            )}
+
+            {/* Timeline */}
+            {origin && (
+                <div className="p-4 relative">
+                    {/* Date markers */}
+                    <div className="relative h-6 mb-2 ml-40 border-b border-zinc-200 dark:border-zinc-700">
+                        {dateMarkers.map((marker, i) => (
+                            <div
+                                key={i}
+                                className="absolute text-xs text-zinc-500 dark:text-zinc-400 transform -translate-x-1/2"
+                                style={{ left: `${marker.leftPercent}%` }}
+                            >
+                                {marker.label}
                             </div>
+                        ))}
+                    </div>
 
-                            {/* Bar container */}
-                            <div className="flex-1 relative h-full flex items-center bg-zinc-100 dark:bg-zinc-800/50 rounded">
-                                {/* Bar */}
+                    <div className="flex max-h-[600px] overflow-y-auto">
+                        {/* Lane labels */}
+                        <div className="w-40 flex-shrink-0">
+                            {lanes.map(lane => (
                                 <div
-                                    className={`absolute h-7 rounded ${getBarColor(bar)} opacity-80 hover:opacity-100 transition-opacity cursor-pointer`}
-                                    style={{
-                                        left: `${bar.leftPercent}%`,
-                                        width: `${Math.max(bar.widthPercent, 2)}%`
-                                    }}
-                                    title={`${bar.title}\nDue: ${new Date(bar.due_date).toLocaleDateString()}\nStatus: ${bar.status}`}
+                                    key={lane.key}
+                                    className="pr-3 pt-1 truncate text-sm text-zinc-700 dark:text-zinc-300 border-b border-zinc-200 dark:border-zinc-800"
+                                    style={{ height: lane.rowCount * ROW_HEIGHT }}
+                                    title={`${lane.label} (${lane.taskCount} tasks)`}
                                 >
-                                    {bar.widthPercent > 10 && (
-                                        <span className="absolute inset-0 flex items-center justify-center text-xs font-medium text-white truncate px-2">
-                                            {bar.status === 'DONE' ? '✓' : bar.isOverdue ? '!' : ''}
-                                        </span>
-                                    )}
+                                    {lane.label}
                                 </div>
-                            </div>
+                            ))}
                         </div>
-                    ))}
+
+                        {/* Rows */}
+                        <div className="flex-1 relative overflow-hidden" style={{ height: rowCount * ROW_HEIGHT }}>
+                            {lanes.map((lane, i) => (
+                                <div
+                                    key={lane.key}
+                                    className={`absolute inset-x-0 border-b border-zinc-200 dark:border-zinc-800 ${i % 2 ? 'bg-zinc-50 dark:bg-zinc-800/30' : ''}`}
+                                    style={{ top: lane.rowOffset * ROW_HEIGHT, height: lane.rowCount * ROW_HEIGHT }}
+                                />
+                            ))}
+
+                            {/* Today indicator */}
+                            {todayPosition !== null && (
+                                <div
+                                    className="absolute top-0 bottom-0 w-0.5 bg-cyan-500 z-10"
+                                    style={{ left: `${todayPosition}%` }}
+                                />
+                            )}
+
+                            {/* Dependency routes, in day/row coordinates */}
+                            {page.lod === 'tasks' && page.edges.length > 0 && (
+                                <svg
+                                    className="absolute inset-0 w-full h-full pointer-events-none"
+                                    viewBox={`${windowStart} 0 ${windowDays} ${rowCount}`}
+                                    preserveAspectRatio="none"
+                                >
+                                    {page.edges.map(edge => (
+                                        <polyline
+                                            key={`${edge.fromTaskId}-${edge.toTaskId}`}
+                                            points={edge.points.map(([day, row]) => `${day},${row + 0.5}`).join(' ')}
+                                            fill="none"
+                                            stroke={edge.critical ? '#a855f7' : '#94a3b8'}
+                                            strokeWidth={edge.critical ? 2 : 1}
+                                            vectorEffect="non-scaling-stroke"
+                                        />
+                                    ))}
+                                </svg>
+                            )}
+
+                            {/* Task bars */}
+                            {page.lod === 'tasks' && page.bars.map(bar => {
+                                const left = Math.max(0, leftPercent(bar.startDay))
+                                const right = Math.min(100, leftPercent(bar.endDay))
+                                return (
+                                    <div
+                                        key={bar.taskId}
+                                        className={`absolute h-5 rounded ${getBarColor(bar)} ${bar.blocked ? 'opacity-60' : 'opacity-80'} hover:opacity-100 transition-opacity cursor-pointer`}
+                                        style={{
+                                            top: bar.row * ROW_HEIGHT + 4,
+                                            left: `${left}%`,
+                                            width: `max(${right - left}%, 4px)`
+                                        }}
+                                        title={`${bar.title}\n${formatDay(origin, bar.startDay)} - ${formatDay(origin, bar.endDay)}\nStatus: ${bar.status}\nFloat: ${bar.floatDays} days`}
+                                    >
+                                        {right - left > 8 && (
+                                            <span className="absolute inset-0 flex items-center px-2 text-xs font-medium text-white truncate">
+                                                {bar.critical && <AlertTriangle className="w-3 h-3 mr-1 flex-shrink-0" />}
+                                                {bar.title}
+                                            </span>
+                                        )}
+                                    </div>
+                                )
+                            })}
+
+                            {/* Zoomed out: per-lane buckets, darker with more tasks */}
+                            {page.lod === 'summary' && page.summaries.map(summary => {
+                                const lane = laneByKey.get(summary.lane)
+                                if (!lane) return null
+                                const left = Math.max(0, leftPercent(summary.startDay))
+                                const right = Math.min(100, leftPercent(summary.startDay + summary.days))
+                                return (
+                                    <div
+                                        key={`${summary.lane}-${summary.startDay}`}
+                                        className={`absolute rounded-sm ${summary.overdueCount ? 'bg-red-500' : summary.criticalCount ? 'bg-purple-500' : 'bg-zinc-500'}`}
+                                        style={{
+                                            top: lane.rowOffset * ROW_HEIGHT + 2,
+                                            height: lane.rowCount * ROW_HEIGHT - 4,
+                                            left: `${left}%`,
+                                            width: `${right - left}%`,
+                                            opacity: 0.15 + 0.75 * (summary.taskCount / maxBucketCount)
+                                        }}
+                                        title={`${lane.label}: ${summary.taskCount} tasks from ${formatDay(origin, summary.startDay)}\n${summary.doneCount} done, ${summary.overdueCount} overdue, ${summary.criticalCount} critical`}
+                                    />
+                                )
+                            })}
+                        </div>
+                    </div>
                 </div>
-            </div>
+            )}
         </div>
     )
 }
@@ -35,6 +35,7 @@ const AIAnalysisPage = () => {
     const [analyzing, setAnalyzing] = useState(false)
     const [analysis, setAnalysis] = useState(null)
     const [dependencies, setDependencies] = useState({ confirmed: [], pending: [] })
+    const [timelinePage, setTimelinePage] = useState(null)
     const [error, setError] = useState(null)
 
     // Fetch analysis data
@@ -203,6 +204,7 @@ const AIAnalysisPage = () => {
                             tasks={project?.tasks || []}
                             dependencies={[...(dependencies?.confirmed || []), ...(dependencies?.pending || [])]}
                             criticalPath={analysis?.criticalPathIds || []}
+                            timeline={timelinePage}
                             onNodeClick={(task) => navigate(`/taskDetails?id=${task.id}`)}
                         />
                     </div>
@@ -241,9 +243,9 @@ const AIAnalysisPage = () => {
 
                     {/* Gantt Timeline */}
                     <GanttTimeline
-                        tasks={project?.tasks || []}
-                        criticalPath={analysis?.criticalPathIds || []}
-                        dependencies={[...(dependencies?.confirmed || []), ...(dependencies?.pending || [])]}
+                        projectId={projectId}
+                        refreshKey={`${analysis?.analyzedAt}-${dependencies?.confirmed?.length}`}
+                        onPageLoad={setTimelinePage}
                     />
 
                     {/* Risk Factors Chart */}
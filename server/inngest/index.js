@@ -5,6 +5,24 @@ import sendEmail from "../configs/nodemailer.js";
 // Create a client to send and receive events
 export const inngest = new Inngest({ id: "project-management" });
 
+const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://localhost:8000";
+
+/**
+ * Drop deleted projects from the AI service's portfolio rollup.
+ * Projects are deleted by cascade with their workspace or team lead.
+ */
+async function removeFromPortfolio(projectIds) {
+    const results = await Promise.allSettled(projectIds.map(async id => {
+        const res = await fetch(`${AI_SERVICE_URL}/api/v1/portfolio/projects/${id}`, { method: 'DELETE' });
+        // fetch only rejects on network errors; a 4xx/5xx is a failure too
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    }));
+    const failed = results.filter(r => r.status === 'rejected').length;
+    if (failed > 0) {
+        console.error(`Could not remove ${failed} of ${projectIds.length} projects from the portfolio rollup`);
+    }
+}
+
 // Inngest function to save user data to a database
 const syncUserCreation = inngest.createFunction(
     { id: 'sync-user-from-clerk' },
@@ -28,11 +46,16 @@ const syncUserDeletion = inngest.createFunction(
     { event: 'clerk/user.deleted' },
     async ({ event }) => {
         const { data } = event
+        const projects = await prisma.project.findMany({
+            where: { team_lead: data.id },
+            select: { id: true }
+        })
         await prisma.user.delete({
             where: {
                 id: data.id,
             }
         })
+        await removeFromPortfolio(projects.map(p => p.id))
     }
 )
 
@@ -107,11 +130,16 @@ const syncWorkspaceDeletion = inngest.createFunction(
     { event: 'clerk/organization.deleted' },
     async ({ event }) => {
         const { data } = event;
+        const projects = await prisma.project.findMany({
+            where: { workspaceId: data.id },
+            select: { id: true }
+        })
         await prisma.workspace.delete({
             where: {
                 id: data.id
             }
         })
+        await removeFromPortfolio(projects.map(p => p.id))
     }
 )
 
@@ -298,8 +326,6 @@ const sendTaskAssignmentEmail = inngest.createFunction(
 // AI Dependency Brain Functions
 // ================================
 
-const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://localhost:8000";
-
 /**
  * Daily cron job to analyze all active projects
  * Runs at 6 AM every day
@@ -354,6 +380,7 @@ const dailyProjectAnalysis = inngest.createFunction(
                                 id: projectData.id,
                                 name: projectData.name,
                                 description: projectData.description,
+                                workspaceId: projectData.workspaceId,
                                 start_date: projectData.start_date,
                                 end_date: projectData.end_date,
                                 tasks: projectData.tasks.map(t => ({
@@ -387,6 +414,8 @@ const dailyProjectAnalysis = inngest.createFunction(
                                 riskScore: result.analysis.riskScore,
                                 riskLevel: result.analysis.riskLevel,
                                 criticalPathIds: result.analysis.criticalPathIds,
+                                nearCriticalPaths: result.analysis.nearCriticalPaths,
+                                nearCriticalTasks: result.analysis.nearCriticalTasks,
                                 bottlenecks: result.analysis.bottlenecks,
                                 alerts: result.analysis.alerts,
                                 suggestions: result.analysis.suggestedDependencies
@@ -6,6 +6,13 @@ const router = express.Router();
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://localhost:8000";
 
+// When the AI service shares our DATABASE_URL it can read the project itself
+const AI_DIRECT_DB = process.env.AI_DIRECT_DB === "true";
+
+// "msgpack" sends columnar MessagePack to the AI service instead of JSON
+const AI_WIRE_FORMAT = process.env.AI_WIRE_FORMAT || "json";
+const MSGPACK = "application/x-msgpack";
+
 /**
  * Helper: Fetch project with all tasks and existing dependencies
  */
@@ -46,6 +53,23 @@ async function getProjectWithDetails(projectId) {
     return { project, existingDependencies };
 }
 
+/**
+ * Helper: Cheap version stamp of a project's tasks and dependencies (counts
+ * catch deletions, latest updatedAt catches edits). The AI service keys its
+ * cached timeline layouts on it instead of hashing the whole project.
+ */
+async function getProjectVersion(projectId) {
+    const [tasks, dependencies] = await Promise.all([
+        prisma.task.aggregate({ where: { projectId }, _count: true, _max: { updatedAt: true } }),
+        prisma.taskDependency.aggregate({ where: { task: { projectId } }, _count: true, _max: { updatedAt: true } })
+    ]);
+    const stamp = value => value ? new Date(value).getTime() : 0;
+    return [
+        tasks._count, stamp(tasks._max.updatedAt),
+        dependencies._count, stamp(dependencies._max.updatedAt)
+    ].join("-");
+}
+
 /**
  * Helper: Format project data for Python AI service
  */
@@ -54,6 +78,7 @@ function formatProjectForAI(project, existingDependencies) {
         id: project.id,
         name: project.name,
         description: project.description,
+        workspaceId: project.workspaceId,
         start_date: project.start_date,
         end_date: project.end_date,
         tasks: project.tasks.map(task => ({
@@ -76,6 +101,70 @@ function formatProjectForAI(project, existingDependencies) {
     };
 }
 
+/**
+ * Helper: Columnar project for the AI service's MessagePack wire format.
+ * Strings are dictionary-encoded and dates sent as epoch milliseconds.
+ */
+function formatProjectColumnar(project, existingDependencies) {
+    const strings = [];
+    const index = new Map();
+    const ref = (value) => {
+        if (!index.has(value)) {
+            index.set(value, strings.length);
+            strings.push(value);
+        }
+        return index.get(value);
+    };
+    const epoch = (value) => (value ? new Date(value).getTime() : null);
+    const tasks = project.tasks;
+
+    return {
+        columnar: "project",
+        id: project.id,
+        name: project.name,
+        description: project.description,
+        workspaceId: project.workspaceId,
+        start_date: epoch(project.start_date),
+        end_date: epoch(project.end_date),
+        tasks: {
+            id: tasks.map(t => ref(t.id)),
+            title: tasks.map(t => t.title),
+            description: tasks.map(t => t.description),
+            status: tasks.map(t => ref(t.status)),
+            priority: tasks.map(t => ref(t.priority)),
+            assigneeId: tasks.map(t => ref(t.assigneeId)),
+            assigneeName: tasks.map(t => (t.assignee?.name ? ref(t.assignee.name) : null)),
+            due_date: tasks.map(t => epoch(t.due_date)),
+            createdAt: tasks.map(t => epoch(t.createdAt))
+        },
+        dependencies: {
+            id: existingDependencies.map(d => ref(d.id)),
+            taskId: existingDependencies.map(d => ref(d.taskId)),
+            dependsOnTaskId: existingDependencies.map(d => ref(d.dependsOnTaskId)),
+            type: existingDependencies.map(d => ref(d.type))
+        },
+        strings
+    };
+}
+
+/**
+ * Helper: POST to the AI service in the configured wire format
+ */
+async function postToAI(url, payload) {
+    if (AI_WIRE_FORMAT !== "msgpack") {
+        return axios.post(url, payload, { timeout: 30000 });
+    }
+    // Loaded lazily so the default JSON mode does not need the package
+    const { encode, decode } = await import("@msgpack/msgpack");
+    const response = await axios.post(url, payload === null ? null : encode(payload), {
+        timeout: 30000,
+        headers: { "Content-Type": MSGPACK, Accept: MSGPACK },
+        responseType: "arraybuffer"
+    });
+    response.data = decode(new Uint8Array(response.data));
+    return response;
+}
+
 /**
  * POST /api/ai/analyze/:projectId
  * Trigger full AI analysis for a project
@@ -85,7 +174,28 @@ router.post("/analyze/:projectId", async (req, res) => {
         const { projectId } = req.params;
         const { userId } = await req.auth();
 
-        const { project, existingDependencies } = await getProjectWithDetails(projectId);
+        // Direct mode only needs membership; the AI service reads tasks itself
+        let project, analyzeUrl, payload;
+        if (AI_DIRECT_DB) {
+            project = await prisma.project.findUnique({
+                where: { id: projectId },
+                select: { id: true, team_lead: true, members: { select: { userId: true } } }
+            });
+            if (!project) {
+                throw new Error("Project not found");
+            }
+            analyzeUrl = `${AI_SERVICE_URL}/api/v1/projects/${projectId}/analyze`;
+            payload = null;
+        } else {
+            const details = await getProjectWithDetails(projectId);
+            project = details.project;
+            analyzeUrl = `${AI_SERVICE_URL}/api/v1/analyze`;
+            payload = {
+                project: AI_WIRE_FORMAT === "msgpack"
+                    ? formatProjectColumnar(project, details.existingDependencies)
+                    : formatProjectForAI(project, details.existingDependencies)
+            };
+        }
 
         // Check user has access to project
         const isMember = project.team_lead === userId ||
@@ -96,13 +206,7 @@ router.post("/analyze/:projectId", async (req, res) => {
         }
 
         // Call Python AI service
-        const formattedProject = formatProjectForAI(project, existingDependencies);
-
-        const response = await axios.post(
-            `${AI_SERVICE_URL}/api/v1/analyze`,
-            { project: formattedProject },
-            { timeout: 30000 }
-        );
+        const response = await postToAI(analyzeUrl, payload);
 
         if (!response.data.success) {
             return res.status(500).json({
@@ -120,6 +224,8 @@ router.post("/analyze/:projectId", async (req, res) => {
                 riskScore: analysis.riskScore,
                 riskLevel: analysis.riskLevel,
                 criticalPathIds: analysis.criticalPathIds,
+                nearCriticalPaths: analysis.nearCriticalPaths,
+                nearCriticalTasks: analysis.nearCriticalTasks,
                 bottlenecks: analysis.bottlenecks,
                 alerts: analysis.alerts,
                 suggestions: analysis.suggestedDependencies
@@ -158,6 +264,8 @@ router.post("/analyze/:projectId", async (req, res) => {
                 riskScore: analysis.riskScore,
                 riskLevel: analysis.riskLevel,
                 criticalPathIds: analysis.criticalPathIds,
+                nearCriticalPaths: analysis.nearCriticalPaths,
+                nearCriticalTasks: analysis.nearCriticalTasks,
                 bottlenecks: analysis.bottlenecks,
                 alerts: analysis.alerts,
                 suggestedDependencies: analysis.suggestedDependencies,
@@ -276,6 +384,178 @@ router.get("/dependencies/:projectId", async (req, res) => {
     }
 });
 
+/**
+ * GET /api/ai/timeline/:projectId?start=&end=&swimlane=&lod=
+ * Server-side Gantt layout for one time window (rows, edge routes,
+ * or swimlane summaries when zoomed out)
+ */
+router.get("/timeline/:projectId", async (req, res) => {
+    try {
+        const { projectId } = req.params;
+        const { userId } = await req.auth();
+
+        const options = {};
+        for (const key of ["start", "end", "swimlane", "lod"]) {
+            if (req.query[key] !== undefined) options[key] = req.query[key];
+        }
+        for (const key of ["maxBars", "bucketDays"]) {
+            if (req.query[key] !== undefined) options[key] = Number(req.query[key]);
+        }
+
+        // Direct mode only needs membership; the AI service reads tasks itself
+        let project, details, response;
+        if (AI_DIRECT_DB) {
+            project = await prisma.project.findUnique({
+                where: { id: projectId },
+                select: { id: true, team_lead: true, members: { select: { userId: true } } }
+            });
+            if (!project) {
+                return res.status(404).json({ message: "Project not found" });
+            }
+        } else {
+            details = await getProjectWithDetails(projectId);
+            project = details.project;
+        }
+
+        const isMember = project.team_lead === userId ||
+            project.members.some(m => m.userId === userId);
+
+        if (!isMember) {
+            return res.status(403).json({ message: "Access denied" });
+        }
+
+        // Pages of an unchanged project reuse the AI service's cached layout
+        options.version = await getProjectVersion(projectId);
+
+        if (AI_DIRECT_DB) {
+            response = await axios.get(`${AI_SERVICE_URL}/api/v1/projects/${projectId}/timeline`, {
+                params: options,
+                timeout: 30000
+            });
+        } else {
+            response = await postToAI(`${AI_SERVICE_URL}/api/v1/timeline`, {
+                ...options,
+                project: AI_WIRE_FORMAT === "msgpack"
+                    ? formatProjectColumnar(project, details.existingDependencies)
+                    : formatProjectForAI(project, details.existingDependencies)
+            });
+        }
+
+        if (!response.data.success) {
+            return res.status(500).json({
+                message: "Timeline layout failed",
+                error: response.data.error
+            });
+        }
+
+        res.json(response.data);
+
+    } catch (error) {
+        console.error("Timeline error:", error);
+        res.status(500).json({
+            message: error.message || "Timeline layout failed",
+            error: error.response?.data?.error
+        });
+    }
+});
+
+/**
+ * GET /api/ai/portfolio/:workspaceId?worst=
+ * Workspace risk rollup (portfolio score, worst projects, factor breakdown).
+ * Resyncs the AI service's rollup with the database when their project ids
+ * differ (e.g. after a restart or a deletion): only missing projects are
+ * scored and sent, and deleted ones are dropped.
+ */
+router.get("/portfolio/:workspaceId", async (req, res) => {
+    try {
+        const { workspaceId } = req.params;
+        const { userId } = await req.auth();
+        const worst = req.query.worst !== undefined ? Number(req.query.worst) : 5;
+
+        const workspace = await prisma.workspace.findUnique({
+            where: { id: workspaceId },
+            select: { ownerId: true, members: { select: { userId: true } } }
+        });
+
+        if (!workspace) {
+            return res.status(404).json({ message: "Workspace not found" });
+        }
+
+        const isMember = workspace.ownerId === userId ||
+            workspace.members.some(m => m.userId === userId);
+
+        if (!isMember) {
+            return res.status(403).json({ message: "Access denied" });
+        }
+
+        const getRollup = () => axios.get(`${AI_SERVICE_URL}/api/v1/portfolio/${workspaceId}`, {
+            params: { worst, projectIds: true },
+            timeout: 30000
+        });
+        const [rollup, dbProjects] = await Promise.all([
+            getRollup(),
+            prisma.project.findMany({ where: { workspaceId }, select: { id: true } })
+        ]);
+        let response = rollup;
+
+        if (response.data.success) {
+            const known = new Set(response.data.projectIds || []);
+            const current = new Set(dbProjects.map(p => p.id));
+            const missing = [...current].filter(id => !known.has(id));
+            const stale = [...known].filter(id => !current.has(id));
+
+            // Deleted projects (or moved to another workspace): drop them
+            if (stale.length > 0) {
+                await Promise.all(stale.map(id =>
+                    axios.delete(`${AI_SERVICE_URL}/api/v1/portfolio/projects/${id}`, { timeout: 30000 })
+                ));
+            }
+
+            // Projects the rollup never saw (restart, never analyzed): score just those
+            if (missing.length > 0) {
+                const projects = await prisma.project.findMany({
+                    where: { id: { in: missing } },
+                    include: { tasks: { include: { assignee: true } } }
+                });
+                const taskIds = projects.flatMap(p => p.tasks.map(t => t.id));
+                const dependencies = taskIds.length > 0
+                    ? await prisma.taskDependency.findMany({ where: { taskId: { in: taskIds } } })
+                    : [];
+                const format = AI_WIRE_FORMAT === "msgpack" ? formatProjectColumnar : formatProjectForAI;
+                response = await postToAI(`${AI_SERVICE_URL}/api/v1/portfolio/refresh`, {
+                    workspaceId,
+                    worst,
+                    replace: false,
+                    projects: projects.map(project => {
+                        const ids = new Set(project.tasks.map(t => t.id));
+                        return format(project, dependencies.filter(d => ids.has(d.taskId)));
+                    })
+                });
+            } else if (stale.length > 0) {
+                response = await getRollup();
+            }
+        }
+
+        if (!response.data.success) {
+            return res.status(500).json({
+                message: "Portfolio rollup failed",
+                error: response.data.error
+            });
+        }
+
+        // The id list is only for the resync above
+        const { projectIds, ...portfolio } = response.data;
+        res.json(portfolio);
+
+    } catch (error) {
+        console.error("Portfolio error:", error);
+        res.status(500).json({
+            message: error.message || "Portfolio rollup failed",
+            error: error.response?.data?.error
+        });
+    }
+});
+
 /**
  * POST /api/ai/dependencies
  * Create a manual dependency